@@ -0,0 +1,209 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+from tools import Tools
+
+
+class clsCACHE:
+    """
+    Cache LRU des résultats de requêtes SELECT (voir clsSQL.active_cache), destiné aux requêtes de référence
+    répétées (codes devises, correspondances de sites...) dans les procédures ETL.
+
+    La clé est la base interrogée (serveur, base de données), le texte normalisé de la requête (espaces superflus
+    supprimés) et ses paramètres : un même cache peut être partagé par des objets clsSQL de bases différentes.
+      - taille_max : nombre maximum d'entrées.
+      - octets_max : volume maximum (estimé) des résultats conservés.
+      - duree : durée de vie d'une entrée en secondes (None : pas d'expiration).
+    Au delà de taille_max ou octets_max les entrées les moins récemment utilisées sont évincées.
+
+    Chaque entrée est rattachée aux tables citées par la requête (FROM / JOIN) : invalide(table) supprime
+    les entrées d'une table, clsSQL l'appelle après chaque Execute_Insert / Update / Delete et bulk_insert.
+    Une requête dont les tables ne sont pas toutes reconnues (sous-requête ou fonction dans FROM) est invalidée par
+    toute modification, une modification dont la table n'est pas reconnue vide le cache (voir clsSQL).
+    Les compteurs (succes, echecs, evictions, expirations) sont disponibles dans statistiques.
+    """
+    # constants
+    kTAILLE_MAX = 1000
+    kOCTETS_MAX = 64 * 1024 * 1024     # 64 Mo
+    kDUREE = 300                        # secondes
+
+    kTOUTES = "*"                       # tables d'une requête non analysable : entrée invalidée par toute modification
+
+    # suites d'espaces, hors littéraux ('...', "...") et noms entre crochets qui sont conservés tels quels (groupe 1)
+    _espaces = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\[[^\]]*\])|\s+")
+    _nom = r"(?:\[[^\]]+\]|[\w#@]+)(?:\.(?:\[[^\]]+\]|[\w#@]+))*"
+    _mots_cles = r"(?:WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|OUTER|ON|GROUP|ORDER|HAVING|UNION|EXCEPT|INTERSECT|WITH" \
+                 r"|OPTION|FOR|SET|OUTPUT|PIVOT|UNPIVOT|APPLY|WINDOW)\b"
+    _source = re.compile(r"\b(?:FROM|JOIN)\s+", re.IGNORECASE)
+    # élément d'une liste FROM : table, appel éventuel (fonction), alias (AS x, x ou [x]) et indicateurs WITH (NOLOCK)
+    _element = re.compile(rf"(?P<nom>{_nom})(?P<appel>\s*\()?(?:\s+AS\s+(?:\[[^\]]+\]|[\w#@]+)|\s+\[[^\]]+\]"
+                          rf"|\s+(?!{_mots_cles})[\w#@]+)?(?:\s+WITH\s*\([^)]*\))?\s*(?P<suite>,\s*)?", re.IGNORECASE)
+    _table_modifiee = re.compile(r"^\s*(?:INSERT\s+(?:INTO\s+)?|UPDATE\s+|DELETE\s+(?:FROM\s+)?|MERGE\s+(?:INTO\s+)?|TRUNCATE\s+TABLE\s+)"
+                                 rf"({_nom})", re.IGNORECASE)
+    _from = re.compile(r"\bFROM\b", re.IGNORECASE)
+
+    def __init__(self, taille_max: int = None, octets_max: int = None, duree: float = kDUREE):
+        self.taille_max = taille_max or self.kTAILLE_MAX
+        self.octets_max = octets_max or self.kOCTETS_MAX
+        self.duree = duree
+        self._entrees = OrderedDict()   # cle -> (valeur, octets, expiration, tables), la plus récente à droite
+        self._par_table: dict[str, set] = {}
+        self._octets = 0
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def statistiques(self) -> dict:
+        """
+        Retourne les compteurs du cache et son occupation.
+        """
+        total = self.succes + self.echecs
+        return {
+            "succes": self.succes,
+            "echecs": self.echecs,
+            "taux_succes": round(self.succes / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entrees": len(self._entrees),
+            "octets": self._octets,
+        }
+
+    @classmethod
+    def cle(cls, query: str, parametres: tuple = None, nature: str = "", base: tuple = ()) -> tuple:
+        """
+        Clé d'une requête : base interrogée, texte normalisé (espaces hors littéraux) et paramètres.
+        nature distingue les formes de résultat d'une même requête (lignes, clsTable).
+        base identifie la base de données, (serveur, base) pour clsSQL.
+        """
+        return tuple(base), nature, cls._espaces.sub(cls._espace, query).strip(), tuple(parametres or ())
+
+    @staticmethod
+    def _espace(correspondance) -> str:
+        return correspondance.group(1) or " "
+
+    @classmethod
+    def tables_lues(cls, query: str) -> set:
+        """
+        Retourne les tables citées (FROM, listes séparées par des virgules, JOIN) par une requête,
+        sans schéma ni crochets et en minuscules.
+        Une source qui n'est pas un nom de table (sous-requête, fonction) ajoute kTOUTES : la suite de la liste FROM
+        n'est pas analysée, l'entrée sera invalidée par toute modification.
+        """
+        tables = set()
+        for source in cls._source.finditer(query):
+            position = source.end()
+            while True:
+                element = cls._element.match(query, position)
+                if element is None or element.group("appel"):
+                    tables.add(cls.kTOUTES)
+                    break
+                tables.add(cls._nom_table(element.group("nom")))
+                if not element.group("suite"):
+                    break
+                position = element.end()
+        return tables
+
+    @classmethod
+    def table_modifiee(cls, query: str) -> str:
+        """
+        Retourne la table modifiée par une requête INSERT / UPDATE / DELETE / MERGE / TRUNCATE, None si elle n'est pas
+        reconnue. Un UPDATE ou DELETE comportant une clause FROM (UPDATE x SET ... FROM t x) peut désigner un alias :
+        None est alors retourné.
+        """
+        correspondance = cls._table_modifiee.match(query)
+        if correspondance is None:
+            return None
+        if query.lstrip()[:6].upper() in ("UPDATE", "DELETE") and cls._from.search(query, correspondance.end()):
+            return None
+        return cls._nom_table(correspondance.group(1))
+
+    def lit(self, cle: tuple):
+        """
+        Retourne la valeur associée à la clé, None si elle est absente ou expirée.
+        """
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return None
+            if entree[2] is not None and entree[2] <= Tools.get_current_time():
+                self._supprime(cle)
+                self.expirations += 1
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree[0]
+
+    def ecrit(self, cle: tuple, valeur, tables: set = None, octets: int = None):
+        """
+        Conserve une valeur. Une valeur plus volumineuse que octets_max n'est pas conservée.
+        """
+        octets = self.estime_octets(valeur) if octets is None else octets
+        if octets > self.octets_max:
+            return
+        expiration = None if self.duree is None else Tools.get_current_time() + self.duree
+        tables = tables or set()
+        with self._verrou:
+            if cle in self._entrees:
+                self._supprime(cle)
+            self._entrees[cle] = (valeur, octets, expiration, tables)
+            self._octets += octets
+            for table in tables:
+                self._par_table.setdefault(table, set()).add(cle)
+            while len(self._entrees) > self.taille_max or self._octets > self.octets_max:
+                self._supprime(next(iter(self._entrees)))
+                self.evictions += 1
+
+    def invalide(self, table: str) -> int:
+        """
+        Supprime les entrées des requêtes qui lisent la table, retourne leur nombre.
+        """
+        with self._verrou:
+            cles = self._par_table.pop(self._nom_table(table), set()) | self._par_table.pop(self.kTOUTES, set())
+            for cle in cles:
+                if cle in self._entrees:
+                    self._supprime(cle)
+            return len(cles)
+
+    def vide(self):
+        """
+        Supprime toutes les entrées, les compteurs sont conservés.
+        """
+        with self._verrou:
+            self._entrees.clear()
+            self._par_table.clear()
+            self._octets = 0
+
+    @staticmethod
+    def estime_octets(valeur) -> int:
+        """
+        Estimation du volume d'un résultat (liste de lignes) : taille des lignes et de leurs valeurs.
+        """
+        taille = sys.getsizeof(valeur)
+        if isinstance(valeur, (list, tuple)):
+            for ligne in valeur:
+                taille += sys.getsizeof(ligne)
+                if isinstance(ligne, (list, tuple)) or hasattr(ligne, "cursor_description"):
+                    taille += sum(sys.getsizeof(v) for v in ligne)
+        return taille
+
+    def _supprime(self, cle: tuple):
+        # appelée sous verrou
+        _, octets, _, tables = self._entrees.pop(cle)
+        self._octets -= octets
+        for table in tables:
+            cles = self._par_table.get(table)
+            if cles is not None:
+                cles.discard(cle)
+                if not cles:
+                    del self._par_table[table]
+
+    @staticmethod
+    def _nom_table(nom: str) -> str:
+        # [dbo].[Devises] -> devises : le schéma et les crochets sont ignorés
+        return nom.split(".")[-1].strip("[]").lower()
@@ -1,15 +1,91 @@
 import json
 import csv
+import copy
+import os
+import io
+import mmap
+from functools import partial
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from tools import Tools
+from clsETLSortie import clsETLSortie
+from clsETLPartition import clsETLPartition
+from clsTable import clsTable, clsLigne
+from clsTransformation import clsTransformation
+from clsREPERE import clsREPERE
+from clsTri import clsTri, clsRegroupement
 import xml
+import xml.etree.ElementTree as ET
+
+
+# instance de travail des processus du mode parallèle (voir clsETL._transforme_en_parallele)
+_instance_processus = None
+
+
+def _initialise_processus(instance):
+    global _instance_processus
+    _instance_processus = instance
+
+
+def _transforme_bloc(bloc: list) -> list:
+    procedure_ETL = getattr(_instance_processus, _instance_processus.procedure_ETL)
+    return [procedure_ETL(ligne) for ligne in bloc]
+
+
+def _lit_plage_ndjson(file_name: str, debut: int, fin: int) -> list:
+    """
+    Lecture d'une plage d'octets (alignée sur les fins de ligne) d'un fichier NDJSON, pour etl_input_parallele.
+    """
+    with open(file_name, "rb") as f:
+        f.seek(debut)
+        donnees = f.read(fin - debut)
+    return [json.loads(ligne) for ligne in donnees.splitlines() if ligne.strip()]
+
+
+def _lit_plage_csv(file_name: str, debut: int, fin: int, separateur: str, entete: list) -> list:
+    """
+    Lecture d'une plage d'octets (alignée sur les fins d'enregistrement) d'un fichier CSV, pour etl_input_parallele.
+    Le fichier est projeté en mémoire, seule la plage est décodée puis analysée comme le fait csv.DictReader.
+    """
+    with open(file_name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+        texte = donnees[debut:fin].decode("utf-8")
+    return list(csv.DictReader(io.StringIO(texte, newline=""), fieldnames=entete, delimiter=separateur))
+
+
+def _convertit_fichier(fichier_source: str, type_source: str, fichier_cible: str, type_cible: str,
+                       separateur: str, entete: list, separateur_cible: str, compression_cible: str = None) -> dict:
+    """
+    Conversion d'un fichier pour etl_convertit_repertoire. Une erreur est consignée dans le résultat,
+    elle n'interrompt pas le lot, le fichier cible n'est alors pas modifié (voir clsETLSortie.abandonne).
+    """
+    resultat = {"fichier_source": fichier_source, "fichier_cible": fichier_cible, "lignes": 0, "octets": 0,
+                "duree": 0.0, "erreur": None}
+    debut = Tools.get_current_time()
+    try:
+        lignes = clsETL().etl_input_iter(fichier_source, type_source, separateur, entete)
+        with clsETLSortie(fichier_cible, type_cible, separateur_cible, compression=compression_cible) as sortie:
+            sortie.ecrit_lignes(lignes)
+        resultat["lignes"] = sortie.lignes_ecrites
+        resultat["octets"] = sortie.octets_ecrits
+    except Exception as e:
+        resultat["erreur"] = f"{type(e).__name__} : {e}"
+    resultat["duree"] = round(Tools.get_current_time() - debut, 3)
+    return resultat
 
 
 class clsETL:
+    # constants
+    kTAILLE_BLOC = 1000     # nombre de lignes confiées à un processus en mode parallèle
+    kTAILLE_PLAGE = 16 * 1024 * 1024    # taille (en octets) d'une plage de lecture parallèle
+
 
     def __init__(self):
-        pass
+        self.nb_processus: int = None
+        self.taille_bloc: int = None
     
-    def etl_input(self, file_name: str, type_etl: str, separateur: str = ";", entete:list = None) -> list:
+    def etl_input(self, file_name: str, type_etl: str, separateur: str = ";", entete:list = None, balise_ligne: str = "row",
+                  compact: bool = False, compression: str = "auto") -> list:
         """
         Lit un fichier et retourne les données sous forme de liste.
         
@@ -20,38 +96,483 @@ class clsETL:
         :param separateur: séparateur pour les fichiers CSV : valeur par défaut ";"
            le mot clé TAB est admis et sera remplacé par la valeur ad'hoc antislash t.
         :param entete: liste de chaines contenant les entête de colonnes si le fichier CSV n'en contient pas1. N'a de sens que pour les fichiers CSV.
+        :param balise_ligne: cas du XML : nom de l'élément qui porte une ligne, "row" par défaut (format produit par etl_output).
+        :param compact: si True les données sont retournées dans une clsTable (entête partagé, lignes sous forme de tuples)
+           au lieu d'une liste de dictionnaires : la mémoire consommée est bien moindre, l'accès par nom de colonne est conservé.
+        :param compression: fichier compressé (voir Tools.ouvre_flux) : "auto" (détection par la signature du fichier),
+           "gzip", "bz2", "xz" ou None. Le fichier est décompressé en flux, sans fichier temporaire.
         :return: Liste des données lues depuis le fichier.
 
-        Ce traitement ne supporte pas une source de données SQL, il est réservé à la lecture de fichiers texte.
+        Ce traitement est réservé à la lecture de fichiers texte, pour une source de données SQL utiliser etl_input_sql.
+        Il charge tout le fichier en mémoire, pour les gros fichiers utiliser etl_input_iter.
+        """
+        if compact and type_etl.upper() == "CSV":
+            self.data_source = self._lit_table_csv(file_name, type_etl, separateur, entete, compression)
+        elif compact:
+            self.data_source = clsTable.depuis_dicts(self.etl_input_iter(file_name, type_etl, separateur, entete, balise_ligne=balise_ligne,
+                                                                         compression=compression))
+        else:
+            self.data_source = list(self.etl_input_iter(file_name, type_etl, separateur, entete, balise_ligne=balise_ligne,
+                                                        compression=compression))
+
+        return self.data_source
+
+    def _lit_table_csv(self, file_name: str, type_etl: str, separateur: str, entete: list, compression: str = "auto") -> clsTable:
+        """
+        Lecture d'un fichier CSV directement en clsTable : les lignes ne passent jamais par un dictionnaire.
+        Comme pour csv.DictReader les lignes vides sont ignorées et les valeurs manquantes valent None.
+        Une ligne comportant plus de valeurs que l'entête lève ValueError (csv.DictReader les range sous la clé None,
+        une table n'a pas de place pour elles) : elles ne sont pas ignorées silencieusement.
+        """
+        self.file_name = file_name
+        self.type_etl = type_etl
+        self.separateur = "\t" if separateur == "TAB" else separateur
+        self.entete = entete
+
+        with Tools.ouvre_flux(self.file_name, "r", compression, newline="") as f:
+            lecteur = csv.reader(f, delimiter=self.separateur)
+            table = clsTable(self.entete if self.entete is not None else next(lecteur, ()))
+            nb_colonnes = len(table.colonnes)
+            for valeurs in lecteur:
+                if not valeurs:
+                    continue
+                if len(valeurs) == nb_colonnes:
+                    table.lignes.append(tuple(valeurs))
+                elif len(valeurs) < nb_colonnes:
+                    table.lignes.append(tuple(valeurs) + (None,) * (nb_colonnes - len(valeurs)))
+                else:
+                    raise ValueError(f"{self.file_name} ligne {lecteur.line_num} : {len(valeurs)} valeurs "
+                                     f"pour {nb_colonnes} colonnes.")
+        return table
+
+    def etl_input_iter(self, file_name: str, type_etl: str, separateur: str = ";", entete: list = None, taille_lot: int = None,
+                       balise_ligne: str = "row", compression: str = "auto"):
+        """
+        Lit un fichier en flux et retourne un générateur des lignes lues (dictionnaires).
+        Le fichier n'est jamais chargé en entier : la mémoire consommée reste constante quelle que soit sa taille.
+
+        :param file_name: nom du fichier à lire, il s'agit du chemin complet du fichier.
+        :param type_etl: CSV, JSON, XML ou NDJSON (un objet JSON par ligne). Pour le JSON le document doit être un tableau, il est analysé de manière incrémentale.
+           Un document JSON qui n'est pas un tableau est retourné comme une ligne unique.
+           Pour le XML chaque élément balise_ligne (quelle que soit sa profondeur) donne une ligne : ses attributs
+           et ses éléments fils {balise: texte}. Les éléments sont libérés au fil de la lecture (iterparse).
+        :param separateur: séparateur pour les fichiers CSV, le mot clé TAB est admis.
+        :param entete: liste des entêtes de colonnes si le fichier CSV n'en contient pas.
+        :param taille_lot: si renseigné, les lignes sont retournées par lots (listes) de taille_lot lignes au plus.
+        :param balise_ligne: cas du XML : nom de l'élément qui porte une ligne, "row" par défaut.
+        :param compression: "auto" (détection), "gzip", "bz2", "xz" ou None, voir etl_input.
+        :return: générateur de lignes, ou de lots de lignes si taille_lot est renseigné.
+        """
+        lignes = self._lit_fichier(file_name, type_etl, separateur, entete, balise_ligne, compression)
+        if taille_lot is None:
+            return lignes
+        return Tools.par_lots(lignes, taille_lot)
+
+    def etl_input_parallele(self, file_name: str, type_etl: str, nb_processus: int = None, taille_plage: int = None,
+                            par_plage: bool = False, separateur: str = ";", entete: list = None):
+        """
+        Lecture d'un gros fichier en parallèle : le fichier est projeté en mémoire (mmap) et découpé en plages d'octets
+        alignées sur les fins d'enregistrement (Tools.plages_fichier) qui sont analysées dans un pool de processus.
+        Les lignes sont retournées dans l'ordre du fichier.
+        Formats supportés :
+          - NDJSON : une ligne du fichier = un enregistrement.
+          - CSV : les fins de ligne à l'intérieur d'une valeur entre guillemets sont reconnues, elles ne coupent pas
+            l'enregistrement. Les lignes sont identiques à celles de etl_input / etl_input_iter (csv.DictReader).
+            Le découpage compte les guillemets : le fichier est parcouru une fois en série avant l'analyse parallèle,
+            et il suppose que les guillemets n'apparaissent que pour encadrer des valeurs (voir Tools.plages_fichier).
+
+        :param nb_processus: nombre de processus, nombre de processeurs de la machine par défaut.
+        :param taille_plage: taille en octets d'une plage, kTAILLE_PLAGE par défaut.
+        :param par_plage: si True retourne des tuples ((debut, fin), lignes de la plage) au lieu des lignes.
+        :param separateur: séparateur pour les fichiers CSV, le mot clé TAB est admis.
+        :param entete: liste des entêtes de colonnes si le fichier CSV n'en contient pas, sinon la première ligne du fichier.
+        :return: générateur des lignes (dictionnaires), ou des plages si par_plage est True.
+        """
+        self.file_name = file_name
+        self.type_etl = type_etl
+        debut = 0
+        guillemet = None
+        match self.type_etl.upper():
+            case "NDJSON":
+                lecteur = _lit_plage_ndjson
+            case "CSV":
+                self.separateur = "\t" if separateur == "TAB" else separateur
+                self.entete = entete
+                guillemet = b'"'
+                if self.entete is None:
+                    self.entete, debut = self._lit_entete_csv()
+                lecteur = partial(_lit_plage_csv, separateur=self.separateur, entete=self.entete)
+            case _:
+                raise ValueError(f"Unsupported ETL type for parallel reading: {self.type_etl}")
+
+        nb_processus = nb_processus or os.cpu_count() or 1
+        plages = Tools.plages_fichier(self.file_name, taille_plage or self.kTAILLE_PLAGE, debut, guillemet)
+        en_cours = deque()
+
+        def resultat_suivant():
+            # au plus 2 plages par processus sont en mémoire
+            plage_lue, resultat = en_cours.popleft()
+            return [(plage_lue, resultat.result())] if par_plage else resultat.result()
+
+        with ProcessPoolExecutor(max_workers=nb_processus) as pool:
+            for plage in plages:
+                en_cours.append((plage, pool.submit(lecteur, self.file_name, *plage)))
+                if len(en_cours) >= 2 * nb_processus:
+                    yield from resultat_suivant()
+            while en_cours:
+                yield from resultat_suivant()
+
+    def _lit_entete_csv(self) -> tuple[list, int]:
+        """
+        Retourne l'entête du fichier CSV (premier enregistrement) et la position de l'octet qui le suit.
+        """
+        if os.path.getsize(self.file_name) == 0:
+            return [], 0
+        with open(self.file_name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+            fin = Tools.fin_enregistrement(donnees, 0, 0, b'"')
+            texte = donnees[:fin].decode("utf-8")
+        return next(csv.reader(io.StringIO(texte, newline=""), delimiter=self.separateur), []), fin
+
+    def etl_input_sql(self, sql, query: str, taille_lot: int = None):
+        """
+        Source de données SQL : retourne un générateur des lignes (dictionnaires) du résultat de la requête.
+        La lecture est effectuée par lots de taille_lot lignes (voir clsSQL.fetch_batches), rien n'est matérialisé.
+
+        :param sql: objet clsSQL (ou dérivé, clsMSSQL) dont la connexion est ouverte.
+        :param query: requête SQL à exécuter.
+        :param taille_lot: nombre de lignes lues à chaque fetchmany.
+        """
+        return sql.execute_select_iter(query, dict_rows=True, taille_lot=taille_lot)
+
+    def etl_export_sql(self, sql, query: str, file_name: str, type_etl: str, separateur: str = ";",
+                       taille_lot: int = None, taille_tampon: int = None, compact: bool = False,
+                       compression: str = "auto", niveau_compression: int = None) -> dict:
+        """
+        Export du résultat d'une requête SQL dans un fichier CSV / JSON / XML.
+        Les lots lus sur le curseur sont mis en forme et écrits au fil de l'eau, sans liste intermédiaire :
+        la mémoire consommée est bornée quelle que soit la taille de la table exportée.
+        Le fichier est écrit sous un nom temporaire et renommé une fois complet : en cas d'erreur le fichier cible
+        n'est pas modifié (voir clsETLSortie).
+
+        :param sql: objet clsSQL (ou dérivé, clsMSSQL) dont la connexion est ouverte.
+        :param query: requête SQL à exécuter.
+        :param file_name: nom du fichier cible, il s'agit du chemin complet du fichier.
+        :param type_etl: CSV, JSON, XML ou NDJSON.
+        :param separateur: séparateur pour les fichiers CSV, le mot clé TAB est admis.
+        :param taille_lot: nombre de lignes lues à chaque fetchmany.
+        :param taille_tampon: taille (en caractères) du tampon d'écriture.
+        :param compact: JSON / NDJSON produit sans espace ni retour à la ligne entre les lignes.
+           Les dates, Decimal... sont sérialisés par clsJSON, la requête n'a pas à les convertir en texte.
+        :param compression / niveau_compression: compression du fichier cible, voir clsETLSortie.
+        :return: bilan de l'export {"fichier", "lignes", "octets", "duree", "lignes_par_seconde"}.
+           ConnectionError est levée si la connexion de sql n'est pas ouverte : aucun fichier n'est alors écrit.
+        """
+        if not sql.connection:
+            raise ConnectionError(f"Export {file_name} : aucune connexion active.")
+        self.file_name = file_name
+        self.type_etl = type_etl
+        self.separateur = separateur
+
+        with clsETLSortie(self.file_name, self.type_etl, self.separateur, taille_tampon, compact=compact,
+                          compression=compression, niveau_compression=niveau_compression) as sortie:
+            # l'entête est retournée en premier par execute_select_iter, les lignes restent des pyodbc.Row
+            sortie.ecrit_lignes(sql.execute_select_iter(query, header=True, taille_lot=taille_lot))
+        self.bilan = sortie.bilan
+        sql.log.ecrit_log(10,f"Export {self.file_name} : {self.bilan['lignes']} lignes, {self.bilan['octets']} octets, "
+                             f"{self.bilan['lignes_par_seconde']} lignes/s")
+        return self.bilan
+
+    def etl_export_sql_incremental(self, sql, query: str, file_name: str, type_etl: str, colonne_repere: str,
+                                   fichier_etat: str, travail: str = None, repere_initial=None, separateur: str = ";",
+                                   taille_lot: int = None, taille_tampon: int = None, compact: bool = False,
+                                   compression: str = "auto", niveau_compression: int = None) -> dict:
+        """
+        Export incrémental du résultat d'une requête SQL : seules les lignes au delà du repère (high-water mark)
+        de la précédente exécution sont lues et écrites, au lieu d'une extraction complète à chaque passage.
+
+        Le repère est la plus grande valeur de colonne_repere écrite (clé auto-incrémentée, rowversion, date de mise à jour),
+        il est conservé par travail dans le fichier d'état local fichier_etat (voir clsREPERE).
+        La requête est encapsulée : SELECT * FROM (query) WHERE colonne_repere > ? ORDER BY colonne_repere,
+        elle ne doit donc pas comporter d'ORDER BY et doit retourner colonne_repere. Le repère est passé en paramètre.
+
+        Le fichier est d'abord écrit sous un nom temporaire puis renommé, le repère n'avance qu'ensuite :
+        une extraction en erreur ne laisse ni fichier partiel ni repère avancé, elle sera reprise au prochain passage.
+        Sans nouvelle ligne le fichier cible n'est pas modifié (un delta précédent non encore traité est conservé)
+        et le repère est inchangé. Un delta écrit remplace en revanche le précédent : pour que chaque exécution produise
+        son propre fichier, file_name peut contenir le champ {horodatage} ("c:/out/commandes_{horodatage}.csv"),
+        remplacé par la date et l'heure de l'exécution (AAAAMMJJ_HHMMSS_microsecondes).
+
+        :param colonne_repere: colonne croissante qui sert de repère, nom de colonne SQL simple (lettres, chiffres, _).
+        :param fichier_etat: fichier JSON des repères, il peut être partagé entre plusieurs travaux.
+        :param travail: nom du travail dans le fichier d'état, nom du fichier cible (sans répertoire) par défaut.
+        :param repere_initial: repère utilisé au premier passage (aucun repère enregistré), extraction complète si None.
+        Les autres paramètres sont ceux de etl_export_sql.
+        :return: bilan de l'export (voir etl_export_sql) complété de "repere_precedent" et "repere",
+           "fichier" vaut None si aucune ligne n'a été écrite.
+        """
+        if not sql.connection:
+            raise ConnectionError(f"Export incrémental {file_name} : aucune connexion active.")
+        if not Tools.kIDENTIFIANT_SQL.match(colonne_repere):
+            raise ValueError(f"Nom de colonne repère invalide : {colonne_repere!r}")
+        travail = travail or os.path.basename(file_name)
+        if "{horodatage}" in file_name:
+            file_name = file_name.replace("{horodatage}", datetime.now().strftime("%Y%m%d_%H%M%S_%f"))
+        self.file_name = file_name
+        self.type_etl = type_etl
+        self.separateur = separateur
+        reperes = clsREPERE(fichier_etat)
+        repere_precedent = reperes.lit(travail)
+        if repere_precedent is None:
+            repere_precedent = repere_initial
+
+        # le nom de colonne est validé puis encadré : il ne peut pas modifier la requête
+        requete = f"SELECT * FROM ({query}) AS source_incrementale"
+        parametres = ()
+        if repere_precedent is not None:
+            requete += f" WHERE [{colonne_repere}] > ?"
+            parametres = (repere_precedent,)
+        requete += f" ORDER BY [{colonne_repere}]"
+
+        repere = repere_precedent
+        def lignes_suivies():
+            # les lignes sont triées sur le repère : celui de la dernière ligne écrite est le nouveau repère
+            nonlocal repere
+            lignes = sql.execute_select_iter(requete, header=True, taille_lot=taille_lot, parametres=parametres)
+            entete = next(lignes, None)
+            if entete is None:
+                return
+            position = list(entete).index(colonne_repere)
+            yield entete
+            for ligne in lignes:
+                yield ligne
+                if ligne[position] is not None:
+                    repere = ligne[position]
+
+        temporaire = f"{self.file_name}.{os.getpid()}.tmp"
+        try:
+            with clsETLSortie(temporaire, self.type_etl, self.separateur, taille_tampon, compact=compact,
+                              compression=Tools.detecte_compression(self.file_name, lecture=False) if compression == "auto" else compression,
+                              niveau_compression=niveau_compression) as sortie:
+                sortie.ecrit_lignes(lignes_suivies())
+            if sortie.lignes_ecrites:
+                os.replace(temporaire, self.file_name)
+            else:
+                os.remove(temporaire)
+        except Exception:
+            if os.path.isfile(temporaire):
+                os.remove(temporaire)
+            raise
+
+        if repere != repere_precedent:
+            reperes.avance(travail, repere, sortie.lignes_ecrites)
+        self.bilan = sortie.bilan
+        self.bilan["fichier"] = self.file_name if sortie.lignes_ecrites else None
+        self.bilan["repere_precedent"] = repere_precedent
+        self.bilan["repere"] = repere
+        sql.log.ecrit_log(10,f"Export incrémental {travail} : {self.bilan['lignes']} lignes, repère {repere_precedent} -> {repere}")
+        return self.bilan
+
+    def etl_convertit_repertoire(self, repertoire_source: str, type_source: str, repertoire_cible: str, type_cible: str,
+                                 type_fichier: str = None, prefixe_fichier: str = None, contient_nom: str = None,
+                                 separateur: str = ";", entete: list = None, separateur_cible: str = ";",
+                                 nb_travailleurs: int = 4, processus: bool = False, compression_cible: str = None) -> list[dict]:
+        """
+        Conversion d'un lot de fichiers d'un répertoire vers un autre format.
+        Les fichiers sont sélectionnés comme pour Tools.list_file (type_fichier, prefixe_fichier, contient_nom)
+        et convertis en parallèle, chaque fichier est traité en flux (etl_input_iter vers clsETLSortie).
+        Le fichier cible porte le nom du fichier source avec l'extension du format cible.
+        Les fichiers source compressés (gzip, bz2, xz) sont détectés et décompressés en flux.
+        Chaque fichier cible est écrit sous un nom temporaire puis renommé une fois complet (voir clsETLSortie).
+        ValueError est levée avant toute conversion si deux fichiers source ont le même fichier cible (a.csv et a.csv.gz,
+        a.json et a.xml vers CSV...) ou si un fichier cible est son propre fichier source (même répertoire et même format).
+
+        :param type_source / type_cible: format des fichiers source et cible.
+        :param separateur / entete: paramètres de lecture des fichiers CSV source (voir etl_input).
+        :param separateur_cible: séparateur des fichiers CSV cible.
+        :param nb_travailleurs: nombre de fichiers convertis simultanément.
+        :param processus: si True les conversions sont réparties entre des processus (conversions coûteuses en CPU),
+           sinon entre des threads.
+        :param compression_cible: "gzip", "bz2" ou "xz" pour compresser les fichiers cible (l'extension .gz, .bz2 ou .xz
+           est ajoutée au nom), None par défaut.
+        :return: une entrée par fichier, dans l'ordre de la liste des fichiers :
+           {"fichier_source", "fichier_cible", "lignes", "octets", "duree", "erreur"}, erreur vaut None si la conversion a réussi.
+           Un fichier en erreur n'interrompt pas le lot.
+        """
+        if repertoire_source[-1] != Tools.get_separator():
+            repertoire_source += Tools.get_separator()
+        if repertoire_cible[-1] != Tools.get_separator():
+            repertoire_cible += Tools.get_separator()
+        if not os.path.isdir(repertoire_cible):
+            os.makedirs(repertoire_cible)
+
+        fichiers = Tools.list_file(repertoire_source, type_fichier, prefixe_fichier, contient_nom)
+        sources = [repertoire_source + fichier for fichier in fichiers]
+        extensions = {None: "", "gzip": ".gz", "bz2": ".bz2", "xz": ".xz"}
+        if compression_cible not in extensions:
+            raise ValueError(f"Compression non supportée : {compression_cible}")
+        extension = extensions[compression_cible]
+        cibles = []
+        for fichier in fichiers:
+            nom = fichier
+            if Tools.detecte_compression(nom, lecture=False) is not None:
+                nom = os.path.splitext(nom)[0]
+            cibles.append(repertoire_cible + os.path.splitext(nom)[0] + "." + type_cible.lower() + extension)
+        nb = len(fichiers)
+
+        # deux conversions ne doivent pas écrire le même fichier, ni écraser un fichier source encore à lire
+        par_cible: dict[str, str] = {}
+        for source, cible in zip(sources, cibles):
+            chemin = os.path.normcase(os.path.abspath(cible))
+            if chemin in par_cible:
+                raise ValueError(f"Les fichiers {par_cible[chemin]} et {source} ont le même fichier cible : {cible}")
+            par_cible[chemin] = source
+        # liens et chemins équivalents : un fichier cible existant est comparé aux sources comme os.path.samefile
+        existantes = {(etat.st_dev, etat.st_ino) for etat in (os.stat(cible) for cible in cibles if os.path.isfile(cible))}
+        for source in sources:
+            etat = os.stat(source)
+            if os.path.normcase(os.path.abspath(source)) in par_cible or (etat.st_dev, etat.st_ino) in existantes:
+                raise ValueError(f"Le fichier source {source} serait remplacé par un fichier cible.")
+
+        executeur = ProcessPoolExecutor if processus else ThreadPoolExecutor
+        with executeur(max_workers=nb_travailleurs) as pool:
+            return list(pool.map(_convertit_fichier, sources, [type_source] * nb, cibles, [type_cible] * nb,
+                                 [separateur] * nb, [entete] * nb, [separateur_cible] * nb, [compression_cible] * nb))
+
+    def _lit_fichier(self, file_name: str, type_etl: str, separateur: str, entete: list, balise_ligne: str = "row",
+                     compression: str = "auto"):
+        """
+        Générateur de lecture ligne à ligne du fichier source.
         """
         self.file_name = file_name
         self.type_etl = type_etl
         self.separateur = separateur
         self.entete = entete
-        self.data_source = []  # Initialize an empty list to hold the data source
 
         if self.separateur == "TAB":
             self.separateur = "\t"
 
-        with open(file=self.file_name, mode="r", encoding="utf-8") as f:
+        with Tools.ouvre_flux(self.file_name, "r", compression) as f:
             match self.type_etl.upper():
                 case "CSV":
                     if self.entete is None:
                         olSource = csv.DictReader(f, delimiter=self.separateur)
                     else:
                         olSource = csv.DictReader(f, fieldnames=self.entete, delimiter=self.separateur)
-                    self.data_source = list(olSource)
+                    yield from olSource
                 case "JSON":
-                    self.data_source = json.load(f)
+                    yield from self._lit_tableau_json(f)
                 case "XML":
-                    # Placeholder for XML parsing logic
-                    raise NotImplementedError("XML parsing is not implemented yet.")
+                    yield from self._lit_xml(f, balise_ligne)
+                case "NDJSON":
+                    for ligne in f:
+                        if ligne.strip():
+                            yield json.loads(ligne)
                 case _:
                     raise ValueError(f"Unsupported ETL type: {self.type_etl}")
 
-        return self.data_source
+    def _lit_xml(self, f, balise_ligne: str):
+        """
+        Lecture en flux d'un document XML : chaque élément balise_ligne est transformé en dictionnaire
+        puis vidé et détaché de son parent, la mémoire consommée ne dépend pas de la taille du document.
+        Les espaces de noms sont ignorés dans le nom des balises.
+        """
+        parents = []
+        for evenement, element in ET.iterparse(f, events=("start", "end")):
+            if evenement == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag.rpartition("}")[2] != balise_ligne:
+                continue
+            ligne = dict(element.attrib)
+            for colonne in element:
+                ligne[colonne.tag.rpartition("}")[2]] = "" if colonne.text is None else colonne.text
+            yield ligne
+            element.clear()
+            if parents:
+                parents[-1].remove(element)
+
+    def _lit_tableau_json(self, f, taille_bloc: int = 65536):
+        """
+        Analyse incrémentale d'un tableau JSON : le fichier est lu par blocs et chaque élément
+        du tableau est décodé et retourné dès qu'il est complet.
+        """
+        decodeur = json.JSONDecoder()
+        tampon = ""
+        pos = 0
+        fin_fichier = False
+
+        def complete(taille: int) -> bool:
+            # ajoute un bloc au tampon en abandonnant la partie déjà consommée
+            nonlocal tampon, pos, fin_fichier
+            bloc = f.read(taille)
+            if bloc == "":
+                fin_fichier = True
+                return False
+            tampon = tampon[pos:] + bloc
+            pos = 0
+            return True
+
+        def caractere_suivant() -> str:
+            # se positionne sur le prochain caractère significatif, "" en fin de fichier
+            nonlocal pos
+            while True:
+                while pos < len(tampon) and tampon[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(tampon):
+                    return tampon[pos]
+                if not complete(taille_bloc):
+                    return ""
+
+        premier = caractere_suivant()
+        if premier == "":
+            return
+        if premier != "[":
+            # document qui n'est pas un tableau : retourné comme une ligne unique
+            while complete(taille_bloc):
+                pass
+            yield json.loads(tampon[pos:])
+            return
+        pos += 1
+
+        if caractere_suivant() == "]":
+            return
+        while True:
+            if caractere_suivant() == "":
+                raise ValueError(f"Tableau JSON incomplet dans le fichier {self.file_name}")
+            try:
+                element, fin = decodeur.raw_decode(tampon, pos)
+                # un nombre coupé par la fin du tampon peut être décodé à tort (ex: "3." pour "3.5") :
+                # l'élément est validé s'il est suivi d'un séparateur, ou d'espaces qui le terminent forcément
+                # (le séparateur est alors cherché par caractere_suivant, quelle que soit la longueur des espaces)
+                suite = fin
+                while suite < len(tampon) and tampon[suite] in " \t\r\n":
+                    suite += 1
+                if suite < len(tampon):
+                    incertain = not fin_fichier and tampon[suite] not in ",]"
+                else:
+                    incertain = not fin_fichier and suite == fin
+            except json.JSONDecodeError:
+                if fin_fichier:
+                    raise
+                incertain = True
+            if incertain:
+                # élément incomplet : on double la lecture pour éviter un coût quadratique sur les gros éléments
+                complete(max(taille_bloc, len(tampon) - pos))
+                continue
+            pos = fin
+            yield element
+            separateur = caractere_suivant()
+            if separateur == "":
+                raise ValueError(f"Tableau JSON incomplet dans le fichier {self.file_name}")
+            if separateur == "]":
+                return
+            if separateur != ",":
+                raise ValueError(f"Tableau JSON mal formé dans le fichier {self.file_name} : '{separateur}' inattendu")
+            pos += 1
     
-    def etl_transform(self, data_source: list[dict], procedure_ETL: str = None) -> list[dict]:
+    def etl_transform(self, data_source: list[dict], procedure_ETL: str = None, transformation=None,
+                      jointure=None, nb_processus: int = None, taille_bloc: int = None) -> list[dict]:
         """
         Transforme les données source en appliquant une procédure ETL.
         
@@ -59,26 +580,88 @@ class clsETL:
            Si procedure_ETL est défini, data_source doit être une liste de dictionnaires.
         :param procedure_ETL: Procédure ETL personnalisée à appliquer sur chaque ligne de données, par défaut None.
           Dans ce cas le paramètre type_etl est ignoré, les données cibles doivent impérativement être au format cible désiré.
+          Les méthodes {procedure_ETL}_pre et {procedure_ETL}_post sont appelées si elles existent.
+        :param transformation: transformation déclarative (dictionnaire de spécification ou clsTransformation),
+          compilée une seule fois. Ignorée si procedure_ETL est renseignée.
+        :param jointure: enrichissement par une ou plusieurs tables de référence (clsJointure ou liste de clsJointure),
+          appliqué avant la transformation. Ignoré si procedure_ETL est renseignée.
+        :param nb_processus: mode parallèle de procedure_ETL, voir etl_output. Séquentiel par défaut,
+          quels que soient les paramètres d'un appel précédent.
+        :param taille_bloc: nombre de lignes confiées à un processus à la fois, kTAILLE_BLOC par défaut.
         :return: Liste des données transformées.
         """
         self.data_source = data_source
         self.procedure_ETL = procedure_ETL
+        self.nb_processus = nb_processus
+        self.taille_bloc = taille_bloc or self.kTAILLE_BLOC
         self.data_cible = []
 
+        if self.procedure_ETL is not None:
+            self._GestionMethodeTransform(self.procedure_ETL)
+            self._read_data()
+        elif transformation is not None or jointure is not None:
+            self.data_cible = list(self._enchaine_etapes(self.data_source, transformation, jointure))
+
         return self.data_cible
 
-    def etl_output(self, file_name: str, data_source: list[dict], type_etl: str, procedure_ETL: str = None, separateur: str = ";"):
+    def etl_trie(self, data_source, cles, decroissant: bool = False, memoire_max: int = None, repertoire: str = None):
+        """
+        Tri des lignes dans un budget mémoire (tri externe, voir clsTri) : s'insère entre etl_input_iter et etl_output,
+        les volumes supérieurs à la mémoire disponible sont triés au travers de fichiers temporaires.
+
+        :param data_source: itérable de lignes (dictionnaires, clsTable...), consommé à la demande.
+        :param cles: colonne ou liste des colonnes de tri, une colonne peut être accompagnée d'une conversion : ("montant", float).
+        :param decroissant: ordre décroissant.
+        :param memoire_max: volume maximum (en octets, estimé) des lignes conservées en mémoire, clsTri.kMEMOIRE_MAX par défaut.
+        :param repertoire: répertoire des fichiers temporaires, celui du système par défaut.
+        :return: générateur des lignes triées (dictionnaires).
+        """
+        return clsTri(cles, decroissant, memoire_max, repertoire).trie(data_source)
+
+    def etl_regroupe(self, data_source, cles, agregats: dict, memoire_max: int = None, repertoire: str = None):
+        """
+        Regroupement et agrégation des lignes (GROUP BY) dans un budget mémoire, voir clsRegroupement.
+
+        :param data_source: itérable de lignes, consommé à la demande.
+        :param cles: colonne ou liste des colonnes de regroupement.
+        :param agregats: {colonne cible: (fonction, colonne source)}, fonction parmi "nombre", "somme", "moyenne",
+           "min", "max", "premier", "dernier".
+        :param memoire_max / repertoire: voir etl_trie.
+        :return: générateur des groupes (dictionnaires), dans l'ordre des clés.
+        """
+        return clsRegroupement(cles, agregats, memoire_max, repertoire).regroupe(data_source)
+
+    @staticmethod
+    def _enchaine_etapes(lignes, transformation=None, jointure=None):
+        """
+        Enchaîne en flux les étapes déclaratives : jointures (dans l'ordre de la liste) puis transformation.
+        """
+        if jointure is not None:
+            for etape in jointure if isinstance(jointure, (list, tuple)) else [jointure]:
+                lignes = etape.applique(lignes)
+        if transformation is not None:
+            if not isinstance(transformation, clsTransformation):
+                transformation = clsTransformation(transformation)
+            lignes = transformation.applique(lignes)
+        return lignes
+
+    def etl_output(self, file_name: str, data_source: list[dict], type_etl: str, procedure_ETL: str = None, separateur: str = ";", taille_tampon: int = None,
+                   nb_processus: int = None, taille_bloc: int = None, ajout: bool = False, compact: bool = False,
+                   transformation=None, compression: str = "auto", niveau_compression: int = None, jointure=None,
+                   partition: dict = None) -> dict:
         """
         Execute the ETL process.
         
         :param file_name: nom du fichier ou seront sauvegardées les données, il s'agit du chemin complet du fichier.
         :param data_source: données à transformer, il s'agit d'une liste de dictionnaire des données à transformer.
            Si procedure_ETL est défini, data_source doit être une liste de dictionnaires.
+           Sans procedure_ETL, tout itérable est accepté (générateur de etl_input_iter par exemple), il est consommé en flux.
+           Le fichier n'est alors remplacé qu'une fois complet : une erreur en cours de lecture le laisse inchangé.
         :param type_etl: Type of ETL operation (e.g., CSV, JSON).
            Cas du JSON et du XML : La requête doit IMPERATIVEMENT retourner l'entête de la table.
            Qui sera utilisée pour la transformation.
-           Toutes les dates doivent être au format texte "CONVERT(varchar(10), Date, 23)", 
-           les dates doivent être au format ISO 8601 (YYYY-MM-DD).
+           Les dates, Decimal... retournés par pyodbc sont sérialisés par clsJSON (dates au format ISO 8601),
+           il n'est plus nécessaire de les convertir en texte dans la requête.
         :param procedure_ETL: Procédure ETL personnalisée à appliquer sur chaque ligne de données, par défaut None.
           Dans ce cas le paramètre type_etl est ignoré, les données cibles doivent impérativement être au format cible désiré.
           De plus 2 procédures sont déduites et appelées si elles existent dans la classe : {nom_procedure_pre} 
@@ -88,124 +671,125 @@ class clsETL:
           initialisations ou des nettoyages avant et après la transformation des données.
         :param separateur: séparateur pour les fichiers CSV : valeur par défaut ";"
            le mot clé TAB est admis et sera remplacé par la valeur ad'hoc antislash t.
+        :param taille_tampon: taille (en caractères) du tampon d'écriture du moteur en flux, 1 M par défaut.
+        :param nb_processus: mode parallèle de procedure_ETL (optionnel) : nombre de processus entre lesquels les lignes sont réparties.
+           Les méthodes _pre et _post sont exécutées une seule fois dans le processus appelant, l'ordre des lignes est conservé.
+           L'instance (sans data_source ni data_cible) est copiée dans chaque processus : elle doit être sérialisable (pickle)
+           et procedure_ETL ne doit dépendre que de la ligne et de l'état établi par la méthode _pre.
+        :param taille_bloc: nombre de lignes confiées à un processus à la fois, kTAILLE_BLOC par défaut.
+        :param ajout: ajoute les lignes à la fin du fichier existant au lieu de l'écraser (types CSV et NDJSON, sans procedure_ETL).
+        :param compact: JSON / NDJSON produit sans espace ni retour à la ligne entre les lignes (sans procedure_ETL).
+        :param transformation: transformation déclarative (dictionnaire de spécification ou clsTransformation, voir
+           clsTransformation) appliquée en flux avant l'écriture. Alternative à procedure_ETL pour les cas courants
+           (renommer, convertir, filtrer, supprimer ou dériver des colonnes) : elle est compilée une seule fois.
+           procedure_ETL reste le moyen de traiter les cas particuliers, les deux sont exclusifs.
+        :param compression: compression du fichier cible (sans procedure_ETL) : "auto" (déduite de l'extension .gz, .bz2, .xz),
+           "gzip", "bz2", "xz" ou None. Le fichier est compressé en flux.
+        :param niveau_compression: niveau de compression (1 à 9), celui par défaut du module sinon.
+        :param jointure: enrichissement par une ou plusieurs tables de référence (clsJointure ou liste de clsJointure, voir
+           clsJointure), sans procedure_ETL : chaque référence est lue une fois et indexée en mémoire, les lignes sont
+           enrichies en flux avant la transformation. Remplace les requêtes par ligne d'une procédure ETL.
+        :param partition: écriture partitionnée (sans procedure_ETL), dictionnaire des options de clsETLPartition :
+           {"cle": colonne ou fonction, "lignes_max", "octets_max", "max_ouverts", "nb_travailleurs", "taille_lot", "manifeste"}.
+           Les fichiers sont nommés d'après file_name (voir clsETLPartition) et écrits en parallèle, le bilan retourné
+           comprend alors le manifeste des fichiers produits ("fichiers" : fichier, partition, lignes, octets).
+        :return: bilan de l'écriture (voir clsETLSortie.bilan), None pour une procédure ETL personnalisée.
         """
         self.file_name = file_name
         self.data_source = data_source
         self.type_etl = type_etl
-        # self.procedure_ETL = procedure_ETL
-        # if self.procedure_ETL != None:
-        #     # si procedureETL = None on ne calcule pas les pré et post requis puisque par definition ils n'existent pas
-        #     self.procedure_ETL_pre = procedure_ETL+"_pre"
-        #     self.procedure_ETL_post = procedure_ETL+"_post"
+        self.procedure_ETL = procedure_ETL
         self.separateur = separateur
+
+        if self.procedure_ETL is not None and (transformation is not None or jointure is not None):
+            raise ValueError("procedure_ETL et transformation / jointure ne peuvent pas être utilisées ensemble.")
+
+        if self.procedure_ETL is None:
+            # cas standard : mise en forme et écriture en flux, data_cible n'est pas constituée
+            lignes = self._enchaine_etapes(self.data_source, transformation, jointure)
+            if partition is not None:
+                with clsETLPartition(self.file_name, self.type_etl, self.separateur, partition.get("cle"),
+                                     partition.get("lignes_max"), partition.get("octets_max"), partition.get("max_ouverts"),
+                                     partition.get("nb_travailleurs"), partition.get("taille_lot"), taille_tampon,
+                                     compact, compression, niveau_compression, partition.get("manifeste")) as sortie:
+                    sortie.ecrit_lignes(lignes)
+                self.bilan = sortie.bilan
+                return self.bilan
+            with clsETLSortie(self.file_name, self.type_etl, self.separateur, taille_tampon, ajout=ajout, compact=compact,
+                              compression=compression, niveau_compression=niveau_compression) as sortie:
+                sortie.ecrit_lignes(lignes)
+            self.bilan = sortie.bilan
+            return self.bilan
+
+        self._GestionMethodeTransform(self.procedure_ETL)
+        self.nb_processus = nb_processus
+        self.taille_bloc = taille_bloc or self.kTAILLE_BLOC
         self.data_cible = []  # Initialize an empty list to hold transformed data        
 
         self._read_data()
         
-        # Save the transformed data
-        self._save_data()
+        # Save the transformed data, sauf format $MAN$ : la sauvegarde est à la charge du post traitement
+        if self.type_etl != "$MAN$":
+            self._save_data()
 
     def _read_data(self):
         """
-            Boucle de lecture des données depuis la source.
-        """
-        entete: list = []
-        if hasattr(self,'procedure_ETL_pre'):
-            if self.procedure_ETL_pre != None:
-                procedure_ETL_pre = getattr(self, self.procedure_ETL_pre)
-                procedure_ETL_pre()
-        i = 0
-        for ligne in self.data_source:
-            i += 1
-            if self.procedure_ETL!= None:
-                # Effectue les transformations ETL sur la ligne 
-                procedure_ETL = getattr(self, self.procedure_ETL)
-                ligne=procedure_ETL(ligne)
-                self.data_cible.append(ligne)  # Add newline character for CSV/JSON formatting
-
-            else:
-                match self.type_etl.upper():
-                    case "CSV":
-                        # Transform the line for CSV
-                        ligne = self._transform_for_csv(ligne)
-                        self.data_cible.append(ligne+ "\n")
-                    case "JSON":
-                        # Transform the line for JSON
-                        ligne = self._transform_for_json(ligne)
-                        self.data_cible.append(ligne)  # Add newline character for CSV/JSON formatting
-                    case "XML":
-                        if i == 1:
-                            entete = ligne
-                        else:
-                            ligne_xml = self._transform_for_xml(ligne, entete)
-                            self.data_cible.append(ligne_xml)
-                    case _:
-                        raise ValueError(f"Unsupported ETL type: {self.type_etl}")
-        if self.procedure_ETL == None:
-            match self.type_etl.upper():
-                case "CSV":
-                    pass
-                case "JSON":
-                    self.data_cible = "[\n" + ",\n".join(self.data_cible) + "\n]"
-                case "XML": 
-                    pass
-                    
-        if hasattr(self, self.procedure_ETL_post):
-            if self.procedure_ETL_post != None:
-                procedure_ETL_post = getattr(self, self.procedure_ETL_post)
-                procedure_ETL_post()
-        
-    def _transform_for_csv(self, ligne):
+            Boucle de lecture des données depuis la source, chaque ligne est transformée par procedure_ETL.
+            Le cas standard (sans procedure_ETL) est écrit en flux par etl_output au travers de clsETLSortie.
         """
-        Transform the data line for CSV format.
+        if getattr(self, 'procedure_ETL_pre', None) != None:
+            procedure_ETL_pre = getattr(self, self.procedure_ETL_pre)
+            procedure_ETL_pre()
+        if getattr(self, 'nb_processus', None) and self.nb_processus > 1:
+            self.data_cible.extend(self._transforme_en_parallele())
+        else:
+            # Effectue les transformations ETL ligne à ligne, la méthode n'est résolue qu'une fois
+            procedure_ETL = getattr(self, self.procedure_ETL)
+            for ligne in self._source_procedure():
+                self.data_cible.append(procedure_ETL(ligne))
+
+        if getattr(self, 'procedure_ETL_post', None) != None:
+            procedure_ETL_post = getattr(self, self.procedure_ETL_post)
+            procedure_ETL_post()
         
-        :param ligne: Data line to be transformed.
-        """
-        # Placeholder for CSV transformation logic
-        if self.separateur == "TAB":
-            self.separateur = "\t"
-        return self.separateur.join([str(colonne) for colonne in ligne])
-    
-    def _transform_for_json(self, ligne):
+    def _source_procedure(self):
         """
-        Transform the data line for JSON format.
-        
-        :param ligne: Data line to be transformed.
-
+        Lignes de data_source telles que reçues par procedure_ETL : les lignes compactes (clsTable, clsLigne)
+        sont converties en dictionnaires, une procédure peut donc modifier la ligne reçue comme auparavant.
         """
-        return json.dumps(ligne, ensure_ascii=False)
+        if isinstance(self.data_source, clsTable):
+            return self.data_source.dicts()
+        return (ligne.en_dict() if isinstance(ligne, clsLigne) else ligne for ligne in self.data_source)
 
-    def _transform_for_xml(self, ligne, entete):
+    def _transforme_en_parallele(self):
         """
-        Transforme une ligne et son entête en chaîne XML.
+        Applique procedure_ETL dans un pool de nb_processus processus, par blocs de taille_bloc lignes.
+        Les résultats sont retournés dans l'ordre de data_source, au plus 2 blocs par processus sont en cours
+        afin de ne pas matérialiser toute la source.
         """
-        xml = ["  <row>"]
-        for k, v in zip(entete, ligne):
-            xml.append(f"    <{k}>{v}</{k}>")
-        xml.append("  </row>")
-        return "\n".join(xml)    
+        instance = copy.copy(self)
+        instance.data_source = None
+        instance.data_cible = None
+        with ProcessPoolExecutor(max_workers=self.nb_processus, initializer=_initialise_processus,
+                                 initargs=(instance,)) as pool:
+            en_cours = deque()
+            for bloc in Tools.par_lots(self._source_procedure(), self.taille_bloc):
+                en_cours.append(pool.submit(_transforme_bloc, bloc))
+                if len(en_cours) >= 2 * self.nb_processus:
+                    yield from en_cours.popleft().result()
+            while en_cours:
+                yield from en_cours.popleft().result()
 
     def _save_data(self):
-        # Placeholder for saving data to a destination
+        """
+        Sauvegarde des lignes produites par procedure_ETL, déjà au format cible désiré.
+        """
         if len(self.data_cible) != 0:
-            if self.procedure_ETL == None:
-                match self.type_etl.upper():
-                    case "JSON":
-                    # Convert the data_cible to JSON format
-                        self.data_cible = json.dumps(self.data_cible, ensure_ascii=False, indent=4)
-                    case "CSV":
-                        # Join the data_cible with newlines for CSV format
-                        self.data_cible = "\n".join(self.data_cible)
-                    case "XML":
-                    # Encapsule les lignes XML dans une balise racine
-                        self.data_cible = "<root>\n" + "\n".join(self.data_cible) + "\n</root>"            
-                    
-                    case '_':
-                        raise ValueError(f"Unsupported ETL type for saving: {self.type_etl}")
-            else:
-                    pass # data_cible est déjà au format cible désiré
             with open(file=self.file_name, mode="w", encoding="utf-8") as f:  # "a" pour ajouter à la fin, "w" pour écraser
-                f.write(self.data_cible)
+                if isinstance(self.data_cible, str):
+                    f.write(self.data_cible)
+                else:
+                    f.writelines(self.data_cible)
     
     def _GestionMethodeTransform(self, methode: str):
         """
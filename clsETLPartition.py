@@ -0,0 +1,308 @@
+import os
+import re
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tools import Tools
+from clsETLSortie import clsETLSortie
+from clsTable import clsTable
+
+
+class _Partition:
+    """
+    Fichiers successifs d'une partition : un seul lot est écrit à la fois (tache), le fichier courant est fermé
+    et le suivant ouvert dès que lignes_max ou octets_max est atteint.
+    lignes / volume cumulent ce qui a été écrit dans le fichier courant avant une fermeture pour éviction (reprise).
+    """
+    __slots__ = ("valeur", "nom", "numero", "sortie", "lot", "tache", "reprise", "lignes", "volume")
+
+    def __init__(self, valeur, nom: str):
+        self.valeur = valeur
+        self.nom = nom
+        self.numero = 0
+        self.sortie: clsETLSortie = None
+        self.lot: list = []
+        self.tache = None
+        self.reprise = False
+        self.lignes = 0
+        self.volume = 0
+
+    def attend(self):
+        if self.tache is not None:
+            tache, self.tache = self.tache, None
+            tache.result()
+
+
+class clsETLPartition:
+    """
+    Écriture partitionnée des fichiers cibles de l'ETL : les lignes sont réparties entre plusieurs fichiers
+    écrits en parallèle, chacun au travers d'un clsETLSortie (CSV / JSON / XML / NDJSON).
+
+      - cle_partition : colonne (ou fonction ligne -> valeur) dont la valeur oriente la ligne vers sa partition
+                        (date, site...). Sans clé toutes les lignes appartiennent à une partition unique.
+      - lignes_max    : nombre maximum de lignes par fichier, le fichier suivant de la partition est ouvert au delà.
+      - octets_max    : taille maximum d'un fichier (avant compression) : le fichier est fermé dès qu'elle est atteinte,
+                        il la dépasse donc au plus d'une ligne (et de la fermeture du document JSON / XML).
+      - max_ouverts   : nombre maximum de fichiers ouverts simultanément. Au delà le fichier de la partition la moins
+                        récemment alimentée est fermé. Les lignes suivantes de cette partition sont ajoutées à la fin
+                        du même fichier (CSV, NDJSON), ou écrites dans un nouveau fichier (JSON, XML).
+                        Des lignes triées sur la clé de partition évitent ces fermetures.
+      - nb_travailleurs : nombre de threads d'écriture. Les lignes sont confiées aux partitions par lots de taille_lot lignes,
+                        chaque partition écrit un lot à la fois, dans l'ordre d'arrivée des lignes.
+
+    Le nom des fichiers est construit à partir de file_name qui peut contenir les champs {partition} et {numero}
+    ("c:/out/ventes_{partition}_{numero:03d}.csv"). Sinon _{partition} (avec une clé) et _{numero:04d} sont insérés
+    avant l'extension. Les caractères de la valeur de partition interdits dans un nom de fichier sont remplacés par _.
+    Si deux valeurs donnent alors le même nom ("a/b" et "a b", ou "Paris" et "PARIS" sur un système de fichiers
+    insensible à la casse, la comparaison ignore donc la casse) le nom de la seconde est complété d'un suffixe
+    calculé sur la valeur (_ et 8 caractères hexadécimaux) : deux partitions n'écrivent jamais le même fichier.
+
+    Le manifeste (liste des fichiers produits : fichier, partition, lignes, octets) est disponible dans manifeste
+    et bilan, il est également enregistré au format JSON si fichier_manifeste est renseigné.
+    octets est la taille du fichier sur le disque (après compression le cas échéant).
+
+    Exemple d'utilisation :
+    with clsETLPartition("c:/out/ventes.csv", "CSV", cle_partition="site", lignes_max=1000000) as sortie:
+        sortie.ecrit_lignes(etl.etl_input_iter("c:/temp/ventes.csv", "CSV"))
+    print(sortie.manifeste)
+    """
+    # constants
+    kMAX_OUVERTS = 32
+    kNB_TRAVAILLEURS = 4
+    kTAILLE_LOT = 1000
+
+    _interdits = re.compile(r'[^\w.\-]')
+
+    def __init__(self, file_name: str, type_etl: str, separateur: str = ";", cle_partition=None, lignes_max: int = None,
+                 octets_max: int = None, max_ouverts: int = None, nb_travailleurs: int = None, taille_lot: int = None,
+                 taille_tampon: int = None, compact: bool = False, compression: str = "auto", niveau_compression: int = None,
+                 fichier_manifeste: str = None):
+        self.file_name = file_name
+        self.type_etl = type_etl
+        self.separateur = separateur
+        self.cle_partition = cle_partition
+        self.lignes_max = lignes_max
+        self.octets_max = octets_max
+        self.max_ouverts = max_ouverts or self.kMAX_OUVERTS
+        self.nb_travailleurs = nb_travailleurs or self.kNB_TRAVAILLEURS
+        self.taille_lot = taille_lot or self.kTAILLE_LOT
+        self.taille_tampon = taille_tampon
+        self.compact = compact
+        self.compression = compression
+        self.niveau_compression = niveau_compression
+        self.fichier_manifeste = fichier_manifeste
+        self.manifeste: list[dict] = []
+        self._manifeste: dict = {}          # fichier -> entrée du manifeste
+        self._reprise = self.type_etl.upper() in ("CSV", "NDJSON")
+        self.modele = self._modele(file_name)
+        self._partitions: dict = {}
+        self._noms: dict = {}               # nom de fichier de partition (minuscules) -> valeur
+        self._ouvertes = OrderedDict()      # partitions dont le fichier est ouvert, la plus récemment alimentée à droite
+        self._verrou = threading.Lock()
+        self._pool: ThreadPoolExecutor = None
+        self._entete: list = None
+        self._debut: float = None
+        self._fin: float = None
+
+        if self.max_ouverts < 1:
+            raise ValueError("max_ouverts doit être au moins égal à 1.")
+        # contrôle du type et des options dès la création, comme clsETLSortie
+        clsETLSortie(self.file_name, self.type_etl, self.separateur)
+
+    def __enter__(self):
+        self.ouvre()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.ferme()
+        else:
+            self.abandonne()
+
+    @property
+    def bilan(self) -> dict:
+        """
+        Bilan de l'écriture : modèle de nom, totaux, durée, débit et manifeste des fichiers produits.
+        """
+        fin = self._fin or Tools.get_current_time()
+        duree = fin - self._debut if self._debut is not None else 0.0
+        manifeste = self.manifeste or sorted(self._manifeste.values(), key=lambda fichier: fichier["fichier"])
+        lignes = sum(fichier["lignes"] for fichier in manifeste)
+        return {
+            "fichier": self.file_name,
+            "lignes": lignes,
+            "octets": sum(fichier["octets"] for fichier in manifeste),
+            "duree": round(duree, 3),
+            "lignes_par_seconde": round(lignes / duree) if duree > 0 else 0,
+            "fichiers": [dict(fichier) for fichier in manifeste],
+        }
+
+    def ouvre(self):
+        self._debut = Tools.get_current_time()
+        self._pool = ThreadPoolExecutor(max_workers=self.nb_travailleurs)
+
+    def ecrit_lignes(self, lignes):
+        """
+        Répartit toutes les lignes d'un itérable entre les partitions, l'itérable est consommé à la demande.
+        Les lignes sous forme de listes ont leur entête en première ligne (cas de clsSQL.execute_select).
+        """
+        if isinstance(lignes, clsTable):
+            lignes = iter(lignes)
+        for ligne in lignes:
+            self.ecrit_ligne(ligne)
+
+    def ecrit_ligne(self, ligne):
+        if isinstance(ligne, (list, tuple)):
+            if self._entete is None:
+                self._entete = list(ligne)
+                return
+            ligne = dict(zip(self._entete, ligne))
+        elif not hasattr(ligne, "keys") and self._entete is not None:
+            ligne = dict(zip(self._entete, ligne))      # pyodbc.Row
+
+        if self.cle_partition is None:
+            valeur = None
+        elif callable(self.cle_partition):
+            valeur = self.cle_partition(ligne)
+        else:
+            valeur = ligne[self.cle_partition]
+
+        partition = self._ouvertes.get(valeur)
+        if partition is None:
+            partition = self._active(valeur)
+        else:
+            self._ouvertes.move_to_end(valeur)
+        partition.lot.append(ligne)
+        if len(partition.lot) >= self.taille_lot:
+            self._soumet(partition)
+
+    def ferme(self):
+        """
+        Écrit les lots en attente, ferme tous les fichiers et enregistre le manifeste.
+        """
+        if self._pool is None:
+            return
+        try:
+            for partition in self._ouvertes.values():
+                if partition.lot:
+                    self._soumet(partition)
+            for partition in self._ouvertes.values():
+                partition.attend()
+        except BaseException:
+            self.abandonne()
+            raise
+        self._pool.shutdown()
+        self._pool = None
+        for partition in self._ouvertes.values():
+            self._ferme_fichier(partition)
+        self._ouvertes.clear()
+        self._termine()
+
+    def abandonne(self):
+        """
+        Cas d'une erreur : les lots en cours d'écriture sont attendus, les fichiers ouverts sont abandonnés sans être
+        terminés (voir clsETLSortie.abandonne). Le manifeste ne comprend que les fichiers fermés avant l'erreur.
+        """
+        if self._pool is None:
+            return
+        for partition in self._ouvertes.values():
+            try:
+                partition.attend()
+            except Exception:
+                pass    # l'erreur d'origine est celle qui est remontée
+        self._pool.shutdown()
+        self._pool = None
+        for partition in self._ouvertes.values():
+            if partition.sortie is not None:
+                partition.sortie.abandonne()
+                partition.sortie = None
+        self._ouvertes.clear()
+        self._termine()
+
+    def _termine(self):
+        self._fin = Tools.get_current_time()
+        self.manifeste = sorted(self._manifeste.values(), key=lambda fichier: fichier["fichier"])
+        if self.fichier_manifeste is not None:
+            with open(self.fichier_manifeste, "w", encoding="utf-8") as f:
+                json.dump(self.bilan, f, ensure_ascii=False, indent=2, default=str)
+
+    def _active(self, valeur) -> _Partition:
+        # le nombre de fichiers ouverts est borné : la partition la moins récemment alimentée est fermée
+        if len(self._ouvertes) >= self.max_ouverts:
+            _, evincee = self._ouvertes.popitem(last=False)
+            if evincee.lot:
+                self._soumet(evincee)
+            evincee.attend()
+            self._ferme_fichier(evincee, eviction=True)
+        partition = self._partitions.get(valeur)
+        if partition is None:
+            partition = _Partition(valeur, self._nom_partition(valeur))
+            self._partitions[valeur] = partition
+        self._ouvertes[valeur] = partition
+        return partition
+
+    def _nom_partition(self, valeur) -> str:
+        nom = "" if valeur is None else self._interdits.sub("_", str(valeur))
+        if nom.lower() in self._noms:
+            # collision après remplacement des caractères interdits ou à la casse près
+            nom = f"{nom}_{hashlib.sha1(repr(valeur).encode('utf-8')).hexdigest()[:8]}"
+            if nom.lower() in self._noms:
+                raise ValueError(f"Les valeurs de partition {self._noms[nom.lower()]!r} et {valeur!r} ont le même nom de fichier.")
+        self._noms[nom.lower()] = valeur
+        return nom
+
+    def _soumet(self, partition: _Partition):
+        # une partition n'écrit qu'un lot à la fois : l'ordre des lignes est conservé
+        partition.attend()
+        lot, partition.lot = partition.lot, []
+        partition.tache = self._pool.submit(self._ecrit_lot, partition, lot)
+
+    def _ecrit_lot(self, partition: _Partition, lot: list):
+        for ligne in lot:
+            if partition.sortie is None:
+                if not partition.reprise:
+                    partition.numero += 1
+                partition.sortie = clsETLSortie(self.modele.format(partition=partition.nom, numero=partition.numero),
+                                                self.type_etl, self.separateur, self.taille_tampon, ajout=partition.reprise,
+                                                compact=self.compact, compression=self.compression,
+                                                niveau_compression=self.niveau_compression)
+                partition.sortie.ouvre()
+            sortie = partition.sortie
+            sortie.ecrit_ligne(ligne)
+            if (self.lignes_max is not None and partition.lignes + sortie.lignes_ecrites >= self.lignes_max) or \
+               (self.octets_max is not None and partition.volume + sortie.volume >= self.octets_max):
+                self._ferme_fichier(partition)
+
+    def _ferme_fichier(self, partition: _Partition, eviction: bool = False):
+        if partition.sortie is None:
+            return
+        sortie, partition.sortie = partition.sortie, None
+        sortie.ferme()
+        with self._verrou:
+            entree = self._manifeste.get(sortie.file_name)
+            if entree is None:
+                entree = {"fichier": sortie.file_name, "partition": partition.valeur, "lignes": 0, "octets": 0}
+                self._manifeste[sortie.file_name] = entree
+            entree["lignes"] += sortie.lignes_ecrites
+            entree["octets"] = os.path.getsize(sortie.file_name)
+        # fermeture pour éviction : le fichier sera repris en ajout (CSV, NDJSON) à la prochaine ligne de la partition
+        partition.reprise = eviction and self._reprise
+        if partition.reprise:
+            partition.lignes += sortie.lignes_ecrites
+            partition.volume += sortie.volume
+        else:
+            partition.lignes = 0
+            partition.volume = 0
+
+    def _modele(self, file_name: str) -> str:
+        if "{" in file_name:
+            return file_name
+        base, extension = os.path.splitext(file_name)
+        if Tools.detecte_compression(file_name, lecture=False) is not None:
+            # ventes.csv.gz : le numéro est inséré avant .csv
+            base, extension_format = os.path.splitext(base)
+            extension = extension_format + extension
+        suffixe = "_{partition}_{numero:04d}" if self.cle_partition is not None else "_{numero:04d}"
+        return base + suffixe + extension
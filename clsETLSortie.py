@@ -0,0 +1,296 @@
+import os
+import re
+import csv
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+from tools import Tools
+from clsTable import clsTable, clsLigne
+from clsJSON import clsJSON
+
+
+class clsETLSortie:
+    """
+    Moteur d'écriture en flux des fichiers cibles de l'ETL (CSV / JSON / XML / NDJSON).
+
+    Les lignes sont mises en forme et écrites au fil de l'eau : seul un tampon de taille_tampon caractères
+    est conservé en mémoire, il est vidé dans le fichier dès qu'il est plein et à la fermeture.
+    Le nombre de lignes et d'octets écrits, la durée et le débit sont disponibles dans bilan.
+
+    Les lignes acceptées sont :
+      - des dictionnaires : les clés de la première ligne constituent l'entête. En CSV et XML une clé absente
+        de l'entête lève ValueError, une colonne absente d'une ligne est écrite vide.
+      - des listes / tuples : la première ligne est alors IMPERATIVEMENT l'entête (cas du résultat de clsSQL.execute_select).
+      - une clsTable (ou des clsLigne) : l'entête de la table est utilisé, les tuples sont écrits directement.
+
+    Les valeurs JSON sont sérialisées par clsJSON (dates, Decimal, ... issus de pyodbc), en mode compact (compact=True)
+    le JSON est produit sans espace ni retour à la ligne entre les lignes.
+
+    En mode ajout (ajout=True, CSV et NDJSON uniquement) les lignes sont ajoutées à la fin du fichier existant,
+    l'entête CSV n'est écrit que si le fichier est vide.
+
+    Le fichier est écrit sous un nom temporaire (file_name.pid.tmp) puis renommé (os.replace) à la fermeture :
+    un fichier cible incomplet n'est jamais visible. Si une exception interrompt l'écriture (bloc with), le document
+    n'est pas terminé et le fichier temporaire est supprimé (voir abandonne), le fichier cible existant est inchangé.
+    En mode ajout les lignes sont écrites directement dans le fichier, il est ramené à sa taille initiale en cas d'erreur.
+
+    Le fichier cible peut être compressé en flux (gzip, bz2, xz, voir Tools.ouvre_flux) : avec compression="auto"
+    la compression est déduite de l'extension du nom (.gz, .bz2, .xz), niveau_compression règle le compromis taille / temps.
+    Le nombre d'octets du bilan est alors celui des données avant compression.
+
+    Exemple d'utilisation :
+    with clsETLSortie("c:/temp/export.csv", "CSV", separateur="TAB") as sortie:
+        sortie.ecrit_lignes(donnees)
+    print(sortie.bilan)
+    """
+    kTAILLE_TAMPON = 1024 * 1024  # 1 M caractères par défaut
+
+    _nom_xml = re.compile(r"[^\W\d][\w.\-]*\Z")     # nom XML sans espace de noms : lettre ou _, puis lettres, chiffres, . - _
+
+    def __init__(self, file_name: str, type_etl: str, separateur: str = ";", taille_tampon: int = None,
+                 balise_racine: str = "root", balise_ligne: str = "row", ajout: bool = False, compact: bool = False,
+                 compression: str = "auto", niveau_compression: int = None):
+        self.file_name = file_name
+        self.type_etl = type_etl.upper()
+        self.separateur = "\t" if separateur == "TAB" else separateur
+        self.taille_tampon = taille_tampon or self.kTAILLE_TAMPON
+        self.balise_racine = balise_racine
+        self.balise_ligne = balise_ligne
+        self.ajout = ajout
+        self.compact = compact
+        self.compression = compression
+        self.niveau_compression = niveau_compression
+        self._json = clsJSON.encodeur(compact).encode
+        self._separateur_json = "," if compact else ",\n"
+        self.entete: list = None
+        self.lignes_ecrites: int = 0
+        self.octets_ecrits: int = 0
+        self._fichier = None
+        self._tampon: list[str] = []
+        self._taille: int = 0
+        self._csv = None
+        self._balises: list[tuple] = None     # XML : (ouvrante, fermante) précalculées par colonne
+        self._colonnes: set = None            # colonnes de l'entête, pour contrôler les clés des dictionnaires
+        self._entete_existante: bool = False
+        self._temporaire: str = None
+        self._taille_initiale: int = None
+        self._debut: float = None
+        self._fin: float = None
+
+        if self.type_etl not in ("CSV", "JSON", "XML", "NDJSON"):
+            raise ValueError(f"Unsupported ETL type: {type_etl}")
+        if self.ajout and self.type_etl not in ("CSV", "NDJSON"):
+            raise ValueError(f"Le mode ajout n'est pas possible pour le type {type_etl}.")
+        if self.type_etl == "XML":
+            self._verifie_noms_xml([self.balise_racine, self.balise_ligne])
+
+    def __enter__(self):
+        self.ouvre()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.ferme()
+        else:
+            self.abandonne()
+
+    @property
+    def bilan(self) -> dict:
+        """
+        Retourne le bilan de l'écriture : nom du fichier, nombre de lignes de données, nombre d'octets écrits,
+        durée (en secondes, depuis l'ouverture) et débit en lignes par seconde.
+        """
+        fin = self._fin or Tools.get_current_time()
+        duree = fin - self._debut if self._debut is not None else 0.0
+        return {
+            "fichier": self.file_name,
+            "lignes": self.lignes_ecrites,
+            "octets": self.octets_ecrits,
+            "duree": round(duree, 3),
+            "lignes_par_seconde": round(self.lignes_ecrites / duree) if duree > 0 else 0,
+        }
+
+    @property
+    def volume(self) -> int:
+        """
+        Volume écrit jusqu'ici : octets déjà écrits et caractères en attente dans le tampon (estimation, avant compression).
+        """
+        return self.octets_ecrits + self._taille
+
+    def ouvre(self):
+        """
+        Ouvre le fichier cible (écrasé à la fermeture s'il existe, sauf en mode ajout) et écrit l'ouverture du document.
+        """
+        self._debut = Tools.get_current_time()
+        if self.ajout:
+            # en ajout sur un fichier non vide l'entête CSV existe déjà (tell ne le dit pas pour un fichier compressé)
+            self._taille_initiale = os.path.getsize(self.file_name) if os.path.isfile(self.file_name) else None
+            self._entete_existante = bool(self._taille_initiale)
+            self._fichier = Tools.ouvre_flux(self.file_name, "ab", self.compression, self.niveau_compression)
+        else:
+            # la compression est déduite du nom définitif, pas de celui du fichier temporaire
+            compression = Tools.detecte_compression(self.file_name, lecture=False) if self.compression == "auto" \
+                else self.compression
+            self._temporaire = f"{self.file_name}.{os.getpid()}.tmp"
+            self._fichier = Tools.ouvre_flux(self._temporaire, "wb", compression, self.niveau_compression)
+        match self.type_etl:
+            case "CSV":
+                self._csv = csv.writer(SimpleNamespace(write=self._ajoute), delimiter=self.separateur, lineterminator="\n")
+            case "JSON":
+                self._ajoute("[")
+            case "XML":
+                self._ajoute(f'<?xml version="1.0" encoding="utf-8"?>\n<{self.balise_racine}>\n')
+
+    def ecrit_lignes(self, lignes):
+        """
+        Écrit toutes les lignes d'un itérable, l'itérable est consommé à la demande.
+        """
+        if isinstance(lignes, clsTable):
+            # entête puis tuples : aucune vue clsLigne n'est créée
+            if self.entete is None:
+                self.ecrit_ligne(lignes.colonnes)
+            lignes = lignes.lignes
+        for ligne in lignes:
+            self.ecrit_ligne(ligne)
+
+    def ecrit_ligne(self, ligne):
+        """
+        Met en forme une ligne et l'ajoute au tampon d'écriture.
+        """
+        if isinstance(ligne, clsLigne):
+            if self.entete is None:
+                self.entete = list(ligne.colonnes)
+                self._ecrit_entete()
+            ligne = ligne.valeurs
+        elif self.entete is None:
+            if isinstance(ligne, dict):
+                self.entete = list(ligne.keys())
+                self._ecrit_entete()
+            else:
+                self.entete = list(ligne)
+                self._ecrit_entete()
+                return
+
+        match self.type_etl:
+            case "CSV":
+                if isinstance(ligne, dict):
+                    if ligne.keys() != self._colonnes:
+                        self._verifie_cles(ligne)
+                    ligne = [ligne.get(colonne) for colonne in self.entete]
+                self._csv.writerow(ligne)
+            case "JSON":
+                if not isinstance(ligne, dict):
+                    ligne = dict(zip(self.entete, ligne))
+                if self.lignes_ecrites == 0:
+                    self._ajoute(("" if self.compact else "\n") + self._json(ligne))
+                else:
+                    self._ajoute(self._separateur_json + self._json(ligne))
+            case "NDJSON":
+                if not isinstance(ligne, dict):
+                    ligne = dict(zip(self.entete, ligne))
+                self._ajoute(self._json(ligne) + "\n")
+            case "XML":
+                if isinstance(ligne, dict):
+                    if ligne.keys() != self._colonnes:
+                        self._verifie_cles(ligne)
+                    ligne = [ligne.get(colonne) for colonne in self.entete]
+                xml = [self._ouvre_ligne]
+                for (ouvrante, fermante), v in zip(self._balises, ligne):
+                    xml.append(ouvrante)
+                    if v is not None:
+                        xml.append(escape(v if isinstance(v, str) else str(v)))
+                    xml.append(fermante)
+                xml.append(self._ferme_ligne)
+                self._ajoute("".join(xml))
+        self.lignes_ecrites += 1
+
+    def ferme(self):
+        """
+        Termine le document, vide le tampon, ferme le fichier et le renomme sous son nom définitif.
+        """
+        if self._fichier is None:
+            return
+        try:
+            match self.type_etl:
+                case "JSON":
+                    self._ajoute("]" if self.compact else "\n]")
+                case "XML":
+                    self._ajoute(f"</{self.balise_racine}>\n")
+            self._vide_tampon()
+            self._fichier.close()
+        except BaseException:
+            self.abandonne()
+            raise
+        self._fichier = None
+        self._fin = Tools.get_current_time()
+        if self._temporaire is not None:
+            temporaire, self._temporaire = self._temporaire, None
+            os.replace(temporaire, self.file_name)
+
+    def abandonne(self):
+        """
+        Ferme le fichier sans terminer le document (cas d'une erreur pendant l'écriture) : le fichier temporaire est
+        supprimé et le fichier cible n'est pas modifié. En mode ajout le fichier est ramené à sa taille initiale
+        (supprimé s'il n'existait pas).
+        """
+        if self._fichier is None:
+            return
+        fichier, self._fichier = self._fichier, None
+        self._tampon = []
+        self._taille = 0
+        self._fin = Tools.get_current_time()
+        try:
+            fichier.close()
+        except Exception:
+            pass    # l'erreur d'origine est celle qui est remontée
+        if self._temporaire is not None:
+            temporaire, self._temporaire = self._temporaire, None
+            if os.path.isfile(temporaire):
+                os.remove(temporaire)
+        elif self._taille_initiale is None:
+            if os.path.isfile(self.file_name):
+                os.remove(self.file_name)
+        else:
+            os.truncate(self.file_name, self._taille_initiale)
+
+    def _ecrit_entete(self):
+        """
+        Seul le CSV matérialise l'entête dans le fichier, JSON et XML l'utilisent comme nom des balises.
+        Pour le XML les balises de chaque colonne sont calculées une fois pour toutes, les noms de colonnes
+        qui ne sont pas des noms XML valides ("Total HT", "a&b", "1er"...) lèvent ValueError.
+        """
+        self._colonnes = set(self.entete)
+        match self.type_etl:
+            case "CSV":
+                if not self._entete_existante:
+                    self._csv.writerow(self.entete)
+            case "XML":
+                self._verifie_noms_xml(self.entete)
+                self._ouvre_ligne = f"  <{self.balise_ligne}>\n"
+                self._ferme_ligne = f"  </{self.balise_ligne}>\n"
+                self._balises = [(f"    <{colonne}>", f"</{colonne}>\n") for colonne in self.entete]
+
+    def _verifie_cles(self, ligne: dict):
+        # comme csv.DictWriter (extrasaction="raise") : une clé absente de l'entête n'est pas ignorée en silence,
+        # une colonne absente de la ligne est écrite vide
+        inconnues = [cle for cle in ligne if cle not in self._colonnes]
+        if inconnues:
+            raise ValueError(f"Colonnes absentes de l'entête (clés de la première ligne) : {inconnues}")
+
+    def _verifie_noms_xml(self, noms):
+        invalides = [nom for nom in noms if not (isinstance(nom, str) and self._nom_xml.match(nom))]
+        if invalides:
+            raise ValueError(f"Noms invalides pour des balises XML : {invalides}")
+
+    def _ajoute(self, texte: str):
+        self._tampon.append(texte)
+        self._taille += len(texte)
+        if self._taille >= self.taille_tampon:
+            self._vide_tampon()
+
+    def _vide_tampon(self):
+        if self._tampon:
+            donnees = "".join(self._tampon).encode("utf-8")
+            self._fichier.write(donnees)
+            self.octets_ecrits += len(donnees)
+            self._tampon = []
+            self._taille = 0
@@ -1,4 +1,7 @@
 import configparser
+import os
+import time
+from dataclasses import dataclass, field
 from tools import Tools
 
 # entrées du fichier INI
@@ -22,15 +25,102 @@ KLOGUSER		= "USERID"			# UserID de connexion
 KLOGPW			= "PW"				# PW
 KLOGSERVERTYPE	= "SERVEURTYPE"		# Type de serveur (HFSQL...)
 KLOGINTABLE		= "LOGINTABLE"		# Sauve le log dans la base de donnée et pas dans le fichier Log... 
+KLOGASYNC		= "ASYNCHRONE"		# Ecriture du log par un thread dédié (False par défaut)
+
+
+@dataclass(frozen=True, slots=True)
+class clsINITSnapshot:
+    """
+    Photographie typée et immuable de la configuration : les valeurs sont lues et converties une seule fois.
+    """
+    version: str
+    debug: bool
+    executable: str
+    ini: str
+    log_level: int
+    log_level_mail: int
+    log_dir: str
+    log_size: int
+    log_retention: int
+    log_destinataire: str
+    log_serveur: str
+    log_user: str
+    log_pw: str = field(repr=False)     # mot de passe : absent de repr (traces, log)
+    log_server_type: str
+    log_in_table: bool
+    log_asynchrone: bool
 
 
 class clsINIT:
+    # constants
+    kDELAI_CONTROLE = 1.0   # secondes entre deux contrôles de la date de modification du fichier INI
+
     def __init__(self, config_file):
        
         self.config_file = config_file
+        self._snapshot: clsINITSnapshot = None
+        self._mtime: int = None
+        self._prochain_controle: float = 0.0
         self.config = configparser.ConfigParser()
         self.config.read(self.config_file)
         self.init_config()  # Initialisation de la configuration
+
+    @property
+    def snapshot(self) -> clsINITSnapshot:
+        """
+        Retourne la photographie typée de la configuration.
+        Elle est reconstruite uniquement si la date de modification du fichier INI a changé (contrôle au plus
+        toutes les kDELAI_CONTROLE secondes) : une modification du fichier est prise en compte sans redémarrage.
+        """
+        maintenant = time.monotonic()
+        if self._snapshot is None or maintenant >= self._prochain_controle:
+            self._prochain_controle = maintenant + self.kDELAI_CONTROLE
+            mtime = self._get_mtime()
+            if self._snapshot is None or mtime != self._mtime:
+                if self._snapshot is not None:
+                    self.config = configparser.ConfigParser()
+                    self.config.read(self.config_file)
+                    self.init_config()
+                    mtime = self._get_mtime()
+                self._mtime = mtime
+                self._snapshot = self._construit_snapshot()
+        return self._snapshot
+
+    def _get_mtime(self) -> int:
+        try:
+            return os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def _construit_snapshot(self) -> clsINITSnapshot:
+        return clsINITSnapshot(
+            version=self.get_ini_value(kSETTINGS, kVERSION),
+            debug=self.get_ini_value(kSETTINGS, kDEBUG).lower() == 'true',
+            executable=self.get_ini_value(kSETTINGS, kEXECUTABLE),
+            ini=self.get_ini_value(kINI, kINI),
+            log_level=int(self.get_ini_value(kLOG, KLOGLEVEL)),
+            log_level_mail=int(self.get_ini_value(kLOG, KLOGLEVELMAIL)),
+            log_dir=self._calcule_log_dir(),
+            log_size=int(self.get_ini_value(kLOG, KLOGSIZE)),
+            log_retention=int(self.get_ini_value(kLOG, kLOGRETENTION)),
+            log_destinataire=self.get_ini_value(kLOG, KDESTINATAIRE),
+            log_serveur=self.get_ini_value(kLOG, KLOGSERVEUR),
+            log_user=self.get_ini_value(kLOG, KLOGUSER),
+            log_pw=self.get_ini_value(kLOG, KLOGPW),
+            log_server_type=self.get_ini_value(kLOG, KLOGSERVERTYPE),
+            log_in_table=self.get_ini_value(kLOG, KLOGINTABLE).lower() == 'true',
+            log_asynchrone=self.get_ini_value(kLOG, KLOGASYNC).lower() == 'true',
+        )
+
+    def _calcule_log_dir(self) -> str:
+        repertoire_log = self.get_ini_value(kLOG, KLOGDIR)
+        if repertoire_log is None or repertoire_log == '' or repertoire_log == '-1' or repertoire_log.upper() == 'REPEXE':
+            repertoire_log = Tools.get_current_directory()
+        elif repertoire_log.upper() == Tools.kREPDONNEES:
+            repertoire_log = Tools.get_common_data_dir(self.get_ini_value(kSETTINGS, kEXECUTABLE))
+        if repertoire_log[-1] != Tools.get_separator():
+            repertoire_log += Tools.get_separator()
+        return repertoire_log
     
     def init_config(self):
         """
@@ -102,6 +192,9 @@ class clsINIT:
         if not self.config.has_option(kLOG, KLOGINTABLE):
             self.config.set(kLOG, KLOGINTABLE, 'False')
             changed = True
+        if not self.config.has_option(kLOG, KLOGASYNC):
+            self.config.set(kLOG, KLOGASYNC, 'False')
+            changed = True
         # Enregistrer les modifications si nécessaire
         if changed:
             self.save_config()
@@ -112,6 +205,7 @@ class clsINIT:
         """
         with open(self.config_file, 'w') as f:
             self.config.write(f)
+        self._snapshot = None   # la photographie sera reconstruite à la prochaine lecture
 
     def get_ini_value(self, section, option):
         """
@@ -124,71 +218,66 @@ class clsINIT:
 # section Settings
     @property
     def version(self) -> str:
-        return self.get_ini_value(kSETTINGS, kVERSION)
-
+        return self.snapshot.version
 
     @property
     def debug(self) -> bool:
-        return self.get_ini_value(kSETTINGS, kDEBUG).lower() == 'true'
-    
-    
+        return self.snapshot.debug
+
     @property
     def executable(self) -> str:
-        return self.get_ini_value(kSETTINGS, kEXECUTABLE)
-    
+        return self.snapshot.executable
+
 # section INI
     @property
     def ini(self) -> str:
-        return self.get_ini_value(kINI, kINI)
-    
+        return self.snapshot.ini
+
 # section LOG
     @property
     def log_level(self) -> int:
-        return int(self.get_ini_value(kLOG, KLOGLEVEL))
+        return self.snapshot.log_level
 
     @property
     def log_level_mail(self) -> int:
-        return int(self.get_ini_value(kLOG, KLOGLEVELMAIL))
+        return self.snapshot.log_level_mail
 
     @property
     def log_dir(self) -> str:
-        repertoire_log = self.get_ini_value(kLOG, KLOGDIR).upper()
-        if repertoire_log is None or repertoire_log == '' or repertoire_log == '-1' or repertoire_log == 'RepExe':
-            repertoire_log = Tools.get_current_directory()
-        elif repertoire_log == Tools.kREPDONNEES:
-            repertoire_log = Tools.get_common_data_dir(self.executable)
-        if repertoire_log[-1] != Tools.get_separator():
-            repertoire_log += Tools.get_separator()
-        return repertoire_log
+        return self.snapshot.log_dir
 
     @property
     def log_size(self) -> int:
-        return int(self.get_ini_value(kLOG, KLOGSIZE))
+        return self.snapshot.log_size
 
     @property
     def log_retention(self) -> int:
-        return int(self.get_ini_value(kLOG, kLOGRETENTION))
+        return self.snapshot.log_retention
 
     @property
     def log_destinataire(self) -> str:
-        return self.get_ini_value(kLOG, KDESTINATAIRE)
+        return self.snapshot.log_destinataire
 
     @property
     def log_serveur(self) -> str:
-        return self.get_ini_value(kLOG, KLOGSERVEUR)
+        return self.snapshot.log_serveur
 
     @property
     def log_user(self) -> str:
-        return self.get_ini_value(kLOG, KLOGUSER)
+        return self.snapshot.log_user
 
     @property
     def log_pw(self) -> str:
-        return self.get_ini_value(kLOG, KLOGPW)
+        return self.snapshot.log_pw
 
     @property
     def log_server_type(self) -> str:
-        return self.get_ini_value(kLOG, KLOGSERVERTYPE)
+        return self.snapshot.log_server_type
 
     @property
     def log_in_table(self) -> bool:
-        return self.get_ini_value(kLOG, KLOGINTABLE).lower() == 'true'
+        return self.snapshot.log_in_table
+
+    @property
+    def log_asynchrone(self) -> bool:
+        return self.snapshot.log_asynchrone
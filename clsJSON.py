@@ -0,0 +1,59 @@
+import json
+import base64
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from collections.abc import Mapping
+
+
+class clsJSON:
+    """
+    Sérialiseur JSON typé de l'ETL : les types retournés par pyodbc que le module json ne connaît pas
+    sont convertis en une seule passe par l'encodeur C du module json.
+      - datetime / date / time : texte ISO 8601 ("2025-07-20T10:30:00", "2025-07-20", "10:30:00"),
+        il n'est donc plus nécessaire de convertir les dates dans la requête (CONVERT(varchar(10), Date, 23)).
+      - Decimal : texte de la valeur exacte ("1234.50") : un float arrondirait les montants au delà de 15 à 17 chiffres
+        significatifs, et le module json ne sait pas écrire un nombre décimal tel quel.
+      - UUID : texte.
+      - bytes / bytearray : texte base64.
+      - clsLigne et autres Mapping : objet.
+      - pyodbc.Row et autres itérables : liste.
+    Les encodeurs sont créés une fois et réutilisés (json.dumps avec options en recrée un à chaque appel).
+    Le mode compact supprime les espaces après les séparateurs.
+    """
+    _encodeurs: dict = {}
+
+    @staticmethod
+    def valeur(valeur):
+        """
+        Conversion des valeurs non sérialisables nativement, appelée par l'encodeur (paramètre default).
+        """
+        if isinstance(valeur, (datetime, date, time)):
+            return valeur.isoformat()
+        if isinstance(valeur, Decimal):
+            return str(valeur)
+        if isinstance(valeur, UUID):
+            return str(valeur)
+        if isinstance(valeur, (bytes, bytearray, memoryview)):
+            return base64.b64encode(valeur).decode("ascii")
+        if isinstance(valeur, Mapping):
+            return dict(valeur)
+        if hasattr(valeur, "__iter__"):
+            return list(valeur)
+        raise TypeError(f"Object of type {type(valeur).__name__} is not JSON serializable")
+
+    @classmethod
+    def encodeur(cls, compact: bool = False) -> json.JSONEncoder:
+        """
+        Retourne l'encodeur partagé (ensure_ascii=False) du mode demandé.
+        """
+        encodeur = cls._encodeurs.get(compact)
+        if encodeur is None:
+            encodeur = json.JSONEncoder(ensure_ascii=False, default=cls.valeur,
+                                        separators=(",", ":") if compact else (", ", ": "))
+            cls._encodeurs[compact] = encodeur
+        return encodeur
+
+    @classmethod
+    def dumps(cls, objet, compact: bool = False) -> str:
+        return cls.encodeur(compact).encode(objet)
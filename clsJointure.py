@@ -0,0 +1,195 @@
+from operator import itemgetter
+
+
+class clsJointure:
+    """
+    Enrichissement des lignes de l'ETL par une table de référence (jointure par hachage), sans requête par ligne.
+
+    La table de référence est lue une seule fois, par lots (clsSQL.fetch_batches) ou depuis un itérable de dictionnaires
+    (liste, clsTable, etl_input_iter...), et indexée en mémoire sur les colonnes clés. Les lignes source sont ensuite
+    enrichies en une seule passe : chaque ligne cherche sa clé dans l'index (coût constant).
+
+      - cles : colonnes clés de la ligne source, cles_reference celles de la référence (les mêmes par défaut).
+      - colonnes : colonnes de la référence ajoutées aux lignes (toutes sauf les clés par défaut), prefixe est ajouté à leur nom.
+      - mode : "left" (une ligne sans correspondance est conservée, les colonnes ajoutées valent defauts ou None)
+               ou "inner" (une ligne sans correspondance est écartée).
+      - absente : traitement d'une clé sans correspondance, prioritaire sur mode s'il est renseigné :
+               "erreur" (KeyError) ou "rejet" (la ligne est écartée et comptée dans nb_rejets).
+      - traite_rejet : fonction appelée avec chaque ligne rejetée (écriture dans un fichier de rejets par exemple).
+               Seules les echantillon_rejets premières lignes rejetées sont conservées dans rejets (kECHANTILLON_REJETS
+               par défaut) : la mémoire reste bornée quel que soit le nombre de rejets.
+      - cle_en_texte : les clés sont comparées sous forme de texte sans espaces de début et de fin (cas d'un CSV,
+               dont toutes les valeurs sont du texte, joint à une table SQL dont la clé est numérique).
+    Une clé source contenant None n'a jamais de correspondance (comme NULL en SQL), les lignes de référence de clé None sont ignorées.
+    Une clé présente plusieurs fois dans la référence produit une ligne par correspondance.
+
+    Exemple d'utilisation :
+    devises = clsJointure(cles="devise", sql=sql, query="SELECT code, taux FROM Devises", cles_reference="code")
+    for ligne in devises.applique(etl.etl_input_iter("c:/temp/ventes.csv", "CSV")):
+        ...
+    """
+    # constants
+    kMODES = ("left", "inner")
+    kABSENTES = (None, "erreur", "rejet")
+    kECHANTILLON_REJETS = 100
+
+    def __init__(self, cles, sql=None, query: str = None, reference=None, cles_reference=None, colonnes: list = None,
+                 mode: str = "left", absente: str = None, defauts: dict = None, prefixe: str = "",
+                 cle_en_texte: bool = False, taille_lot: int = None, traite_rejet=None, echantillon_rejets: int = None):
+        if mode not in self.kMODES:
+            raise ValueError(f"Mode de jointure inconnu : {mode}")
+        if absente not in self.kABSENTES:
+            raise ValueError(f"Traitement des clés absentes inconnu : {absente}")
+        if (sql is None) == (reference is None):
+            raise ValueError("La référence doit être fournie par sql et query, ou par reference.")
+        self.cles = [cles] if isinstance(cles, str) else list(cles)
+        self.cles_reference = self.cles if cles_reference is None else \
+            ([cles_reference] if isinstance(cles_reference, str) else list(cles_reference))
+        if len(self.cles) != len(self.cles_reference):
+            raise ValueError("cles et cles_reference doivent comporter le même nombre de colonnes.")
+        self.sql = sql
+        self.query = query
+        self.reference = reference
+        self.colonnes = colonnes
+        self.mode = mode
+        self.absente = absente
+        self.defauts = defauts or {}
+        self.prefixe = prefixe
+        self.cle_en_texte = cle_en_texte
+        self.taille_lot = taille_lot
+        self.index: dict = None
+        self.noms: tuple = None             # noms des colonnes ajoutées (avec prefixe)
+        self.traite_rejet = traite_rejet
+        self.echantillon_rejets = self.kECHANTILLON_REJETS if echantillon_rejets is None else echantillon_rejets
+        self.rejets: list = []              # échantillon : premières lignes rejetées
+        self.nb_rejets = 0
+        self.nb_trouvees = 0
+        self.nb_absentes = 0
+
+    @property
+    def bilan(self) -> dict:
+        return {
+            "references": 0 if self.index is None else len(self.index),
+            "trouvees": self.nb_trouvees,
+            "absentes": self.nb_absentes,
+            "rejets": self.nb_rejets,
+        }
+
+    def charge(self):
+        """
+        Lit la table de référence et construit l'index {clé: [valeurs ajoutées, ...]}.
+        Appelée automatiquement à la première ligne, elle peut l'être explicitement pour recharger la référence.
+        """
+        index = {}
+        if self.sql is not None:
+            lots = self.sql.fetch_batches(self.query, self.taille_lot, header=True)
+            entete = next(lots, None)
+            if entete is None:
+                raise ValueError(f"La table de référence n'a pas pu être lue : {self.query}")
+            colonnes = list(entete[0])
+            self._prepare(colonnes)
+            positions = {colonne: position for position, colonne in enumerate(colonnes)}
+            cle = self._extracteur([positions[colonne] for colonne in self.cles_reference])
+            valeurs = self._extracteur([positions[colonne] for colonne in self._ajoutees], multiple=True)
+            for lot in lots:
+                self._indexe(index, lot, cle, valeurs)
+        else:
+            cle = valeurs = None
+            for ligne in self.reference:
+                if cle is None:
+                    self._prepare(list(ligne.keys()))
+                    cle = self._extracteur(self.cles_reference)
+                    valeurs = self._extracteur(self._ajoutees, multiple=True)
+                self._indexe(index, (ligne,), cle, valeurs)
+            if cle is None:
+                self._prepare(list(self.colonnes or []) + self.cles_reference)
+        self.index = index
+
+    def joint(self, ligne):
+        """
+        Retourne la liste des lignes enrichies produites par une ligne source (vide si elle est écartée).
+        """
+        if self.index is None:
+            self.charge()
+        cle = self._cle_source(ligne)
+        if self.cle_en_texte:
+            cle = self._en_texte(cle)
+        correspondances = None if self._contient_none(cle) else self.index.get(cle)
+        if correspondances is None:
+            self.nb_absentes += 1
+            if self.absente == "erreur":
+                raise KeyError(f"Clé absente de la référence : {cle!r}")
+            if self.absente == "rejet":
+                self.nb_rejets += 1
+                if len(self.rejets) < self.echantillon_rejets:
+                    self.rejets.append(ligne)
+                if self.traite_rejet is not None:
+                    self.traite_rejet(ligne)
+                return []
+            if self.mode == "inner":
+                return []
+            correspondances = (self._valeurs_defaut,)
+        else:
+            self.nb_trouvees += 1
+        noms = self.noms
+        resultat = []
+        for valeurs in correspondances:
+            enrichie = dict(ligne)
+            enrichie.update(zip(noms, valeurs))
+            resultat.append(enrichie)
+        return resultat
+
+    def applique(self, lignes):
+        """
+        Générateur des lignes enrichies d'un itérable, consommé à la demande.
+        """
+        if self.index is None:
+            self.charge()
+        joint = self.joint
+        for ligne in lignes:
+            yield from joint(ligne)
+
+    def _prepare(self, colonnes_reference: list):
+        manquantes = [colonne for colonne in self.cles_reference if colonne not in colonnes_reference]
+        if manquantes:
+            raise KeyError(f"Colonnes clés absentes de la référence : {', '.join(manquantes)}")
+        if self.colonnes is None:
+            self._ajoutees = [colonne for colonne in colonnes_reference if colonne not in self.cles_reference]
+        else:
+            self._ajoutees = list(self.colonnes)
+        self.noms = tuple(self.prefixe + colonne for colonne in self._ajoutees)
+        self._valeurs_defaut = tuple(self.defauts.get(nom, self.defauts.get(colonne))
+                                     for nom, colonne in zip(self.noms, self._ajoutees))
+        self._cle_source = self._extracteur(self.cles)
+
+    def _indexe(self, index: dict, lignes, cle, valeurs):
+        en_texte = self.cle_en_texte
+        for ligne in lignes:
+            valeur_cle = cle(ligne)
+            if self._contient_none(valeur_cle):
+                continue
+            if en_texte:
+                valeur_cle = self._en_texte(valeur_cle)
+            correspondances = index.get(valeur_cle)
+            if correspondances is None:
+                index[valeur_cle] = [valeurs(ligne)]
+            else:
+                correspondances.append(valeurs(ligne))
+
+    def _contient_none(self, cle) -> bool:
+        return cle is None if len(self.cles) == 1 else None in cle
+
+    def _en_texte(self, cle):
+        if len(self.cles) == 1:
+            return str(cle).strip()
+        return tuple(str(valeur).strip() for valeur in cle)
+
+    @staticmethod
+    def _extracteur(elements: list, multiple: bool = False):
+        # itemgetter retourne une valeur seule pour un élément, un tuple au delà
+        if not elements:
+            return lambda ligne: ()
+        extracteur = itemgetter(*elements)
+        if multiple and len(elements) == 1:
+            return lambda ligne: (extracteur(ligne),)
+        return extracteur
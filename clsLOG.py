@@ -1,52 +1,247 @@
 from tools import Tools
 import inspect
+import atexit
+import os
+import queue
+import threading
+import time
+import warnings
+from datetime import date, datetime
 from clsINIT import clsINIT
 # Définitions globales de classe.
 
+
+class clsLOGRotation:
+    """
+    Moteur de rotation des fichiers de log LOG_AAAA-MM-JJ_NN.log d'un répertoire.
+    Le fichier courant, sa date et sa taille sont conservés en mémoire : le répertoire n'est parcouru
+    qu'une fois, à la création. Ensuite la taille est tenue à jour à partir des octets écrits (ajoute),
+    un nouveau fichier est ouvert au changement de date (rang 01) ou quand la taille dépasse log_size Mo (rang suivant).
+    Nb : les octets écrits par un autre processus dans le même fichier ne sont pas comptabilisés.
+    """
+    def __init__(self, log_dir: str, log_size: int):
+        self.log_dir = log_dir
+        self.taille_max = log_size * 1000000
+        self._verrou = threading.Lock()
+        self._date: date = None
+        self._rang: int = 0
+        self._octets: int = 0
+        self._fichier: str = None
+        self._initialise()
+
+    def _initialise(self):
+        # dernier fichier du répertoire selon (date, rang), et non selon l'ordre de listdir
+        dernier = None
+        for nom in Tools.list_file(chemin_d_acces=self.log_dir, type_fichier=".log", prefixe_fichier="LOG_"):
+            elements = nom[:-4].split('_')
+            if len(elements) != 3 or not elements[2].isdigit():
+                continue
+            try:
+                cle = (datetime.strptime(elements[1], '%Y-%m-%d').date(), int(elements[2]))
+            except ValueError:
+                continue
+            if dernier is None or cle > dernier:
+                dernier = cle
+
+        if dernier is not None and dernier[0] == date.today():
+            self._date, self._rang = dernier
+            self._nomme()
+            self._octets = os.path.getsize(self._fichier)
+        else:
+            self._date, self._rang = date.today(), 1
+            self._nomme()
+            self._octets = os.path.getsize(self._fichier) if os.path.isfile(self._fichier) else 0
+
+    def _nomme(self):
+        self._fichier = f"{self.log_dir}LOG_{self._date.isoformat()}_{str(self._rang).zfill(2)}.log"
+
+    def fichier(self) -> str:
+        """
+        Retourne le chemin du fichier de log courant, après rotation éventuelle.
+        """
+        with self._verrou:
+            aujourdhui = date.today()
+            if aujourdhui != self._date:
+                self._date, self._rang, self._octets = aujourdhui, 1, 0
+                self._nomme()
+            elif self._octets > self.taille_max:
+                self._rang += 1
+                self._octets = 0
+                self._nomme()
+            return self._fichier
+
+    def ajoute(self, nb_octets: int):
+        """
+        Comptabilise les octets écrits dans le fichier courant.
+        """
+        with self._verrou:
+            self._octets += nb_octets
+
+
+class clsLOGAsynchrone:
+    """
+    Écrivain de log en tâche de fond : les lignes sont déposées dans une file par les appelants
+    et écrites par un thread dédié qui conserve le fichier ouvert.
+    Les lignes sont écrites par lots, dès que taille_lot lignes sont en attente ou que delai secondes
+    se sont écoulées depuis la première ligne du lot. Le nom du fichier (rotation) n'est évalué qu'une fois par lot.
+    La file est vidée à la fin du programme (atexit), vide() permet de forcer l'écriture à tout moment.
+    Un lot qui ne peut pas être écrit (disque plein, droits) est perdu : le thread continue, l'incident est signalé
+    par un avertissement (warnings.warn, RuntimeWarning) et les lignes perdues sont comptées dans nb_lignes_perdues.
+    """
+    kTAILLE_LOT = 500
+    kDELAI = 1.0    # secondes
+    _VIDE = object()
+    _ARRET = object()
+
+    def __init__(self, rotation: clsLOGRotation, taille_lot: int = None, delai: float = None):
+        self.rotation = rotation
+        self.taille_lot = taille_lot or self.kTAILLE_LOT
+        self.delai = self.kDELAI if delai is None else delai
+        self._file = queue.Queue()
+        self._fichier = None
+        self._nom_fichier: str = None
+        self.nb_lignes_perdues = 0
+        self._thread = threading.Thread(target=self._boucle, name="clsLOGAsynchrone", daemon=True)
+        self._thread.start()
+        atexit.register(self.arrete)
+
+    def ecrit(self, ligne: str):
+        """
+        Dépose une ligne dans la file d'écriture, c'est le seul coût supporté par l'appelant.
+        """
+        self._file.put(ligne)
+
+    def vide(self):
+        """
+        Force l'écriture des lignes en attente et attend qu'elles soient sur disque.
+        """
+        if self._thread.is_alive():
+            self._file.put(self._VIDE)
+            self._file.join()
+
+    def arrete(self):
+        """
+        Écrit les lignes en attente, ferme le fichier et arrête le thread.
+        """
+        if self._thread.is_alive():
+            self._file.put(self._ARRET)
+            self._thread.join()
+
+    def _boucle(self):
+        lot: list[str] = []
+        limite: float = 0.0
+        while True:
+            controle = None     # None : délai du lot écoulé
+            try:
+                if lot:
+                    element = self._file.get(timeout=max(0.0, limite - time.monotonic()))
+                else:
+                    element = self._file.get()
+                    limite = time.monotonic() + self.delai
+                if element is self._VIDE or element is self._ARRET:
+                    controle = element
+                else:
+                    lot.append(element)
+                    if len(lot) < self.taille_lot:
+                        continue
+            except queue.Empty:
+                pass
+
+            self._ecrit_lot(lot)
+            for _ in range(len(lot) + (controle is not None)):
+                self._file.task_done()
+            lot = []
+            if controle is self._ARRET:
+                if self._fichier is not None:
+                    self._fichier.close()
+                return
+
+    def _ecrit_lot(self, lot: list[str]):
+        if not lot:
+            return
+        try:
+            nom_fichier = self.rotation.fichier()
+            if nom_fichier != self._nom_fichier:
+                if self._fichier is not None:
+                    self._fichier.close()
+                self._fichier = open(nom_fichier, "a", encoding="utf-8")
+                self._nom_fichier = nom_fichier
+            texte = "".join(lot)
+            self._fichier.write(texte)
+            self._fichier.flush()
+            self.rotation.ajoute(len(texte.encode("utf-8")))
+        except Exception as e:
+            # le thread d'écriture ne doit pas s'arrêter : l'incident est signalé et les lignes perdues comptées
+            self.nb_lignes_perdues += len(lot)
+            warnings.warn(f"clsLOGAsynchrone : {len(lot)} lignes de log perdues ({self.nb_lignes_perdues} au total) : {e}",
+                          RuntimeWarning, stacklevel=2)
+            self._nom_fichier = None
+
+
 class clsLOG:
-    def __init__(self):
+    _ecrivain: clsLOGAsynchrone = None     # écrivain partagé par toutes les instances du processus
+    _verrou_ecrivain = threading.Lock()
+    _rotations: dict = {}                  # moteurs de rotation partagés, par répertoire de log
+    _statiques: str = None                 # exécutable (version) et poste, voir _champs_statiques
+
+    def __init__(self, asynchrone: bool = None):
+        """
+        :param asynchrone: écriture du log par un thread dédié (voir clsLOGAsynchrone).
+           Par défaut la valeur ASYNCHRONE de la section LOG du fichier INI est utilisée.
+        """
         self.fichier_init = Tools.get_current_directory() + 'config.ini'
         self.init = clsINIT(self.fichier_init)
         self._id_traitement: str = None
+        self.asynchrone = self.init.log_asynchrone if asynchrone is None else asynchrone
+
+    @property
+    def ecrivain(self) -> clsLOGAsynchrone:
+        """
+        Retourne l'écrivain asynchrone partagé, il est créé au premier appel.
+        """
+        if clsLOG._ecrivain is None:
+            with clsLOG._verrou_ecrivain:
+                if clsLOG._ecrivain is None:
+                    clsLOG._ecrivain = clsLOGAsynchrone(self.rotation)
+        return clsLOG._ecrivain
+
+    def vide_log(self):
+        """
+        Force l'écriture sur disque des lignes de log en attente (mode asynchrone).
+        """
+        if clsLOG._ecrivain is not None:
+            clsLOG._ecrivain.vide()
     
+    @property
+    def rotation(self) -> clsLOGRotation:
+        """
+        Retourne le moteur de rotation du répertoire de log, il est créé (et le répertoire parcouru) au premier appel.
+        """
+        log_dir = self.init.log_dir
+        rotation = clsLOG._rotations.get(log_dir)
+        if rotation is None:
+            with clsLOG._verrou_ecrivain:
+                rotation = clsLOG._rotations.get(log_dir)
+                if rotation is None:
+                    rotation = clsLOGRotation(log_dir, self.init.log_size)
+                    clsLOG._rotations[log_dir] = rotation
+        return rotation
+
     @property
     def _log_file(self) -> str:
         """
         retourne le nom du fichier de log
         """
+        return self.rotation.fichier()
 
-        # définitions de variables 
-        elements_fichier: list[str] = []
-
-        liste_fichiers = Tools.list_file(chemin_d_acces=self.init.log_dir,type_fichier=".log")
-
-        if liste_fichiers== []:
-            fichier_log= 'LOG_'+ Tools.date_du_jour() + '_01.log'
-
-        else:
-            fichier_log = liste_fichiers[-1]
-
-        path_fichier_log = self.init.log_dir + fichier_log
-        Tools.cree_fichier_si_inexistant(path_fichier_log)
-        Fichier_court = fichier_log.split('.')[0]
-        elements_fichier = Fichier_court.split('_')
-        rank = int(elements_fichier[2]) #-1
-        taille = Tools.get_file_size(path_fichier_log)
-        
-        if Tools.date_en_date(elements_fichier[1]) < Tools.date_en_date(Tools.date_du_jour()):
-            rank = 1
-            elements_fichier[1] = Tools.date_du_jour()
-            elements_fichier[2] = str(rank).zfill(2)
-        else:
-            if taille/1000000 > self.init.log_size:
-                rank += 1
-                elements_fichier[2] = str(rank).zfill(2)
-        
-        fichier_log = '_'.join(elements_fichier) + '.log'
-        path_fichier_log = self.init.log_dir + fichier_log
-        Tools.cree_fichier_si_inexistant(path_fichier_log)
-
-        return path_fichier_log
+    @property
+    def _champs_statiques(self) -> str:
+        """
+        Exécutable, version et poste : calculés une seule fois par processus.
+        """
+        if clsLOG._statiques is None:
+            clsLOG._statiques = f"{self.init.executable} ({self.init.version})\t{Tools.get_nom_reseau()}"
+        return clsLOG._statiques
 
     @property
     def id_traitement(self) -> str:
@@ -93,16 +288,26 @@ class clsLOG:
         // Pour faciliter l'extraction des fichiers de log, dans le message d'erreur: les CR sont remplacés par || et les tabulations par |. Un fichier de LOG est par conséquent facilement "importable dans Excel par exemple"
         """
 
+        # chemin rapide : un message au delà du niveau consigné est rejeté avant toute mise en forme
+        log_level = self.init.log_level
+        if severite > log_level:
+            return
+
+        horodatage = datetime.now().strftime("%Y-%m-%d\t%H:%M:%S")
         texte_log: str = (
-            f"{severite}/{self.init.log_level}\t"
-            f"{Tools.date_du_jour()}\t"
-            f"{Tools.maintenant()}\t"
-            f"{self.init.executable} ({self.init.version})\t"
-            f"{Tools.get_nom_reseau()}\t"
+            f"{severite}/{log_level}\t"
+            f"{horodatage}\t"
+            f"{self._champs_statiques}\t"
             f"{self.id_traitement}\t"
-            f"{Tools.get_function_name_2()}\t"
+            f"{Tools.get_appelant()}\t"
             f"{message.replace(chr(10), '||').replace(chr(9), '|')}\n"
         )
     
-        with open(self._log_file, "a", encoding="utf-8") as f:  # "a" pour ajouter à la fin, "w" pour écraser
-            f.write(texte_log)
\ No newline at end of file
+        if self.asynchrone:
+            self.ecrivain.ecrit(texte_log)
+            return
+
+        rotation = self.rotation
+        with open(rotation.fichier(), "a", encoding="utf-8") as f:  # "a" pour ajouter à la fin, "w" pour écraser
+            f.write(texte_log)
+        rotation.ajoute(len(texte_log.encode("utf-8")))
\ No newline at end of file
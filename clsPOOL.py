@@ -0,0 +1,256 @@
+import pyodbc
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from clsLOG import clsLOG
+from tools import Tools
+
+
+class clsPOOL:
+    """
+    Pool de connexions pyodbc, partagé entre les threads et les objets clsSQL / clsMSSQL.
+
+    Un pool est créé par triplet (serveur, base, utilisateur) et obtenu par clsPOOL.get_pool :
+    l'ouverture d'une connexion (négociation TLS, authentification) n'est payée qu'une fois,
+    les objets clsSQL créés et détruits à chaque tâche réutilisent les connexions libres.
+
+      - taille_min : nombre de connexions conservées même inactives (ouvertes à la création du pool).
+      - taille_max : nombre maximum de connexions ouvertes, au delà acquiert attend qu'une connexion soit libérée.
+      - duree_inactivite : au delà de ce délai (en secondes) une connexion libre est fermée (dans la limite de taille_min).
+      - verifie : contrôle de la connexion (SELECT 1) avant de la confier, une connexion défaillante est remplacée.
+
+    La connexion d'un objet clsSQL détruit sans close est rendue au pool (restitue) : elle ne reste pas
+    comptée comme empruntée jusqu'à épuisement du pool. Fermer explicitement (close, with) reste préférable.
+
+    Exemple d'utilisation :
+    pool = clsPOOL.get_pool(chaine_connexion, serveur, base, utilisateur)
+    with pool.connexion() as conn:
+        conn.cursor().execute("SELECT 1")
+    """
+    # constants
+    kTAILLE_MIN = 0
+    kTAILLE_MAX = 10
+    kDUREE_INACTIVITE = 300     # secondes
+    kATTENTE = 30               # secondes d'attente maximum d'une connexion libre
+    kSONDE = 1                  # secondes entre deux relevés des connexions abandonnées pendant une attente
+
+    _pools: dict = {}
+    _verrou_pools = threading.Lock()
+
+    @classmethod
+    def get_pool(cls, chaine_connexion: str, server: str, database: str, username: str,
+                 taille_min: int = None, taille_max: int = None, duree_inactivite: int = None) -> "clsPOOL":
+        """
+        Retourne le pool associé au triplet (serveur, base, utilisateur), il est créé au premier appel.
+        Les paramètres de taille ne sont pris en compte qu'à la création du pool.
+        """
+        cle = (server, database, username)
+        with cls._verrou_pools:
+            pool = cls._pools.get(cle)
+            if pool is None:
+                pool = cls(chaine_connexion, taille_min, taille_max, duree_inactivite)
+                cls._pools[cle] = pool
+            return pool
+
+    @classmethod
+    def ferme_pools(cls):
+        """
+        Ferme tous les pools, à appeler en fin de traitement (voir ferme) : les connexions empruntées
+        sont fermées lorsqu'elles sont rendues.
+        """
+        with cls._verrou_pools:
+            pools = list(cls._pools.values())
+            cls._pools.clear()
+        for pool in pools:
+            pool.ferme()
+
+    def __init__(self, chaine_connexion: str, taille_min: int = None, taille_max: int = None,
+                 duree_inactivite: int = None, verifie: bool = True):
+        self.chaine_connexion = chaine_connexion
+        self.taille_min = self.kTAILLE_MIN if taille_min is None else taille_min
+        self.taille_max = self.kTAILLE_MAX if taille_max is None else taille_max
+        self.duree_inactivite = self.kDUREE_INACTIVITE if duree_inactivite is None else duree_inactivite
+        self.verifie = verifie
+        self.log = clsLOG()
+        self._libres = deque()      # (connexion, heure de libération), la plus récente à droite
+        self._nb_ouvertes = 0
+        self._clos = False
+        self._condition = threading.Condition(threading.Lock())
+        self._abandonnees = queue.SimpleQueue()     # connexions d'objets clsSQL détruits sans close (voir restitue)
+
+        if self.taille_min > self.taille_max:
+            raise ValueError("taille_min ne peut pas être supérieure à taille_max.")
+        for _ in range(self.taille_min):
+            self._libres.append((self._ouvre(), Tools.get_current_time()))
+            self._nb_ouvertes += 1
+
+    @property
+    def nb_ouvertes(self) -> int:
+        return self._nb_ouvertes
+
+    @property
+    def nb_libres(self) -> int:
+        return len(self._libres)
+
+    @property
+    def clos(self) -> bool:
+        return self._clos
+
+    def acquiert(self, attente: float = None):
+        """
+        Retourne une connexion du pool : une connexion libre si possible, sinon une nouvelle connexion
+        si taille_max n'est pas atteinte, sinon attend au plus attente secondes (TimeoutError au delà).
+        RuntimeError est levée si le pool est fermé.
+        """
+        attente = self.kATTENTE if attente is None else attente
+        limite = Tools.get_current_time() + attente
+        while True:
+            self._reprend_abandonnees()
+            with self._condition:
+                if self._clos:
+                    raise RuntimeError("Le pool de connexions est fermé.")
+                inactives = self._evince()
+                disponible = True
+                if self._libres:
+                    connexion, _ = self._libres.pop()
+                elif self._nb_ouvertes < self.taille_max:
+                    connexion = None
+                    self._nb_ouvertes += 1
+                else:
+                    disponible = False
+                    reste = limite - Tools.get_current_time()
+                    expire = reste <= 0
+                    if not expire:
+                        # attente par tranches : une connexion restituée par le ramasse-miettes ne notifie personne
+                        self._condition.wait(min(reste, self.kSONDE))
+            # les connexions inactives sont fermées hors verrou : la fermeture peut attendre le serveur
+            for inactive in inactives:
+                self._ferme_connexion(inactive)
+            if not disponible:
+                if expire:
+                    raise TimeoutError(f"Aucune connexion libre dans le pool après {attente} secondes.")
+                continue
+
+            # ouverture et contrôle hors verrou : ils impliquent un aller-retour avec le serveur
+            if connexion is None:
+                try:
+                    return self._ouvre()
+                except Exception:
+                    self._abandonne()
+                    raise
+            if not self.verifie or self._est_valide(connexion):
+                return connexion
+            self.log.ecrit_log(5,"Connexion du pool défaillante, elle est remplacée.")
+            self._ferme_connexion(connexion)
+            self._abandonne()
+
+    def libere(self, connexion):
+        """
+        Rend une connexion au pool. Une éventuelle transaction en cours est annulée.
+        Si le pool a été fermé entre temps la connexion est fermée.
+        """
+        if self._clos:
+            self._ferme_connexion(connexion)
+            self._abandonne()
+            return
+        try:
+            connexion.rollback()
+            connexion.autocommit = False
+        except Exception as e:
+            self.log.ecrit_log(5,f"Connexion rendue au pool inutilisable, elle est fermée : {e}")
+            self._ferme_connexion(connexion)
+            self._abandonne()
+            return
+        with self._condition:
+            clos = self._clos
+            if not clos:
+                self._libres.append((connexion, Tools.get_current_time()))
+                self._condition.notify()
+        if clos:
+            # pool fermé pendant le rollback
+            self._ferme_connexion(connexion)
+            self._abandonne()
+
+    def restitue(self, connexion):
+        """
+        Rend au pool la connexion d'un objet détruit sans avoir été fermé (voir clsSQL.connect).
+        Appelée par le ramasse-miettes, éventuellement pendant que le thread courant détient le verrou du pool :
+        la connexion est seulement mise de côté, elle est libérée (libere) au prochain acquiert.
+        """
+        self._abandonnees.put(connexion)
+
+    def _reprend_abandonnees(self):
+        while True:
+            try:
+                connexion = self._abandonnees.get_nowait()
+            except queue.Empty:
+                return
+            self.log.ecrit_log(5,"Connexion d'un objet détruit sans close rendue au pool.")
+            self.libere(connexion)
+
+    @contextmanager
+    def connexion(self, attente: float = None):
+        """
+        Gestionnaire de contexte : la connexion est rendue au pool en sortie de bloc.
+        """
+        connexion = self.acquiert(attente)
+        try:
+            yield connexion
+        finally:
+            self.libere(connexion)
+
+    def ferme(self):
+        """
+        Ferme le pool : les connexions libres sont fermées, celles qui sont empruntées le seront lorsqu'elles
+        seront rendues (libere). Les threads en attente d'une connexion reçoivent RuntimeError.
+        """
+        with self._condition:
+            self._clos = True
+            libres = [connexion for connexion, _ in self._libres]
+            self._libres.clear()
+            self._nb_ouvertes -= len(libres)
+            self._condition.notify_all()
+        for connexion in libres:
+            self._ferme_connexion(connexion)
+        self._reprend_abandonnees()
+
+    def _ouvre(self):
+        connexion = pyodbc.connect(self.chaine_connexion)
+        self.log.ecrit_log(11,"Nouvelle connexion ouverte dans le pool.")
+        return connexion
+
+    def _abandonne(self):
+        # une connexion comptée comme ouverte n'existe plus : libère sa place
+        with self._condition:
+            self._nb_ouvertes -= 1
+            self._condition.notify()
+
+    def _evince(self) -> list:
+        # appelée sous verrou : retire les connexions libres inactives depuis trop longtemps, les plus anciennes d'abord,
+        # l'appelant les ferme une fois le verrou relâché
+        seuil = Tools.get_current_time() - self.duree_inactivite
+        inactives = []
+        while self._libres and self._nb_ouvertes > self.taille_min and self._libres[0][1] < seuil:
+            connexion, _ = self._libres.popleft()
+            inactives.append(connexion)
+            self._nb_ouvertes -= 1
+        return inactives
+
+    @staticmethod
+    def _est_valide(connexion) -> bool:
+        try:
+            cursor = connexion.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _ferme_connexion(connexion):
+        try:
+            connexion.close()
+        except Exception:
+            pass
@@ -0,0 +1,118 @@
+import os
+import json
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from tools import Tools
+
+
+class clsREPERE:
+    """
+    Repères (high-water marks) des extractions incrémentales, conservés dans un fichier d'état local (JSON).
+
+    Un repère est la plus grande valeur, pour un travail donné, de la colonne qui croît à chaque modification
+    (clé auto-incrémentée, rowversion / timestamp SQL Server, date de mise à jour...) : l'extraction suivante
+    ne lit que les lignes au delà du repère (voir clsETL.etl_export_sql_incremental).
+
+    Le fichier est réécrit de manière atomique (fichier temporaire puis os.replace) : une interruption
+    ne peut pas laisser un état à moitié écrit, le repère précédent reste alors en vigueur.
+    Les types des valeurs sont conservés : int, float, Decimal, str, date, datetime et bytes (rowversion).
+
+    Exemple d'utilisation :
+    reperes = clsREPERE("c:/etl/etat.json")
+    dernier = reperes.lit("commandes")          # None au premier passage
+    ...
+    reperes.avance("commandes", nouveau_repere, lignes=1250)
+    """
+    _verrou = threading.Lock()      # un fichier d'état peut être partagé par plusieurs travaux du même processus
+
+    def __init__(self, fichier_etat: str):
+        self.fichier_etat = fichier_etat
+
+    def lit(self, travail: str):
+        """
+        Retourne le repère du travail, None s'il n'a jamais été exécuté.
+        """
+        entree = self._charge().get(travail)
+        return None if entree is None else self._decode(entree)
+
+    def etat(self, travail: str) -> dict:
+        """
+        Retourne l'entrée complète du travail : {"repere", "type", "horodatage", "lignes"}, None s'il n'a jamais été exécuté.
+        """
+        return self._charge().get(travail)
+
+    def avance(self, travail: str, repere, lignes: int = None):
+        """
+        Enregistre le nouveau repère du travail. À n'appeler qu'une fois les lignes écrites avec succès.
+        """
+        with self._verrou:
+            etat = self._charge()
+            entree = self._encode(repere)
+            entree["horodatage"] = f"{Tools.date_du_jour()} {Tools.maintenant()}"
+            entree["lignes"] = lignes
+            etat[travail] = entree
+            self._enregistre(etat)
+
+    def reinitialise(self, travail: str):
+        """
+        Supprime le repère du travail : la prochaine extraction sera complète.
+        """
+        with self._verrou:
+            etat = self._charge()
+            if etat.pop(travail, None) is not None:
+                self._enregistre(etat)
+
+    def _charge(self) -> dict:
+        if not os.path.isfile(self.fichier_etat):
+            return {}
+        with open(self.fichier_etat, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _enregistre(self, etat: dict):
+        repertoire = os.path.dirname(self.fichier_etat)
+        if repertoire and not os.path.isdir(repertoire):
+            os.makedirs(repertoire)
+        temporaire = f"{self.fichier_etat}.{os.getpid()}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(etat, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaire, self.fichier_etat)
+
+    @staticmethod
+    def _encode(repere) -> dict:
+        if isinstance(repere, bool) or repere is None:
+            raise ValueError(f"Repère non supporté : {repere!r}")
+        if isinstance(repere, int):
+            return {"repere": repere, "type": "int"}
+        if isinstance(repere, float):
+            return {"repere": repere, "type": "float"}
+        if isinstance(repere, Decimal):
+            return {"repere": str(repere), "type": "decimal"}
+        if isinstance(repere, str):
+            return {"repere": repere, "type": "str"}
+        if isinstance(repere, datetime):     # testé avant date dont il dérive
+            return {"repere": repere.isoformat(), "type": "datetime"}
+        if isinstance(repere, date):
+            return {"repere": repere.isoformat(), "type": "date"}
+        if isinstance(repere, (bytes, bytearray)):
+            return {"repere": bytes(repere).hex(), "type": "bytes"}
+        raise ValueError(f"Type de repère non supporté : {type(repere).__name__}")
+
+    @staticmethod
+    def _decode(entree: dict):
+        valeur = entree["repere"]
+        match entree["type"]:
+            case "int" | "float" | "str":
+                return valeur
+            case "decimal":
+                return Decimal(valeur)
+            case "datetime":
+                return datetime.fromisoformat(valeur)
+            case "date":
+                return date.fromisoformat(valeur)
+            case "bytes":
+                return bytes.fromhex(valeur)
+            case _:
+                raise ValueError(f"Type de repère inconnu : {entree['type']}")
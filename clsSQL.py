@@ -1,9 +1,56 @@
 import pyodbc
+import math
+import asyncio
+import weakref
 import warnings
+import itertools
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from clsLOG import clsLOG
+from clsPOOL import clsPOOL
+from clsCACHE import clsCACHE
+from clsTable import clsTable
+from tools import Tools
+
+class _RequeteAsync:
+    """
+    État d'une requête exécutée par execute_select_async : curseur en cours (pour l'annuler depuis la boucle asyncio)
+    et indicateur d'annulation, consulté par le thread avant l'exécution.
+    """
+    __slots__ = ("curseur", "annulee", "verrou")
+
+    def __init__(self):
+        self.curseur = None
+        self.annulee = False
+        self.verrou = threading.Lock()
+
+    def annule(self):
+        with self.verrou:
+            self.annulee = True
+            curseur = self.curseur
+        if curseur is not None:
+            try:
+                curseur.cancel()    # SQLCancel : interrompt la requête côté serveur
+            except Exception:
+                pass
+
+
+def _restitue_connexion(pool: clsPOOL, connexion):
+    # appelée par weakref.finalize lorsqu'un objet clsSQL connecté au pool est détruit sans close
+    warnings.warn("Objet clsSQL détruit sans close : la connexion est rendue au pool.", ResourceWarning)
+    pool.restitue(connexion)
+
 
 class clsSQL:
-    def __init__(self, server: str, database: str, username: str, password: str, connection_string: str):
+    # constants
+    kTAILLE_LOT = 5000  # nombre de lignes lues par fetchmany
+    kNB_ASYNC = 8       # nombre maximum de requêtes asynchrones exécutées simultanément (threads et connexions)
+
+    _executeur_async: ThreadPoolExecutor = None
+    _verrou_async = threading.Lock()
+
+    def __init__(self, server: str, database: str, username: str, password: str, connection_string: str, utilise_pool: bool = True):
         self.server = server
         self.database = database
         self.username = username
@@ -12,12 +59,66 @@ class clsSQL:
         self.connection = None
         self.log = clsLOG()  # Assuming clsLOG is defined in another module
         self.cursor = None
+        self.utilise_pool = utilise_pool  # les connexions sont empruntées au pool clsPOOL (serveur, base, utilisateur)
+        self.pool = None
+        self._restitution = None    # weakref.finalize : rend la connexion au pool si l'objet est détruit sans close
+        self.cache: clsCACHE = None   # cache des résultats, inactif par défaut (voir active_cache)
+        self.__EstConnecte = False
+
+    @property
+    def chaine_connexion(self) -> str:
+        """
+        Chaîne de connexion ODBC complète.
+        """
+        return f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password};connection_string={self.connection_string}'
     
+    def active_cache(self, taille_max: int = None, octets_max: int = None, duree: float = clsCACHE.kDUREE,
+                     cache: clsCACHE = None) -> clsCACHE:
+        """
+        Active le cache des résultats de execute_select / execute_DictSelect / execute_TableSelect (voir clsCACHE).
+        Une requête déjà exécutée (même texte aux espaces près, mêmes paramètres) est servie depuis le cache
+        tant qu'elle n'a pas expiré (duree secondes) et qu'aucune modification de ses tables n'a été faite par
+        Execute_Insert / Execute_Update / Execute_Delete / bulk_insert de cet objet.
+        Les modifications faites par ailleurs (autre programme, Transaction, curseur direct) ne sont connues qu'au travers
+        de duree ou de invalide_cache : le cache est destiné aux données de référence qui évoluent peu.
+        Cache actif, les lignes de execute_select sont des tuples (copies de celles conservées) et non des pyodbc.Row :
+        l'accès par nom de colonne (ligne.colonne) n'est pas disponible, execute_DictSelect le permet.
+
+        :param cache: cache existant à partager entre plusieurs objets clsSQL, un nouveau cache est créé sinon.
+           Les entrées sont distinguées par serveur et base de données.
+        :return: le cache, dont les compteurs sont disponibles dans statistiques.
+        """
+        self.cache = cache or clsCACHE(taille_max, octets_max, duree)
+        return self.cache
+
+    def invalide_cache(self, table: str = None):
+        """
+        Supprime du cache les résultats des requêtes qui lisent la table, ou tout le cache si table est None.
+        """
+        if self.cache is None:
+            return
+        if table is None:
+            self.cache.vide()
+        else:
+            self.cache.invalide(table)
+
+    def _invalide_cache_requete(self, query: str):
+        # la table modifiée n'est pas reconnue (CTE, procédure stockée, alias...) : tout le cache est vidé par prudence
+        if self.cache is not None:
+            table = clsCACHE.table_modifiee(query)
+            self.invalide_cache(table)
+            self.log.ecrit_log(11,f"Cache invalidated for {table or 'all tables'}.")
+
     def connect(self):
         try:
-            self.connection = pyodbc.connect(
-                f'DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={self.server};DATABASE={self.database};UID={self.username};PWD={self.password};connection_string={self.connection_string}'
-            )
+            if self.utilise_pool:
+                self.pool = clsPOOL.get_pool(self.chaine_connexion, self.server, self.database, self.username)
+                self.connection = self.pool.acquiert()
+                # sans close (objet abandonné, exception), la connexion serait perdue pour le pool
+                self._restitution = weakref.finalize(self, _restitue_connexion, self.pool, self.connection)
+                self._restitution.atexit = False
+            else:
+                self.connection = pyodbc.connect(self.chaine_connexion)
             self.log.ecrit_log(10,"Connection successful")
             self.__EstConnecte = True
             return True
@@ -28,8 +129,32 @@ class clsSQL:
 
     def close(self):
         if self.connection:
-            self.connection.close()
-            self.log.ecrit_log(10,"Connection closed")
+            if self.pool is not None:
+                # la connexion n'est pas fermée mais rendue au pool pour être réutilisée
+                if self._restitution is not None:
+                    self._restitution.detach()
+                    self._restitution = None
+                self.pool.libere(self.connection)
+                self.log.ecrit_log(10,"Connection released to pool")
+            else:
+                self.connection.close()
+                self.log.ecrit_log(10,"Connection closed")
+            self.connection = None
+            self.__EstConnecte = False
+
+    def __enter__(self):
+        """
+        Gestionnaire de contexte : la connexion est ouverte (si besoin) en entrée de bloc et fermée,
+        ou rendue au pool, en sortie.
+        with clsMSSQL(serveur, base, utilisateur, mot_de_passe) as sql:
+            lignes = sql.execute_select("SELECT ...")
+        """
+        if not self.EstConnecte and not self.connect():
+            raise ConnectionError("Connexion à la base de données impossible.")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def execute_query(self, query: str, header: bool = True) -> list:
         warnings.warn("execute_query est obsolète, utilisez execute_select à la place",
@@ -38,14 +163,30 @@ class clsSQL:
         
         return self.execute_select(query, header)
     
-    def execute_select(self, query: str, header: bool = True) -> list:
+    def execute_select(self, query: str, header: bool = True, parametres: tuple = None) -> list:
         if not self.connection:
             self.log.ecrit_log(3,"No active connection to execute query.")
             return None
+        if self.cache is not None:
+            cle = clsCACHE.cle(query, parametres, base=(self.server, self.database))
+            resultat = self.cache.lit(cle)
+            if resultat is not None:
+                # lignes conservées sous forme de tuples (non modifiables) : seules les listes sont copiées
+                columns, results = resultat
+                if not results:
+                    return []
+                return [list(columns)] + list(results) if header else list(results)
         try:
             cursor = self.connection.cursor()
-            cursor.execute(query)
+            cursor.execute(query, *(parametres or ()))
             results = cursor.fetchall()
+            if self.cache is not None:
+                # un pyodbc.Row est modifiable : le cache conserve des tuples, retournés dès la première exécution
+                columns = [column[0] for column in cursor.description]
+                results = [tuple(ligne) for ligne in results]
+                self.cache.ecrit(cle, (tuple(columns), tuple(results)), clsCACHE.tables_lues(query),
+                                 clsCACHE.estime_octets(results))
+                results = list(results)
             
             # data set vide on retourne une liste vide
             if not results:
@@ -65,12 +206,72 @@ class clsSQL:
             self.log.ecrit_log(0,f"Error executing query: {e}")
             return None
         
-    def execute_DictSelect(self, query: str) -> list[dict]:    
+    def fetch_batches(self, query: str, taille_lot: int = None, header: bool = False, dict_rows: bool = False,
+                      parametres: tuple = None):
+        """
+        Exécute une requête SQL et retourne un générateur des lots de lignes du résultat.
+        Les lignes sont lues par fetchmany(taille_lot) : seul le lot courant est en mémoire et le premier lot
+        est disponible avant la fin de la lecture du résultat.
+
+        :param taille_lot: nombre de lignes par lot (arraysize du curseur), kTAILLE_LOT par défaut.
+        :param header: si True, le premier lot retourné ne contient que la liste des colonnes.
+        :param dict_rows: si True, chaque ligne est retournée sous forme de dictionnaire {colonne: valeur},
+           le paramètre header est alors ignoré.
+        :param parametres: valeurs des marqueurs ? de la requête, transmises au pilote (jamais concaténées au texte SQL).
+        """
+        if not self.connection:
+            self.log.ecrit_log(3,"No active connection to execute query.")
+            return
+        taille_lot = taille_lot or self.kTAILLE_LOT
+        cursor = None
+        try:
+            cursor = self.connection.cursor()
+            cursor.arraysize = taille_lot
+            cursor.execute(query, *(parametres or ()))
+            columns = [column[0] for column in cursor.description]
+            if header and not dict_rows:
+                yield [columns]
+            nb_lignes = 0
+            while True:
+                lot = cursor.fetchmany(taille_lot)
+                if not lot:
+                    break
+                nb_lignes += len(lot)
+                if dict_rows:
+                    lot = [dict(zip(columns, ligne)) for ligne in lot]
+                yield lot
+            if nb_lignes == 0:
+                self.log.ecrit_log(6,"No results returned from the query.")
+            self.log.ecrit_log(10,f"Query executed successfully ({nb_lignes} rows): {query}")
+        except Exception as e:
+            # un générateur ne peut pas retourner None en cours de lecture : l'erreur est consignée puis propagée
+            self.log.ecrit_log(0,f"Error executing query: {e}")
+            raise
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def execute_select_iter(self, query: str, header: bool = True, dict_rows: bool = False, taille_lot: int = None,
+                            parametres: tuple = None):
+        """
+        Équivalent en flux de execute_select : retourne un générateur des lignes du résultat,
+        lues par lots de taille_lot lignes. L'entête (liste des colonnes) est retournée en premier si header est True.
+        Si dict_rows est True les lignes sont des dictionnaires (équivalent en flux de execute_DictSelect).
+        Les valeurs des marqueurs ? de la requête sont passées dans parametres.
+        """
+        for lot in self.fetch_batches(query, taille_lot, header, dict_rows, parametres):
+            yield from lot
+
+    def execute_DictSelect(self, query: str, compact: bool = False, parametres: tuple = None) -> list[dict]:    
         """
         Exécute une requête SQL et retourne les résultats sous forme de liste de dictionnaires.
         Chaque dictionnaire représente une ligne du résultat, avec les noms de colonnes comme clés.
+        Si compact est True le résultat est une clsTable (voir execute_TableSelect), accessible de la même manière.
+        Les valeurs des marqueurs ? de la requête sont passées dans parametres (voir aussi active_cache).
         """
-        Resultats = self.execute_select(query, header=True)
+        if compact:
+            return self.execute_TableSelect(query, parametres=parametres)
+        Resultats = self.execute_select(query, header=True, parametres=parametres)
         if Resultats is None or len(Resultats) == 0:
             self.log.ecrit_log(6,"No results returned from the query.")
             return []
@@ -79,6 +280,33 @@ class clsSQL:
         donnees = Resultats[1:]
         return [dict(zip(entetes, ligne)) for ligne in donnees]
     
+    def execute_TableSelect(self, query: str, taille_lot: int = None, parametres: tuple = None) -> clsTable:
+        """
+        Exécute une requête SQL et retourne le résultat dans une clsTable : entête partagé et lignes sous forme de tuples,
+        sans la copie intermédiaire de execute_select ni un dictionnaire par ligne.
+        Retourne None en cas d'erreur (consignée dans le log) ou en l'absence de connexion.
+        """
+        if self.cache is not None and self.connection:
+            cle = clsCACHE.cle(query, parametres, "TABLE", (self.server, self.database))
+            resultat = self.cache.lit(cle)
+            if resultat is not None:
+                return clsTable(resultat[0], list(resultat[1]))
+        try:
+            lots = self.fetch_batches(query, taille_lot, header=True, parametres=parametres)
+            entete = next(lots, None)
+            if entete is None:
+                return None
+            table = clsTable(entete[0])
+            for lot in lots:
+                table.lignes.extend(tuple(ligne) for ligne in lot)
+            if self.cache is not None:
+                self.cache.ecrit(cle, (table.colonnes, list(table.lignes)), clsCACHE.tables_lues(query),
+                                 clsCACHE.estime_octets(table.lignes))
+            return table
+        except Exception:
+            # l'erreur est déjà consignée par fetch_batches
+            return None
+
     def Execute_Insert(self, query: str) -> bool:
         """
         Exécute une requête d'insertion dans la base de données.
@@ -93,10 +321,65 @@ class clsSQL:
             self.connection.commit()
             cursor.close()
             self.log.ecrit_log(10,f"Insert executed successfully: {query}")
+            self._invalide_cache_requete(query)
             return True
         except Exception as e:
             self.log.ecrit_log(0,f"Error executing insert: {e}")
             return False
+    def bulk_insert(self, table: str, columns: list[str], rows, batch_size: int = None, fast_executemany: bool = True) -> int:
+        """
+        Insertion en masse paramétrée : les lignes sont envoyées par lots avec executemany
+        (fast_executemany de pyodbc : un seul aller-retour par lot) et chaque lot est validé (commit).
+
+        :param table: nom de la table cible, éventuellement qualifié (schema.table).
+        :param columns: liste des colonnes à alimenter (noms simples). Si None, les clés de la première ligne sont utilisées
+           (les lignes doivent alors être des dictionnaires ou des clsLigne).
+        :param rows: itérable de lignes (tuples/listes dans l'ordre des colonnes, dictionnaires ou clsLigne),
+           il est consommé à la demande : un générateur de clsETL.etl_input_iter peut être fourni directement.
+        :param batch_size: nombre de lignes par lot, kTAILLE_LOT par défaut.
+        :return: nombre de lignes insérées, None en cas d'erreur (le lot en erreur est annulé,
+           les lots précédents restent validés, leur nombre est disponible dans nb_lignes_inserees).
+        """
+        self.nb_lignes_inserees = 0
+        if not self.connection:
+            self.log.ecrit_log(3,"No active connection to execute bulk insert.")
+            return None
+        batch_size = batch_size or self.kTAILLE_LOT
+        lots = Tools.par_lots(rows, batch_size)
+        cursor = None
+        try:
+            premier_lot = next(lots, None)
+            if premier_lot is None:
+                self.log.ecrit_log(6,f"Bulk insert into {table}: no rows to insert.")
+                return 0
+            if columns is None:
+                columns = list(premier_lot[0].keys())
+            # les noms sont insérés dans le texte de la requête : contrôlés puis placés entre crochets
+            colonnes_sql = [Tools.nom_sql(colonne, 1) for colonne in columns]
+            query = f"INSERT INTO {Tools.nom_sql(table)} ({', '.join(colonnes_sql)}) VALUES ({', '.join('?' * len(columns))})"
+
+            cursor = self.connection.cursor()
+            cursor.fast_executemany = fast_executemany
+            for lot in itertools.chain([premier_lot], lots):
+                if isinstance(lot[0], Mapping):
+                    # dictionnaires ou clsLigne : valeurs dans l'ordre des colonnes
+                    lot = [tuple(ligne.get(colonne) for colonne in columns) for ligne in lot]
+                cursor.executemany(query, lot)
+                self.connection.commit()
+                self.nb_lignes_inserees += len(lot)
+                self.log.ecrit_log(11,f"Bulk insert into {table}: {self.nb_lignes_inserees} rows committed.")
+            self.log.ecrit_log(10,f"Bulk insert executed successfully: {self.nb_lignes_inserees} rows into {table}")
+            return self.nb_lignes_inserees
+        except Exception as e:
+            self.connection.rollback()
+            self.log.ecrit_log(0,f"Error executing bulk insert into {table} after {self.nb_lignes_inserees} rows: {e}")
+            return None
+        finally:
+            if cursor is not None:
+                cursor.close()
+            if self.nb_lignes_inserees:
+                self.invalide_cache(table)
+
     def Execute_Update(self, query: str) -> bool:
         """
         Exécute une requête de mise à jour dans la base de données.
@@ -111,6 +394,7 @@ class clsSQL:
             self.connection.commit()
             cursor.close()
             self.log.ecrit_log(10,f"Update executed successfully: {query}")
+            self._invalide_cache_requete(query)
             return True
         except Exception as e:
             self.log.ecrit_log(0,f"Error executing update: {e}")
@@ -129,17 +413,158 @@ class clsSQL:
             self.connection.commit()
             cursor.close()
             self.log.ecrit_log(10,f"Delete executed successfully: {query}")
+            self._invalide_cache_requete(query)
             return True
         except Exception as e:
             self.log.ecrit_log(0,f"Error executing delete: {e}")
             return False
         
+    async def execute_select_async(self, query: str, header: bool = True, dict_rows: bool = False, parametres: tuple = None,
+                                   delai: float = None) -> list:
+        """
+        Version asyncio de execute_select : la requête est exécutée dans un thread (exécuteur borné à kNB_ASYNC threads),
+        sur sa propre connexion empruntée au pool (ouverte puis fermée si utilise_pool est False), la boucle asyncio
+        n'est pas bloquée. La connexion de l'objet (connect) n'est pas utilisée, elle n'a pas besoin d'être ouverte.
+        Le cache des résultats (active_cache) est utilisé comme par execute_select : les lignes sont alors des tuples.
+
+        :param dict_rows: si True les lignes sont des dictionnaires (équivalent de execute_DictSelect), header est ignoré.
+        :param parametres: valeurs des marqueurs ? de la requête.
+        :param delai: durée maximum d'exécution en secondes : au delà la requête est annulée sur le serveur (cursor.cancel)
+           et TimeoutError est levée. L'annulation de la tâche asyncio annule de même la requête.
+           L'attente d'une connexion libre du pool est comprise dans ce délai (clsPOOL.kATTENTE sans délai).
+        :return: comme execute_select, None en cas d'erreur de connexion ou SQL (consignée dans le log).
+        """
+        boucle = asyncio.get_running_loop()
+        requete = _RequeteAsync()
+        tache = boucle.run_in_executor(self._get_executeur_async(), self._select_isole, query, header, dict_rows,
+                                       parametres, delai, requete)
+        try:
+            return await asyncio.wait_for(tache, delai)
+        except asyncio.TimeoutError:
+            requete.annule()
+            self.log.ecrit_log(3,f"Query cancelled after {delai} s: {query}")
+            raise
+        except asyncio.CancelledError:
+            requete.annule()
+            self.log.ecrit_log(6,f"Query cancelled: {query}")
+            raise
+
+    async def gather_selects(self, requetes, header: bool = True, dict_rows: bool = False, delai: float = None):
+        """
+        Exécute simultanément des requêtes indépendantes (voir execute_select_async) : la durée totale est proche de celle
+        de la requête la plus longue au lieu de la somme des durées.
+
+        :param requetes: liste de requêtes, ou dictionnaire {nom: requête}. Une requête peut être un tuple (requête, paramètres).
+        :param delai: durée maximum d'exécution de chaque requête en secondes.
+        :return: liste des résultats dans l'ordre des requêtes, ou dictionnaire {nom: résultat}.
+           Le résultat d'une requête en erreur ou hors délai vaut None (l'erreur est consignée dans le log),
+           elle n'interrompt pas les autres. L'annulation de gather_selects annule toutes les requêtes en cours.
+        """
+        noms = list(requetes.keys()) if isinstance(requetes, dict) else None
+        liste = list(requetes.values()) if noms is not None else list(requetes)
+        taches = []
+        for requete in liste:
+            query, parametres = requete if isinstance(requete, tuple) else (requete, None)
+            taches.append(self.execute_select_async(query, header, dict_rows, parametres, delai))
+        resultats = await asyncio.gather(*taches, return_exceptions=True)
+        for position, resultat in enumerate(resultats):
+            if isinstance(resultat, asyncio.CancelledError):
+                raise resultat
+            if isinstance(resultat, Exception):
+                if not isinstance(resultat, asyncio.TimeoutError):
+                    self.log.ecrit_log(0,f"Error executing query: {resultat}")
+                resultats[position] = None
+        return dict(zip(noms, resultats)) if noms is not None else resultats
+
+    def execute_selects(self, requetes, header: bool = True, dict_rows: bool = False, delai: float = None):
+        """
+        Équivalent synchrone de gather_selects, pour un script qui n'utilise pas asyncio.
+        Ne peut pas être appelé depuis une boucle asyncio en cours (utiliser alors await gather_selects).
+        """
+        return asyncio.run(self.gather_selects(requetes, header, dict_rows, delai))
+
+    @classmethod
+    def _get_executeur_async(cls) -> ThreadPoolExecutor:
+        with cls._verrou_async:
+            if cls._executeur_async is None:
+                cls._executeur_async = ThreadPoolExecutor(max_workers=cls.kNB_ASYNC, thread_name_prefix="clsSQL_async")
+            return cls._executeur_async
+
+    def _select_isole(self, query: str, header: bool, dict_rows: bool, parametres: tuple, delai: float,
+                      requete: _RequeteAsync) -> list:
+        """
+        Exécutée dans un thread de l'exécuteur asynchrone : requête sur une connexion dédiée, rendue en fin d'exécution.
+        Le cache (active_cache) est consulté et alimenté comme par execute_select. L'attente d'une connexion libre du pool
+        est limitée à delai. Toute erreur (connexion, requête) est consignée dans le log et None est retourné.
+        """
+        if requete.annulee:
+            return None
+        if self.cache is not None:
+            cle = clsCACHE.cle(query, parametres, base=(self.server, self.database))
+            resultat = self.cache.lit(cle)
+            if resultat is not None:
+                return self._forme_resultat(list(resultat[0]), list(resultat[1]), header, dict_rows)
+        pool = connexion = cursor = None
+        try:
+            if self.utilise_pool:
+                pool = clsPOOL.get_pool(self.chaine_connexion, self.server, self.database, self.username)
+                connexion = pool.acquiert(delai)
+            else:
+                connexion = pyodbc.connect(self.chaine_connexion)
+            if delai is not None:
+                connexion.timeout = math.ceil(delai)    # délai également imposé par le pilote
+            cursor = connexion.cursor()
+            with requete.verrou:
+                if requete.annulee:
+                    return None
+                requete.curseur = cursor
+            cursor.execute(query, *(parametres or ()))
+            results = cursor.fetchall()
+            columns = [column[0] for column in cursor.description]
+            if self.cache is not None:
+                results = [tuple(ligne) for ligne in results]
+                self.cache.ecrit(cle, (tuple(columns), tuple(results)), clsCACHE.tables_lues(query),
+                                 clsCACHE.estime_octets(results))
+            self.log.ecrit_log(10,f"Query executed successfully ({len(results)} rows): {query}")
+            return self._forme_resultat(columns, results, header, dict_rows)
+        except Exception as e:
+            if requete.annulee:
+                return None
+            self.log.ecrit_log(0,f"Error executing query: {e}")
+            return None
+        finally:
+            if cursor is not None:
+                with requete.verrou:
+                    requete.curseur = None      # l'annulation ne doit plus viser ce curseur
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if connexion is not None:
+                if delai is not None:
+                    try:
+                        connexion.timeout = 0
+                    except Exception:
+                        pass
+                if pool is not None:
+                    pool.libere(connexion)
+                else:
+                    connexion.close()
+
+    @staticmethod
+    def _forme_resultat(columns: list, results: list, header: bool, dict_rows: bool) -> list:
+        if dict_rows:
+            return [dict(zip(columns, ligne)) for ligne in results]
+        if not results:
+            return []
+        return [columns] + results if header else results
+
     @property
     def EstConnecte(self) -> bool:
         """
         Propriété pour vérifier si la connexion est active.
         """
-        return self.__EstConnecte if hasattr(self, '__EstConnecte') else False
+        return self.__EstConnecte
     # La propriété n'a pas de setter par définition car elle ne peut être modifiée en dehors de la classe.
     
     def begin(self):
@@ -206,14 +631,19 @@ class Transaction:
         Dans le cas ou une grande quantité de code est exécutée, il est préférable de gérer les transactions
         manuellement en utilisant les méthodes begin, commit et rollback de la classe clsSQL.
         Nb : Le logger est inutilisable en l'état, il ne faut pas passer d'objet clsLOG du tout.
+        Si l'objet clsSQL n'est pas connecté, une connexion est empruntée (au pool) pour la durée de la transaction
+        et rendue en sortie de bloc.
     """
     def __init__(self, connexion, logger=None):
         self.connexion = connexion
         self.logger = logger or getattr(connexion, "logger", None)  # Fallback
+        self._emprunt = False
 
     def __enter__(self):
         if self.logger:
             self.logger.info("Début de transaction.")
+        if not self.connexion.EstConnecte:
+            self._emprunt = self.connexion.connect()
         self.connexion.begin()
         return self.connexion  # Optionnel mais pratique
 
@@ -228,3 +658,6 @@ class Transaction:
                     f"Erreur détectée, annulation de la transaction (rollback) : {exc_type.__name__} - {exc_val}"
                 )
             self.connexion.rollback()
+        if self._emprunt:
+            self.connexion.close()
+            self._emprunt = False
@@ -0,0 +1,146 @@
+from collections.abc import Mapping
+
+
+class clsLigne(Mapping):
+    """
+    Ligne d'une clsTable : vue légère sur un tuple de valeurs, accessible comme un dictionnaire par nom de colonne
+    (ligne["colonne"], get, keys, values, items, dict(ligne)) ou par position (ligne[0]).
+    L'entête et l'index des colonnes sont ceux de la table, ils ne sont pas dupliqués.
+    C'est un Mapping (collections.abc) : isinstance(ligne, Mapping) est vrai et l'itération retourne les colonnes.
+    """
+    __slots__ = ("colonnes", "_index", "valeurs")
+
+    def __init__(self, colonnes: tuple, index: dict, valeurs: tuple):
+        self.colonnes = colonnes
+        self._index = index
+        self.valeurs = valeurs
+
+    def __getitem__(self, cle):
+        if isinstance(cle, str):
+            return self.valeurs[self._index[cle]]
+        return self.valeurs[cle]
+
+    def get(self, cle, defaut=None):
+        position = self._index.get(cle)
+        return defaut if position is None else self.valeurs[position]
+
+    def keys(self):
+        return self.colonnes
+
+    def values(self):
+        return self.valeurs
+
+    def items(self):
+        return zip(self.colonnes, self.valeurs)
+
+    def __iter__(self):
+        return iter(self.colonnes)
+
+    def __len__(self):
+        return len(self.colonnes)
+
+    def __contains__(self, cle):
+        return cle in self._index
+
+    def __eq__(self, autre):
+        if isinstance(autre, clsLigne):
+            return self.colonnes == autre.colonnes and self.valeurs == autre.valeurs
+        if isinstance(autre, dict):
+            return self.en_dict() == autre
+        return NotImplemented
+
+    def __repr__(self):
+        return f"clsLigne({self.en_dict()!r})"
+
+    def en_dict(self) -> dict:
+        """
+        Conversion en dictionnaire, à la demande.
+        """
+        return dict(zip(self.colonnes, self.valeurs))
+
+
+class clsTable:
+    """
+    Conteneur compact de lignes : un entête unique partagé et une liste de tuples.
+    Remplace une liste de dictionnaires (etl_input, execute_DictSelect) sans répéter les clés
+    et la table de hachage de chaque ligne : la mémoire consommée est celle des valeurs.
+
+    L'itération retourne des clsLigne (accès par nom de colonne), la conversion en dictionnaires
+    n'est effectuée qu'à la demande (dicts, en_dicts).
+    La table est acceptée partout où une liste de dictionnaires l'est (etl_output, procédures ETL).
+    """
+    __slots__ = ("colonnes", "_index", "lignes")
+
+    def __init__(self, colonnes, lignes: list = None):
+        self.colonnes = tuple(colonnes)
+        self._index = {colonne: position for position, colonne in enumerate(self.colonnes)}
+        self.lignes: list[tuple] = [] if lignes is None else lignes
+
+    @classmethod
+    def depuis_dicts(cls, dictionnaires) -> "clsTable":
+        """
+        Construit une table depuis un itérable de dictionnaires, consommé à la demande.
+        Les colonnes sont celles du premier dictionnaire, une clé absente vaut None. Une clé absente des dictionnaires
+        précédents ajoute une colonne à la fin de l'entête (None pour les lignes précédentes) : aucune valeur n'est perdue.
+        """
+        table = None
+        for dictionnaire in dictionnaires:
+            if table is None:
+                table = cls(dictionnaire.keys())
+            elif dictionnaire.keys() != table._index.keys():
+                nouvelles = [colonne for colonne in dictionnaire if colonne not in table._index]
+                if nouvelles:
+                    table._ajoute_colonnes(nouvelles)
+            table.lignes.append(tuple(dictionnaire.get(colonne) for colonne in table.colonnes))
+        return cls(()) if table is None else table
+
+    def _ajoute_colonnes(self, colonnes: list):
+        # l'index est complété sur place : il est partagé avec les clsLigne déjà créées
+        for colonne in colonnes:
+            self._index[colonne] = len(self._index)
+        self.colonnes += tuple(colonnes)
+        complement = (None,) * len(colonnes)
+        self.lignes = [valeurs + complement for valeurs in self.lignes]
+
+    def ajoute(self, valeurs):
+        """
+        Ajoute une ligne, les valeurs sont dans l'ordre des colonnes.
+        """
+        self.lignes.append(tuple(valeurs))
+
+    def __len__(self):
+        return len(self.lignes)
+
+    def __iter__(self):
+        colonnes, index = self.colonnes, self._index
+        for valeurs in self.lignes:
+            yield clsLigne(colonnes, index, valeurs)
+
+    def __getitem__(self, position):
+        """
+        Ligne à une position (clsLigne), ou nouvelle table des lignes d'une tranche (table[10:20]).
+        """
+        if isinstance(position, slice):
+            return clsTable(self.colonnes, self.lignes[position])
+        return clsLigne(self.colonnes, self._index, self.lignes[position])
+
+    def colonne(self, nom: str) -> list:
+        """
+        Retourne les valeurs d'une colonne.
+        """
+        position = self._index[nom]
+        return [valeurs[position] for valeurs in self.lignes]
+
+    def dicts(self):
+        """
+        Générateur des lignes sous forme de dictionnaires.
+        """
+        colonnes = self.colonnes
+        for valeurs in self.lignes:
+            yield dict(zip(colonnes, valeurs))
+
+    def en_dicts(self) -> list[dict]:
+        """
+        Conversion complète en liste de dictionnaires (format historique).
+        """
+        return list(self.dicts())
@@ -0,0 +1,224 @@
+from datetime import date, datetime
+from decimal import Decimal
+from tools import Tools
+from clsTable import clsLigne
+
+
+def _en_int(valeur):
+    return None if valeur is None or valeur == "" else int(valeur)
+
+
+def _en_float(valeur):
+    return None if valeur is None or valeur == "" else float(valeur)
+
+
+def _en_decimal(valeur):
+    return None if valeur is None or valeur == "" else Decimal(valeur)
+
+
+def _en_str(valeur):
+    return None if valeur is None else str(valeur)
+
+
+def _en_bool(valeur):
+    if valeur is None or valeur == "":
+        return None
+    if isinstance(valeur, str):
+        return valeur.strip().lower() in ("1", "true", "vrai", "oui", "o", "y", "yes")
+    return bool(valeur)
+
+
+def _en_date(valeur):
+    if valeur is None or valeur == "":
+        return None
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    return date.fromisoformat(valeur)
+
+
+def _en_datetime(valeur):
+    if valeur is None or valeur == "":
+        return None
+    if isinstance(valeur, datetime):
+        return valeur
+    return datetime.fromisoformat(valeur)
+
+
+class clsTransformation:
+    """
+    Transformation déclarative des lignes de l'ETL, alternative à une procédure ETL pour les cas courants.
+    La spécification est un dictionnaire, les étapes sont appliquées dans l'ordre suivant :
+      - "filtre"     : fonction (ou liste de fonctions) ligne -> bool appliquée à la ligne source,
+                       la ligne est écartée si une fonction retourne False.
+      - "garde"      : liste des colonnes source conservées (toutes par défaut).
+      - "supprime"   : liste des colonnes source supprimées.
+      - "conversion" : {colonne source: type} où type est "int", "float", "decimal", "str", "bool", "date",
+                       "datetime" ou une fonction valeur -> valeur. Une valeur None ou "" donne None.
+      - "renomme"    : {colonne source: colonne cible}.
+      - "derive"     : {colonne cible: fonction ligne cible -> valeur}, calculées dans l'ordre sur la ligne déjà
+                       convertie et renommée (une dérivée peut donc utiliser les précédentes).
+
+    Exemple :
+    clsTransformation({
+        "filtre": lambda ligne: ligne["statut"] != "ANNULE",
+        "supprime": ["commentaire"],
+        "conversion": {"montant": "decimal", "date_cde": "date"},
+        "renomme": {"date_cde": "date_commande"},
+        "derive": {"annee": lambda ligne: ligne["date_commande"].year},
+    })
+
+    La spécification est compilée à la première ligne (les colonnes sont alors connues) :
+    le code Python d'une fonction spécialisée est généré, sans aucun aiguillage par ligne ni getattr.
+    Elle est recompilée si les colonnes d'une ligne changent (autre fichier, autre requête).
+    Une colonne de garde, supprime, conversion ou renomme absente de la ligne source lève KeyError.
+    applique accepte aussi des lignes sous forme de listes ou tuples précédées de leur entête (cas du résultat
+    de clsSQL.execute_select).
+    """
+    kTYPES = {
+        "int": _en_int,
+        "float": _en_float,
+        "decimal": _en_decimal,
+        "str": _en_str,
+        "bool": _en_bool,
+        "date": _en_date,
+        "datetime": _en_datetime,
+    }
+    kETAPES = ("filtre", "garde", "supprime", "conversion", "renomme", "derive")
+
+    def __init__(self, specification: dict):
+        inconnues = set(specification) - set(self.kETAPES)
+        if inconnues:
+            raise ValueError(f"Etapes de transformation inconnues : {', '.join(sorted(inconnues))}")
+        self.specification = specification
+        self.source: str = None     # code généré, pour la mise au point
+        self._ligne = None
+        self._lot = None
+        self._cles: frozenset = None        # colonnes des lignes pour lesquelles le code a été compilé
+        self._colonnes: tuple = None        # idem, entête des clsLigne
+
+        filtres = specification.get("filtre") or []
+        self._filtres = filtres if isinstance(filtres, (list, tuple)) else [filtres]
+        self._conversions = {}
+        for colonne, conversion in (specification.get("conversion") or {}).items():
+            if callable(conversion):
+                self._conversions[colonne] = conversion
+            elif conversion in self.kTYPES:
+                self._conversions[colonne] = self.kTYPES[conversion]
+            else:
+                raise ValueError(f"Type de conversion inconnu pour la colonne {colonne} : {conversion}")
+        self._derivees = dict(specification.get("derive") or {})
+
+    def transforme(self, ligne):
+        """
+        Transforme une ligne, retourne None si elle est écartée par le filtre.
+        """
+        if self._ligne is None or not self._meme_forme(ligne):
+            self._compile(ligne)
+        return self._ligne(ligne)
+
+    def transforme_lot(self, lignes: list) -> list:
+        """
+        Transforme un lot de lignes en un seul appel, les lignes écartées par le filtre sont absentes du résultat.
+        """
+        if not lignes:
+            return []
+        if self._lot is None or not self._meme_forme(lignes[0]):
+            self._compile(lignes[0])
+        meme_forme = self._meme_forme
+        if all(meme_forme(ligne) for ligne in lignes):
+            return self._lot(lignes)
+        # changement de colonnes dans le lot : chaque série de lignes homogènes est traitée avec son propre code
+        resultat = []
+        debut = 0
+        for position in range(1, len(lignes) + 1):
+            if position == len(lignes) or not meme_forme(lignes[position]):
+                resultat.extend(self._lot(lignes[debut:position]))
+                if position < len(lignes):
+                    self._compile(lignes[position])
+                debut = position
+        return resultat
+
+    def applique(self, lignes, taille_lot: int = 1000):
+        """
+        Générateur des lignes transformées d'un itérable, traité par lots de taille_lot lignes.
+        Des lignes listes ou tuples doivent avoir leur entête en première ligne, elles sont converties en dictionnaires.
+        """
+        for lot in Tools.par_lots(self._en_dicts(lignes), taille_lot):
+            yield from self.transforme_lot(lot)
+
+    @staticmethod
+    def _en_dicts(lignes):
+        iterateur = iter(lignes)
+        premiere = next(iterateur, None)
+        if premiere is None:
+            return
+        if hasattr(premiere, "keys"):
+            yield premiere
+            yield from iterateur
+            return
+        entete = list(premiere)
+        for ligne in iterateur:
+            yield dict(zip(entete, ligne))
+
+    def _meme_forme(self, ligne) -> bool:
+        if isinstance(ligne, clsLigne):
+            return ligne.colonnes == self._colonnes
+        return ligne.keys() == self._cles
+
+    def _compile(self, premiere_ligne):
+        source_colonnes = tuple(premiere_ligne.keys())
+        colonnes = list(self.specification.get("garde") or source_colonnes)
+        supprimees = set(self.specification.get("supprime") or [])
+        renommees = self.specification.get("renomme") or {}
+        inconnues = (set(colonnes) | supprimees | set(renommees) | set(self._conversions)) - set(source_colonnes)
+        if inconnues:
+            raise KeyError(f"Colonnes de transformation absentes de la ligne source : {', '.join(sorted(map(str, inconnues)))}")
+        espace = {}
+
+        conditions = []
+        for position, filtre in enumerate(self._filtres):
+            espace[f"_f{position}"] = filtre
+            conditions.append(f"_f{position}(ligne)")
+
+        elements = []
+        for position, colonne in enumerate(colonnes):
+            if colonne in supprimees:
+                continue
+            valeur = f"ligne[{colonne!r}]"
+            if colonne in self._conversions:
+                espace[f"_c{position}"] = self._conversions[colonne]
+                valeur = f"_c{position}({valeur})"
+            elements.append(f"{renommees.get(colonne, colonne)!r}: {valeur}")
+
+        corps = [f"r = {{{', '.join(elements)}}}"]
+        for position, (colonne, derivee) in enumerate(self._derivees.items()):
+            espace[f"_d{position}"] = derivee
+            corps.append(f"r[{colonne!r}] = _d{position}(r)")
+        condition = " and ".join(conditions)
+
+        source = ["def _ligne(ligne):"]
+        if condition:
+            source.append(f"    if not ({condition}):")
+            source.append("        return None")
+        source += [f"    {instruction}" for instruction in corps]
+        source.append("    return r")
+        source.append("")
+        source.append("def _lot(lignes):")
+        source.append("    resultat = []")
+        source.append("    ajoute = resultat.append")
+        source.append("    for ligne in lignes:")
+        if condition:
+            source.append(f"        if not ({condition}):")
+            source.append("            continue")
+        source += [f"        {instruction}" for instruction in corps]
+        source.append("        ajoute(r)")
+        source.append("    return resultat")
+
+        self.source = "\n".join(source)
+        exec(compile(self.source, "<clsTransformation>", "exec"), espace)
+        self._ligne = espace["_ligne"]
+        self._lot = espace["_lot"]
+        self._cles = frozenset(source_colonnes)
+        self._colonnes = source_colonnes if isinstance(premiere_ligne, clsLigne) else None
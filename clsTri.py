@@ -0,0 +1,263 @@
+import os
+import sys
+import heapq
+import pickle
+import tempfile
+from decimal import Decimal
+from itertools import groupby
+
+
+class clsTri:
+    """
+    Tri externe des lignes de l'ETL : les volumes supérieurs à la mémoire disponible sont triés dans un budget mémoire fixé.
+
+    Les lignes sont accumulées tant que leur volume (estimé) reste inférieur à memoire_max, chaque paquet est alors
+    trié et déversé dans un fichier temporaire (une « monotonie », sérialisée par pickle : les types sont conservés).
+    Les monotonies sont ensuite fusionnées (heapq.merge, fusion à k voies) et les lignes retournées en flux.
+    Si toutes les lignes tiennent dans le budget le tri est fait en mémoire, sans fichier.
+    Au delà de kFUSION_MAX monotonies, des fusions intermédiaires limitent le nombre de fichiers ouverts simultanément.
+
+      - cles : colonnes de tri, dans l'ordre. Une colonne peut être donnée avec une conversion, ("montant", float) :
+               les valeurs d'un CSV sont du texte et seraient sinon triées comme tel.
+      - decroissant : ordre décroissant sur l'ensemble des clés.
+    Les valeurs None sont placées après les autres (avant en ordre décroissant), le tri est stable.
+    Les lignes sont supposées homogènes (mêmes colonnes que la première), elles sont retournées sous forme de dictionnaires.
+    Le volume estimé d'une ligne comprend la clé calculée par sort(key=...) pour chaque ligne du paquet.
+    cle_ligne(ligne) retourne la clé de tri d'une ligne (dictionnaire), elle est disponible dès la première ligne lue.
+
+    Exemple d'utilisation :
+    tri = clsTri(["client", ("montant", float)], memoire_max=512 * 1024 * 1024)
+    etl.etl_output("c:/temp/trie.csv", tri.trie(etl.etl_input_iter("c:/temp/ventes.csv", "CSV")), "CSV")
+    """
+    # constants
+    kMEMOIRE_MAX = 256 * 1024 * 1024    # 256 Mo
+    kFUSION_MAX = 64                    # nombre maximum de monotonies fusionnées en une passe
+    kTAILLE_PAQUET = 1000               # lignes par écriture pickle dans une monotonie
+
+    def __init__(self, cles, decroissant: bool = False, memoire_max: int = None, repertoire: str = None):
+        cles = [cles] if isinstance(cles, (str, tuple)) else list(cles)
+        self.cles = [cle if isinstance(cle, tuple) else (cle, None) for cle in cles]
+        self.decroissant = decroissant
+        self.memoire_max = memoire_max or self.kMEMOIRE_MAX
+        self.repertoire = repertoire
+        self.colonnes: tuple = None
+        self.cle_ligne = None
+        self._volume_cle = 0
+        self.nb_lignes = 0
+        self.nb_monotonies = 0
+
+    @property
+    def bilan(self) -> dict:
+        return {"lignes": self.nb_lignes, "monotonies": self.nb_monotonies}
+
+    def trie(self, lignes):
+        """
+        Générateur des lignes triées d'un itérable, consommé à la demande.
+        """
+        self.nb_lignes = 0
+        self.nb_monotonies = 0
+        self.colonnes = None
+        tampon: list[tuple] = []
+        volume = 0
+        with tempfile.TemporaryDirectory(prefix="clsTri_", dir=self.repertoire) as repertoire:
+            monotonies: list[str] = []
+            for ligne in lignes:
+                if self.colonnes is None:
+                    self._prepare(ligne)
+                valeurs = tuple(ligne[colonne] for colonne in self.colonnes)
+                tampon.append(valeurs)
+                volume += sys.getsizeof(valeurs) + sum(sys.getsizeof(valeur) for valeur in valeurs) + self._volume_cle
+                self.nb_lignes += 1
+                if volume >= self.memoire_max:
+                    tampon.sort(key=self._cle, reverse=self.decroissant)
+                    monotonies.append(self._deverse(repertoire, tampon))
+                    tampon = []
+                    volume = 0
+            if self.colonnes is None:
+                return
+
+            tampon.sort(key=self._cle, reverse=self.decroissant)
+            if not monotonies:
+                flux = iter(tampon)
+            else:
+                if tampon:
+                    monotonies.append(self._deverse(repertoire, tampon))
+                    tampon = []
+                while len(monotonies) > self.kFUSION_MAX:
+                    # fusion intermédiaire des plus anciennes : l'ordre des monotonies (et donc la stabilité) est conservé
+                    premieres, monotonies = monotonies[:self.kFUSION_MAX], monotonies[self.kFUSION_MAX:]
+                    monotonies.insert(0, self._deverse(repertoire, self._fusionne(premieres)))
+                flux = self._fusionne(monotonies)
+
+            colonnes = self.colonnes
+            for valeurs in flux:
+                yield dict(zip(colonnes, valeurs))
+
+    def _prepare(self, premiere_ligne):
+        self.colonnes = tuple(premiere_ligne.keys())
+        index = {colonne: position for position, colonne in enumerate(self.colonnes)}
+        manquantes = [colonne for colonne, _ in self.cles if colonne not in index]
+        if manquantes:
+            raise KeyError(f"Colonnes de tri absentes : {', '.join(manquantes)}")
+        self._cle = self._fonction_cle([(index[colonne], conversion) for colonne, conversion in self.cles])
+        self.cle_ligne = self._fonction_cle(self.cles)
+        # clé conservée par sort pour chaque ligne : liste de couples (valeur is None, valeur), valeurs converties
+        nb_cles = len(self.cles)
+        self._volume_cle = sys.getsizeof([None] * nb_cles) + nb_cles * sys.getsizeof((False, None)) + \
+            sum(sys.getsizeof(0.0) for _, conversion in self.cles if conversion is not None)
+
+    @staticmethod
+    def _fonction_cle(cles: list):
+        """
+        Fonction de clé de tri : cles est la liste des (accès, conversion), l'accès étant la position de la colonne
+        dans le tuple des valeurs ou son nom dans le dictionnaire de la ligne.
+        """
+        def cle(valeurs):
+            resultat = []
+            for acces, conversion in cles:
+                valeur = valeurs[acces]
+                if conversion is not None:
+                    valeur = None if valeur is None or valeur == "" else conversion(valeur)
+                resultat.append((valeur is None, valeur))
+            return resultat
+        return cle
+
+    def _deverse(self, repertoire: str, valeurs) -> str:
+        """
+        Écrit une monotonie (lignes déjà triées) dans un fichier temporaire, par paquets de kTAILLE_PAQUET lignes.
+        """
+        descripteur, chemin = tempfile.mkstemp(suffix=".tri", dir=repertoire)
+        with os.fdopen(descripteur, "wb") as f:
+            paquet = []
+            for ligne in valeurs:
+                paquet.append(ligne)
+                if len(paquet) >= self.kTAILLE_PAQUET:
+                    pickle.dump(paquet, f, pickle.HIGHEST_PROTOCOL)
+                    paquet = []
+            if paquet:
+                pickle.dump(paquet, f, pickle.HIGHEST_PROTOCOL)
+        self.nb_monotonies += 1
+        return chemin
+
+    @staticmethod
+    def _lit_monotonie(chemin: str):
+        try:
+            with open(chemin, "rb") as f:
+                while True:
+                    try:
+                        paquet = pickle.load(f)
+                    except EOFError:
+                        break
+                    yield from paquet
+        finally:
+            os.remove(chemin)
+
+    def _fusionne(self, monotonies: list[str]):
+        return heapq.merge(*(self._lit_monotonie(chemin) for chemin in monotonies), key=self._cle, reverse=self.decroissant)
+
+
+class clsRegroupement:
+    """
+    Regroupement (GROUP BY) et agrégation des lignes de l'ETL, dans un budget mémoire fixé.
+    Les lignes sont triées sur les clés de regroupement par clsTri (tri externe) puis agrégées en une passe :
+    seuls les agrégats du groupe courant sont en mémoire.
+
+      - cles : colonnes de regroupement (éventuellement avec conversion, voir clsTri).
+      - agregats : {colonne cible: (fonction, colonne source)} où fonction est "nombre", "somme", "moyenne", "min", "max",
+                   "premier" ou "dernier". Pour "nombre" la colonne source peut être None (nombre de lignes du groupe).
+    Comme en SQL les valeurs None (et "") sont ignorées par les agrégats. "somme" et "moyenne" convertissent le texte
+    en nombre (valeurs d'un CSV), les Decimal retournés par pyodbc sont conservés.
+    "min" et "max" comparent de même les textes numériques comme des nombres ("9" < "10") et retournent la valeur
+    d'origine. Si une valeur du groupe n'est pas numérique, tout le groupe est comparé comme du texte.
+    Les groupes sont retournés dans l'ordre des clés, sous forme de dictionnaires {clés..., agrégats...}.
+
+    Exemple d'utilisation :
+    regroupement = clsRegroupement("client", {"ca": ("somme", "montant"), "commandes": ("nombre", None)})
+    etl.etl_output("c:/temp/ca.csv", regroupement.regroupe(etl.etl_input_iter("c:/temp/ventes.csv", "CSV")), "CSV")
+    """
+    kFONCTIONS = ("nombre", "somme", "moyenne", "min", "max", "premier", "dernier")
+
+    def __init__(self, cles, agregats: dict, memoire_max: int = None, repertoire: str = None):
+        for cible, (fonction, _) in agregats.items():
+            if fonction not in self.kFONCTIONS:
+                raise ValueError(f"Fonction d'agrégation inconnue pour {cible} : {fonction}")
+        self.tri = clsTri(cles, memoire_max=memoire_max, repertoire=repertoire)
+        self.noms_cles = [colonne for colonne, _ in self.tri.cles]
+        self.agregats = agregats
+        self.nb_groupes = 0
+
+    def regroupe(self, lignes):
+        """
+        Générateur des groupes agrégés d'un itérable, consommé à la demande.
+        """
+        self.nb_groupes = 0
+        noms_cles = self.noms_cles
+        # la fonction de clé n'existe qu'une fois la première ligne lue par le tri : elle est résolue à chaque appel
+        for _, groupe in groupby(self.tri.trie(lignes), key=lambda ligne: self.tri.cle_ligne(ligne)):
+            # [nombre de valeurs, valeur agrégée] complété pour min / max de [clé numérique, valeur texte, numérique]
+            etats = {cible: [0, None, None, None, True] for cible in self.agregats}
+            premiere = None
+            for ligne in groupe:
+                if premiere is None:
+                    premiere = ligne
+                for cible, (fonction, source) in self.agregats.items():
+                    self._accumule(etats[cible], fonction, None if source is None else ligne[source], source is None)
+            resultat = {colonne: premiere[colonne] for colonne in noms_cles}
+            for cible, (fonction, _) in self.agregats.items():
+                nombre, valeur, _, texte, numerique = etats[cible]
+                if fonction == "nombre":
+                    valeur = nombre
+                elif fonction == "moyenne":
+                    valeur = valeur / nombre if nombre else None
+                elif fonction in ("min", "max") and not numerique:
+                    valeur = texte
+                resultat[cible] = valeur
+            self.nb_groupes += 1
+            yield resultat
+
+    @staticmethod
+    def _accumule(etat: list, fonction: str, valeur, toutes: bool):
+        if toutes:
+            etat[0] += 1
+            return
+        if valeur is None or valeur == "":
+            return
+        etat[0] += 1
+        match fonction:
+            case "somme" | "moyenne":
+                if isinstance(valeur, str):
+                    valeur = float(valeur)
+                if etat[1] is None:
+                    etat[1] = valeur
+                elif isinstance(etat[1], Decimal) != isinstance(valeur, Decimal):
+                    etat[1] = float(etat[1]) + float(valeur)
+                else:
+                    etat[1] += valeur
+            case "min" | "max":
+                nombre = clsRegroupement._nombre(valeur)
+                if nombre is None:
+                    etat[4] = False
+                elif etat[1] is None or (nombre < etat[2] if fonction == "min" else nombre > etat[2]):
+                    etat[1], etat[2] = valeur, nombre
+                # comparaison du texte, retenue si une valeur du groupe n'est pas numérique
+                texte = valeur if isinstance(valeur, str) else str(valeur)
+                if etat[3] is None or (texte < str(etat[3]) if fonction == "min" else texte > str(etat[3])):
+                    etat[3] = valeur
+            case "premier":
+                if etat[0] == 1:
+                    etat[1] = valeur
+            case "dernier":
+                etat[1] = valeur
+
+    @staticmethod
+    def _nombre(valeur):
+        """
+        Valeur comparable de min / max : le texte est converti en nombre comme pour somme, None s'il n'est pas numérique.
+        Les autres types (nombres, Decimal, dates) sont comparés tels quels.
+        """
+        if not isinstance(valeur, str):
+            return valeur
+        try:
+            return float(valeur)
+        except ValueError:
+            return None
@@ -0,0 +1,137 @@
+import os
+import sys
+import types
+import sqlite3
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+
+class _Curseur:
+    """
+    Curseur pyodbc simulé sur sqlite3 : execute(query, *parametres) comme pyodbc, cancel interrompt la requête.
+    """
+    def __init__(self, connexion):
+        self._connexion = connexion
+        self._curseur = connexion._base.cursor()
+        self.arraysize = 1
+        self.fast_executemany = False
+
+    @property
+    def description(self):
+        return self._curseur.description
+
+    def execute(self, query, *parametres):
+        if len(parametres) == 1 and isinstance(parametres[0], (list, tuple)):
+            parametres = parametres[0]
+        self._curseur.execute(query, parametres)
+        return self
+
+    def executemany(self, query, lignes):
+        self._curseur.executemany(query, lignes)
+
+    def fetchall(self):
+        return self._curseur.fetchall()
+
+    def fetchmany(self, taille):
+        return self._curseur.fetchmany(taille)
+
+    def cancel(self):
+        self._connexion._base.interrupt()
+
+    def close(self):
+        self._curseur.close()
+
+
+class _Connexion:
+    def __init__(self, chemin):
+        self._base = sqlite3.connect(chemin, check_same_thread=False)
+        self.timeout = 0
+        self.autocommit = False
+        self.fermee = False
+
+    def cursor(self):
+        return _Curseur(self)
+
+    def execute(self, query, *parametres):
+        return self.cursor().execute(query, *parametres)
+
+    def commit(self):
+        self._base.commit()
+
+    def rollback(self):
+        self._base.rollback()
+
+    def close(self):
+        self.fermee = True
+        self._base.close()
+
+
+def _fabrique_pyodbc():
+    module = types.ModuleType("pyodbc")
+    module.Error = sqlite3.Error
+    module.base = ":memory:"
+    module.connexions = []
+
+    def connect(chaine_connexion, *args, **kwargs):
+        connexion = _Connexion(module.base)
+        module.connexions.append(connexion)
+        return connexion
+    module.connect = connect
+    return module
+
+
+# pilote ODBC simulé : clsSQL et clsPOOL l'importent au chargement, il doit être en place avant eux
+pyodbc = _fabrique_pyodbc()
+sys.modules["pyodbc"] = pyodbc
+
+
+@pytest.fixture(autouse=True)
+def repertoire_de_travail(tmp_path, monkeypatch):
+    """
+    Chaque test s'exécute dans un répertoire temporaire : config.ini et les logs de clsLOG y sont créés.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def base(tmp_path):
+    """
+    Base sqlite servie par le pyodbc simulé, les pools sont fermés en fin de test.
+    """
+    from clsPOOL import clsPOOL
+    pyodbc.base = str(tmp_path / "base.sqlite")
+    pyodbc.connexions.clear()
+    yield pyodbc
+    clsPOOL.ferme_pools()
+    pyodbc.base = ":memory:"
+
+
+@pytest.fixture
+def tables_sql() -> dict:
+    """
+    Tables créées par la fixture sql : {table: (colonnes, lignes)}. Redéfinie par les modules de test
+    ou paramétrée par test (pytest.mark.parametrize("tables_sql", ...)).
+    """
+    return {}
+
+
+@pytest.fixture
+def sql(base, tables_sql):
+    """
+    clsSQL connecté hors pool à la base sqlite de test, les tables de tables_sql y sont créées et alimentées.
+    """
+    from clsSQL import clsSQL
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "", utilise_pool=False)
+    assert sql.connect()
+    for table, (colonnes, lignes) in tables_sql.items():
+        sql.connection.execute(f"CREATE TABLE {table} ({colonnes})")
+        if lignes:
+            sql.connection.cursor().executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(lignes[0]))})",
+                                                lignes)
+    sql.connection.commit()
+    yield sql
+    sql.close()
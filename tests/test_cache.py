@@ -0,0 +1,133 @@
+import pytest
+
+from clsCACHE import clsCACHE
+from clsSQL import clsSQL
+from tools import Tools
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    temps = [1000.0]
+    monkeypatch.setattr(Tools, "get_current_time", staticmethod(lambda: temps[0]))
+    return temps
+
+
+def test_lru_taille_max():
+    cache = clsCACHE(taille_max=2)
+    cache.ecrit("a", [1])
+    cache.ecrit("b", [2])
+    assert cache.lit("a") == [1]        # a devient la plus récente
+    cache.ecrit("c", [3])
+    assert cache.lit("b") is None
+    assert cache.lit("a") == [1] and cache.lit("c") == [3]
+    assert cache.statistiques["evictions"] == 1
+
+
+def test_octets_max():
+    cache = clsCACHE(octets_max=100)
+    cache.ecrit("a", [1], octets=60)
+    cache.ecrit("b", [2], octets=60)
+    assert cache.lit("a") is None and cache.lit("b") == [2]
+    cache.ecrit("c", [3], octets=101)
+    assert cache.lit("c") is None
+    assert cache.statistiques["octets"] == 60
+
+
+def test_expiration(horloge):
+    cache = clsCACHE(duree=10)
+    cache.ecrit("a", [1])
+    horloge[0] += 9.9
+    assert cache.lit("a") == [1]
+    horloge[0] += 0.1
+    assert cache.lit("a") is None
+    assert cache.statistiques == {"succes": 1, "echecs": 1, "taux_succes": 0.5, "evictions": 0, "expirations": 1,
+                                  "entrees": 0, "octets": 0}
+
+
+def test_cle_normalisee_par_base():
+    assert clsCACHE.cle("SELECT  *\n FROM t", (1,)) == clsCACHE.cle("SELECT * FROM t", [1])
+    assert clsCACHE.cle("SELECT 1", base=("s1", "b")) != clsCACHE.cle("SELECT 1", base=("s2", "b"))
+    assert clsCACHE.cle("SELECT 1") != clsCACHE.cle("SELECT 1", nature="TABLE")
+
+
+@pytest.mark.parametrize("query, tables", [
+    ("SELECT * FROM [dbo].[Devises] d JOIN Sites AS s ON s.id = d.site", {"devises", "sites"}),
+    ("SELECT * FROM Devises, dbo.Sites s, Pays WHERE 1 = 1", {"devises", "sites", "pays"}),
+    ("SELECT * FROM Devises d WITH (NOLOCK), Sites", {"devises", "sites"}),
+    ("SELECT * FROM Devises LEFT OUTER JOIN Sites ON 1 = 1", {"devises", "sites"}),
+    ("SELECT * FROM (SELECT * FROM Devises) x", {clsCACHE.kTOUTES, "devises"}),
+    ("SELECT * FROM dbo.Fonction(1) f, Sites", {clsCACHE.kTOUTES}),
+])
+def test_tables_lues(query, tables):
+    assert clsCACHE.tables_lues(query) == tables
+
+
+@pytest.mark.parametrize("query, table", [
+    ("INSERT INTO [dbo].[Devises] VALUES (1)", "devises"),
+    ("UPDATE Devises SET taux = 1", "devises"),
+    ("DELETE FROM Devises WHERE 1 = 1", "devises"),
+    ("TRUNCATE TABLE dbo.Devises", "devises"),
+    ("UPDATE d SET taux = 1 FROM Devises d", None),
+    ("DELETE d FROM Devises d JOIN Sites s ON 1 = 1", None),
+    ("EXEC procedure", None),
+])
+def test_table_modifiee(query, table):
+    assert clsCACHE.table_modifiee(query) == table
+
+
+def test_invalidation_par_table():
+    cache = clsCACHE()
+    cache.ecrit("devises", [1], clsCACHE.tables_lues("SELECT * FROM Devises"))
+    cache.ecrit("sites", [2], clsCACHE.tables_lues("SELECT * FROM Sites, Pays"))
+    cache.ecrit("sous_requete", [3], clsCACHE.tables_lues("SELECT * FROM (SELECT 1 AS x) t"))
+    assert cache.invalide("[dbo].[Pays]") == 2
+    assert cache.lit("sites") is None and cache.lit("sous_requete") is None
+    assert cache.lit("devises") == [1]
+
+
+@pytest.fixture
+def tables_sql():
+    return {"Devises": ("code TEXT, taux REAL", [("EUR", 1.0)])}
+
+
+@pytest.fixture
+def sql(sql):
+    sql.active_cache()
+    return sql
+
+
+def test_cache_clsSQL(sql):
+    premier = sql.execute_select("SELECT code, taux FROM Devises")
+    assert premier == [["code", "taux"], ("EUR", 1.0)]
+    premier[1:] = []
+    assert sql.execute_select("SELECT code,   taux FROM Devises") == [["code", "taux"], ("EUR", 1.0)]
+    assert sql.execute_DictSelect("SELECT code, taux FROM Devises") == [{"code": "EUR", "taux": 1.0}]
+    assert sql.cache.statistiques["succes"] == 2
+
+    assert sql.Execute_Insert("INSERT INTO Devises VALUES ('USD', 0.9)")
+    assert len(sql.execute_select("SELECT code, taux FROM Devises", header=False)) == 2
+    assert sql.execute_TableSelect("SELECT code FROM Devises").lignes == [("EUR",), ("USD",)]
+    assert sql.execute_TableSelect("SELECT code FROM Devises").lignes == [("EUR",), ("USD",)]
+
+
+def test_cache_partage_entre_bases(sql):
+    autre = clsSQL("serveur", "autre base", "utilisateur", "mot de passe", "", utilise_pool=False)
+    assert autre.connect()
+    autre.active_cache(cache=sql.cache)
+    sql.execute_select("SELECT code FROM Devises")
+    autre.execute_select("SELECT code FROM Devises")
+    assert sql.cache.statistiques["entrees"] == 2
+    autre.close()
+
+
+def test_modification_non_reconnue_vide_le_cache(sql):
+    sql.execute_select("SELECT code FROM Devises")
+    assert sql.Execute_Update("UPDATE Devises SET taux = 2 FROM (SELECT 1 AS x) AS s")
+    assert sql.cache.statistiques["entrees"] == 0
+
+
+def test_cle_conserve_les_litteraux():
+    assert clsCACHE.cle("SELECT * FROM t WHERE nom = 'a  b'") != clsCACHE.cle("SELECT * FROM t WHERE nom = 'a b'")
+    assert clsCACHE.cle("SELECT * FROM t WHERE nom = N'l''a  b'\n") == clsCACHE.cle("SELECT *  FROM t WHERE nom = N'l''a  b'")
+    assert clsCACHE.cle('SELECT [a  b], "c  d" FROM t') != clsCACHE.cle('SELECT [a b], "c d" FROM t')
+    assert clsCACHE.cle("SELECT ''  ,\t'' FROM t") == clsCACHE.cle("SELECT '' , '' FROM t")
@@ -0,0 +1,39 @@
+import pytest
+
+from clsETL import clsETL
+from tools import Tools
+
+
+LIGNES = [{"id": str(i), "texte": f"ligne {i} é"} for i in range(100)]
+
+
+@pytest.mark.parametrize("extension, compression", [(".gz", "gzip"), (".bz2", "bz2"), (".xz", "xz")])
+@pytest.mark.parametrize("type_etl", ["CSV", "JSON", "XML", "NDJSON"])
+def test_aller_retour_compresse(tmp_path, extension, compression, type_etl):
+    fichier = str(tmp_path / f"donnees.{type_etl.lower()}{extension}")
+    clsETL().etl_output(fichier, LIGNES, type_etl)
+    assert Tools.detecte_compression(fichier) == compression
+    assert clsETL().etl_input(fichier, type_etl) == LIGNES
+
+
+def test_detection_par_signature(tmp_path):
+    # la signature du fichier fait foi en lecture, quelle que soit son extension
+    fichier = str(tmp_path / "donnees.csv.gz")
+    clsETL().etl_output(fichier, LIGNES, "CSV")
+    renomme = tmp_path / "donnees.csv"
+    (tmp_path / "donnees.csv.gz").rename(renomme)
+    assert Tools.detecte_compression(str(renomme)) == "gzip"
+    assert clsETL().etl_input(str(renomme), "CSV") == LIGNES
+    assert Tools.detecte_compression(str(renomme), lecture=False) is None
+
+
+def test_plages_refusees_sur_fichier_compresse(tmp_path):
+    fichier = str(tmp_path / "donnees.ndjson.gz")
+    clsETL().etl_output(fichier, LIGNES, "NDJSON")
+    with pytest.raises(ValueError):
+        Tools.plages_fichier(fichier, 100)
+
+
+def test_compression_inconnue(tmp_path):
+    with pytest.raises(ValueError):
+        Tools.ouvre_flux(str(tmp_path / "f.txt"), "w", "zip")
@@ -0,0 +1,45 @@
+import os
+import pytest
+
+from clsETL import clsETL
+
+
+def ecrit_sources(repertoire, nombre: int = 3):
+    repertoire.mkdir()
+    for numero in range(nombre):
+        (repertoire / f"f{numero}.csv").write_text("id;nom\n" + "".join(f"{i};n{i}\n" for i in range(numero + 1)),
+                                                   encoding="utf-8")
+
+
+@pytest.mark.parametrize("processus", [False, True])
+def test_conversion_repertoire(tmp_path, processus):
+    ecrit_sources(tmp_path / "source")
+    (tmp_path / "source" / "mauvais.csv").write_bytes(b"id;nom\n\xff\xfe;x\n")
+    resultats = clsETL().etl_convertit_repertoire(str(tmp_path / "source"), "CSV", str(tmp_path / "cible"), "JSON",
+                                                  type_fichier=".csv", nb_travailleurs=2, processus=processus,
+                                                  compression_cible="gzip")
+    par_nom = {os.path.basename(resultat["fichier_source"]): resultat for resultat in resultats}
+    for numero in range(3):
+        resultat = par_nom[f"f{numero}.csv"]
+        assert resultat["erreur"] is None and resultat["lignes"] == numero + 1
+        assert resultat["fichier_cible"].endswith(f"f{numero}.json.gz")
+        assert len(clsETL().etl_input(resultat["fichier_cible"], "JSON")) == numero + 1
+    # un fichier en erreur n'interrompt pas le lot et ne laisse pas de fichier cible
+    assert par_nom["mauvais.csv"]["erreur"] is not None
+    assert not os.path.exists(par_nom["mauvais.csv"]["fichier_cible"])
+    assert len(os.listdir(tmp_path / "cible")) == 3
+
+
+def test_cibles_en_double(tmp_path):
+    ecrit_sources(tmp_path / "source", 1)
+    (tmp_path / "source" / "f0.json").write_text('[{"id": 1}]', encoding="utf-8")
+    with pytest.raises(ValueError):
+        clsETL().etl_convertit_repertoire(str(tmp_path / "source"), "CSV", str(tmp_path / "cible"), "XML")
+    assert os.listdir(tmp_path / "cible") == []
+
+
+def test_source_remplacee(tmp_path):
+    ecrit_sources(tmp_path / "source", 2)
+    with pytest.raises(ValueError):
+        clsETL().etl_convertit_repertoire(str(tmp_path / "source"), "CSV", str(tmp_path / "source"), "CSV")
+    assert sorted(os.listdir(tmp_path / "source")) == ["f0.csv", "f1.csv"]
@@ -0,0 +1,73 @@
+import io
+import json
+import pytest
+
+from clsETL import clsETL
+
+
+def lit_json(texte: str, taille_bloc: int) -> list:
+    etl = clsETL()
+    etl.file_name = "test.json"
+    return list(etl._lit_tableau_json(io.StringIO(texte), taille_bloc))
+
+
+@pytest.mark.parametrize("taille_bloc", [1, 2, 3, 7, 64, 65536])
+def test_tableau_json_par_blocs(taille_bloc):
+    lignes = [{"id": i, "montant": i + 0.5, "libelle": f"ligne {i}", "liste": [i, {"x": None}]} for i in range(50)]
+    lignes.append({"texte": "virgule, crochet ] et accolade }", "echappe": "\"\\n"})
+    assert lit_json(json.dumps(lignes, indent=1), taille_bloc) == lignes
+
+
+@pytest.mark.parametrize("taille_bloc", [1, 2, 3, 4, 5])
+def test_nombres_coupes_en_fin_de_bloc(taille_bloc):
+    # "3." ou "12" décodés sur un tampon coupé ne doivent pas être validés
+    assert lit_json("[3.5, 1234567, -2e10, 12.25e-3, true, null]", taille_bloc) == \
+        [3.5, 1234567, -2e10, 12.25e-3, True, None]
+
+
+class FluxCompte(io.StringIO):
+    # relève la taille des lectures demandées par l'analyseur
+    def __init__(self, texte: str):
+        super().__init__(texte)
+        self.tailles = []
+
+    def read(self, taille=-1):
+        self.tailles.append(taille)
+        return super().read(taille)
+
+
+@pytest.mark.parametrize("espaces", [" " * 100, "\n" * 5000, " \t\r\n" * 3000], ids=["espaces", "lignes", "melange"])
+def test_longues_suites_d_espaces_en_memoire_bornee(espaces):
+    lignes = [{"id": i, "valeur": 1.5 * i} for i in range(20)]
+    texte = "[" + espaces + ("," + espaces).join(json.dumps(ligne) + espaces for ligne in lignes) + "]"
+    etl = clsETL()
+    etl.file_name = "test.json"
+    flux = FluxCompte(texte)
+    assert list(etl._lit_tableau_json(flux, 64)) == lignes
+    # le tampon n'est jamais agrandi : chaque lecture reste d'un bloc
+    assert max(flux.tailles) == 64
+
+
+def test_tableau_vide_et_document_unique():
+    assert lit_json("  [ ]  ", 1) == []
+    assert lit_json("", 4) == []
+    assert lit_json('{"a": 1}', 2) == [{"a": 1}]
+
+
+@pytest.mark.parametrize("texte", ['[{"a": 1}, {"a": 2}', '[{"a": 1},', '[{"a": 1} {"a": 2}]', '[{"a": 1}, {"a": ]'])
+def test_tableau_incomplet_ou_mal_forme(texte):
+    with pytest.raises(ValueError):
+        lit_json(texte, 3)
+
+
+def test_etl_input_iter_json_et_csv(tmp_path):
+    lignes = [{"id": str(i), "nom": f"nom {i}"} for i in range(10)]
+    fichier_json = tmp_path / "lignes.json"
+    fichier_json.write_text(json.dumps(lignes), encoding="utf-8")
+    assert list(clsETL().etl_input_iter(str(fichier_json), "JSON")) == lignes
+
+    fichier_csv = tmp_path / "lignes.csv"
+    clsETL().etl_output(str(fichier_csv), lignes, "CSV")
+    assert list(clsETL().etl_input_iter(str(fichier_csv), "CSV")) == lignes
+    lots = list(clsETL().etl_input_iter(str(fichier_csv), "CSV", taille_lot=4))
+    assert [len(lot) for lot in lots] == [4, 4, 2]
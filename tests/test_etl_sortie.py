@@ -0,0 +1,88 @@
+import os
+import pytest
+
+from clsETL import clsETL
+from clsETLSortie import clsETLSortie
+
+
+LIGNES = [{"id": i, "nom": f"nom {i}"} for i in range(5)]
+
+
+class Interruption(Exception):
+    pass
+
+
+def lignes_interrompues(nombre: int):
+    for ligne in LIGNES[:nombre]:
+        yield ligne
+    raise Interruption()
+
+
+@pytest.mark.parametrize("type_etl, nom", [("CSV", "sortie.csv"), ("JSON", "sortie.json"), ("XML", "sortie.xml"),
+                                            ("NDJSON", "sortie.ndjson"), ("CSV", "sortie.csv.gz")])
+def test_ecriture_puis_relecture(tmp_path, type_etl, nom):
+    fichier = str(tmp_path / nom)
+    with clsETLSortie(fichier, type_etl, taille_tampon=10) as sortie:
+        sortie.ecrit_lignes(LIGNES)
+    assert sortie.bilan["lignes"] == len(LIGNES)
+    assert os.listdir(tmp_path).count(nom) == 1
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+    relues = clsETL().etl_input(fichier, type_etl)
+    assert [str(ligne["id"]) for ligne in relues] == [str(ligne["id"]) for ligne in LIGNES]
+
+
+def test_erreur_conserve_le_fichier_existant(tmp_path):
+    fichier = tmp_path / "sortie.json"
+    fichier.write_text("ancien contenu", encoding="utf-8")
+    with pytest.raises(Interruption):
+        with clsETLSortie(str(fichier), "JSON", taille_tampon=1) as sortie:
+            sortie.ecrit_lignes(lignes_interrompues(3))
+    assert fichier.read_text(encoding="utf-8") == "ancien contenu"
+    assert os.listdir(tmp_path) == ["sortie.json"]
+
+
+def test_erreur_etl_output_sans_fichier_partiel(tmp_path):
+    fichier = tmp_path / "sortie.csv"
+    with pytest.raises(Interruption):
+        clsETL().etl_output(str(fichier), lignes_interrompues(3), "CSV", taille_tampon=1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_ajout_ramene_a_la_taille_initiale(tmp_path):
+    fichier = str(tmp_path / "sortie.csv")
+    with clsETLSortie(fichier, "CSV", ajout=True) as sortie:
+        sortie.ecrit_lignes(LIGNES[:2])
+    contenu = open(fichier, encoding="utf-8").read()
+    with pytest.raises(Interruption):
+        with clsETLSortie(fichier, "CSV", ajout=True, taille_tampon=1) as sortie:
+            sortie.ecrit_lignes(lignes_interrompues(4))
+    assert open(fichier, encoding="utf-8").read() == contenu
+
+    with clsETLSortie(fichier, "CSV", ajout=True) as sortie:
+        sortie.ecrit_lignes(LIGNES[2:])
+    assert [ligne["id"] for ligne in clsETL().etl_input(fichier, "CSV")] == [str(ligne["id"]) for ligne in LIGNES]
+
+
+def test_ajout_erreur_sur_fichier_inexistant(tmp_path):
+    fichier = tmp_path / "sortie.ndjson"
+    with pytest.raises(Interruption):
+        with clsETLSortie(str(fichier), "NDJSON", ajout=True, taille_tampon=1) as sortie:
+            sortie.ecrit_lignes(lignes_interrompues(2))
+    assert not fichier.exists()
+
+
+def test_ajout_refuse_pour_json():
+    with pytest.raises(ValueError):
+        clsETLSortie("sortie.json", "JSON", ajout=True)
+
+
+@pytest.mark.parametrize("type_etl", ["CSV", "XML"])
+def test_cle_absente_de_l_entete(tmp_path, type_etl):
+    fichier = tmp_path / f"sortie.{type_etl.lower()}"
+    with pytest.raises(ValueError, match="total"):
+        clsETL().etl_output(str(fichier), [{"id": 1}, {"id": 2, "total": 3}], type_etl)
+    assert os.listdir(tmp_path) == []
+    # une colonne manquante est écrite vide, l'ordre des clés est indifférent
+    clsETL().etl_output(str(fichier), [{"id": 1, "nom": "a"}, {"nom": "b"}, {"nom": "c", "id": 3}], type_etl)
+    assert clsETL().etl_input(str(fichier), type_etl) == [{"id": "1", "nom": "a"}, {"id": "", "nom": "b"},
+                                                          {"id": "3", "nom": "c"}]
@@ -0,0 +1,36 @@
+import configparser
+import os
+
+from clsINIT import clsINIT
+
+
+def modifie_ini(chemin: str, section: str, option: str, valeur: str):
+    config = configparser.ConfigParser()
+    config.read(chemin)
+    config.set(section, option, valeur)
+    with open(chemin, "w") as f:
+        config.write(f)
+    # date de modification franchement différente, quelle que soit la résolution du système de fichiers
+    stat = os.stat(chemin)
+    os.utime(chemin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+
+
+def test_rechargement_sur_modification(monkeypatch):
+    init = clsINIT("config.ini")
+    assert init.log_level == 10
+    snapshot = init.snapshot
+    modifie_ini("config.ini", "LOG", "NIVEAU", "3")
+    # dans le délai de contrôle la photographie est conservée
+    assert init.snapshot is snapshot
+    monkeypatch.setattr(clsINIT, "kDELAI_CONTROLE", 0)
+    init._prochain_controle = 0.0
+    assert init.log_level == 3
+    # sans nouvelle modification la photographie n'est pas reconstruite
+    assert init.snapshot is init.snapshot
+
+
+def test_mot_de_passe_absent_de_repr():
+    modifie_ini(clsINIT("config.ini").config_file, "LOG", "PW", "secret")
+    snapshot = clsINIT("config.ini").snapshot
+    assert snapshot.log_pw == "secret"
+    assert "secret" not in repr(snapshot) and "log_pw" not in repr(snapshot)
@@ -0,0 +1,66 @@
+import pytest
+
+from clsJointure import clsJointure
+
+
+REFERENCE = [{"code": "EUR", "taux": 1.0}, {"code": "USD", "taux": 0.9}, {"code": "USD", "taux": 0.91},
+             {"code": None, "taux": 0.0}]
+VENTES = [{"id": 1, "devise": "EUR"}, {"id": 2, "devise": "USD"}, {"id": 3, "devise": "GBP"}, {"id": 4, "devise": None}]
+
+
+def test_jointure_left():
+    jointure = clsJointure("devise", reference=REFERENCE, cles_reference="code", defauts={"taux": 1.5})
+    resultat = list(jointure.applique(VENTES))
+    assert [(ligne["id"], ligne["taux"]) for ligne in resultat] == [(1, 1.0), (2, 0.9), (2, 0.91), (3, 1.5), (4, 1.5)]
+    assert jointure.bilan == {"references": 2, "trouvees": 2, "absentes": 2, "rejets": 0}
+
+
+def test_jointure_inner_et_prefixe():
+    jointure = clsJointure("devise", reference=REFERENCE, cles_reference="code", mode="inner", prefixe="ref_")
+    resultat = list(jointure.applique(VENTES))
+    assert resultat[0] == {"id": 1, "devise": "EUR", "ref_taux": 1.0}
+    assert [ligne["id"] for ligne in resultat] == [1, 2, 2]
+
+
+def test_cle_absente_en_erreur():
+    jointure = clsJointure("devise", reference=REFERENCE, cles_reference="code", absente="erreur")
+    with pytest.raises(KeyError):
+        list(jointure.applique(VENTES))
+
+
+def test_rejets_bornes():
+    rejetees = []
+    jointure = clsJointure("devise", reference=REFERENCE, cles_reference="code", absente="rejet",
+                           traite_rejet=rejetees.append, echantillon_rejets=3)
+    ventes = [{"id": i, "devise": "XXX"} for i in range(10)]
+    assert list(jointure.applique(ventes)) == []
+    assert jointure.nb_rejets == 10
+    assert jointure.rejets == ventes[:3]
+    assert rejetees == ventes
+    assert jointure.bilan["rejets"] == 10
+
+
+def test_cle_composee_en_texte():
+    reference = [{"pays": "FR", "num": 1, "libelle": "un"}, {"pays": "FR", "num": 2, "libelle": "deux"}]
+    jointure = clsJointure(["pays", "num"], reference=reference, cle_en_texte=True, mode="inner")
+    lignes = list(jointure.applique([{"pays": "FR", "num": " 2 "}, {"pays": "FR", "num": "3"}]))
+    assert lignes == [{"pays": "FR", "num": " 2 ", "libelle": "deux"}]
+
+
+def test_parametres_invalides():
+    with pytest.raises(ValueError):
+        clsJointure("devise", reference=REFERENCE, mode="outer")
+    with pytest.raises(ValueError):
+        clsJointure("devise")
+    with pytest.raises(ValueError):
+        clsJointure(["a", "b"], reference=REFERENCE, cles_reference="code")
+    with pytest.raises(KeyError):
+        list(clsJointure("devise", reference=REFERENCE).applique(VENTES))
+
+
+@pytest.mark.parametrize("tables_sql", [{"Devises": ("code TEXT, taux REAL", [("EUR", 1.0), ("USD", 0.9)])}])
+def test_reference_sql(sql):
+    jointure = clsJointure("devise", sql=sql, query="SELECT code, taux FROM Devises", cles_reference="code",
+                           taille_lot=1)
+    assert [ligne.get("taux") for ligne in jointure.applique(VENTES)] == [1.0, 0.9, None, None]
+    assert jointure.bilan["references"] == 2
@@ -0,0 +1,40 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from clsETL import clsETL
+from clsJSON import clsJSON
+from clsTable import clsTable
+
+
+def test_types_pyodbc():
+    ligne = {
+        "horodatage": datetime(2025, 7, 20, 10, 30),
+        "jour": date(2025, 7, 20),
+        "heure": time(10, 30),
+        "montant": Decimal("12345678901234567.50"),
+        "guid": UUID("12345678-1234-5678-1234-567812345678"),
+        "binaire": b"\x00\xff",
+    }
+    assert json.loads(clsJSON.dumps(ligne)) == {
+        "horodatage": "2025-07-20T10:30:00",
+        "jour": "2025-07-20",
+        "heure": "10:30:00",
+        "montant": "12345678901234567.50",     # valeur exacte, un float l'arrondirait
+        "guid": "12345678-1234-5678-1234-567812345678",
+        "binaire": "AP8=",
+    }
+
+
+def test_mapping_et_iterables():
+    table = clsTable(("id", "nom"), [(1, "a")])
+    assert clsJSON.dumps([table[0], (valeur for valeur in (1, 2))], compact=True) == '[{"id":1,"nom":"a"},[1,2]]'
+    assert clsJSON.dumps({"a": 1}) == '{"a": 1}'
+    assert clsJSON.encodeur(True) is clsJSON.encodeur(True)
+
+
+def test_sortie_json_sans_double_encodage(tmp_path):
+    fichier = str(tmp_path / "sortie.json")
+    clsETL().etl_output(fichier, [{"texte": 'guillemet " et é', "montant": Decimal("1.10")}], "JSON")
+    assert clsETL().etl_input(fichier, "JSON") == [{"texte": 'guillemet " et é', "montant": "1.10"}]
@@ -0,0 +1,109 @@
+import os
+import warnings
+from datetime import date
+
+from clsLOG import clsLOG, clsLOGRotation, clsLOGAsynchrone
+
+
+def repertoire_log(tmp_path) -> str:
+    return str(tmp_path) + os.sep
+
+
+def test_rotation_reprend_le_dernier_fichier(tmp_path):
+    jour = date.today().isoformat()
+    for nom in (f"LOG_{jour}_02.log", f"LOG_{jour}_10.log", "LOG_2000-01-01_99.log", f"LOG_{jour}_xx.log"):
+        (tmp_path / nom).write_text("12345", encoding="utf-8")
+    rotation = clsLOGRotation(repertoire_log(tmp_path), 1)
+    # rang 10 et non 02 : l'ordre de listdir n'est pas celui des rangs
+    assert rotation.fichier().endswith(f"LOG_{jour}_10.log")
+    assert rotation._octets == 5
+
+
+def test_rotation_sur_taille(tmp_path):
+    rotation = clsLOGRotation(repertoire_log(tmp_path), 0)
+    premier = rotation.fichier()
+    assert premier.endswith("_01.log")
+    assert rotation.fichier() == premier
+    rotation.ajoute(1)
+    assert rotation.fichier().endswith("_02.log")
+
+
+def test_ecriture_asynchrone_par_lots(tmp_path):
+    rotation = clsLOGRotation(repertoire_log(tmp_path), 1)
+    ecrivain = clsLOGAsynchrone(rotation, taille_lot=3, delai=60)
+    for numero in range(7):
+        ecrivain.ecrit(f"ligne {numero}\n")
+    ecrivain.vide()
+    with open(rotation.fichier(), encoding="utf-8") as f:
+        assert f.read() == "".join(f"ligne {numero}\n" for numero in range(7))
+    ecrivain.ecrit("derniere\n")
+    ecrivain.arrete()
+    with open(rotation.fichier(), encoding="utf-8") as f:
+        assert f.read().endswith("derniere\n")
+    assert ecrivain.nb_lignes_perdues == 0
+
+
+def test_lignes_perdues_signalees(tmp_path):
+    rotation = clsLOGRotation(repertoire_log(tmp_path), 1)
+    rotation.log_dir = repertoire_log(tmp_path / "absent")
+    rotation._nomme()
+    with warnings.catch_warnings(record=True) as avertissements:
+        warnings.simplefilter("always")
+        ecrivain = clsLOGAsynchrone(rotation, taille_lot=2, delai=60)
+        for numero in range(3):
+            ecrivain.ecrit(f"ligne {numero}\n")
+        ecrivain.vide()
+        # le thread d'écriture continue après l'incident
+        (tmp_path / "absent").mkdir()
+        ecrivain.ecrit("reprise\n")
+        ecrivain.arrete()
+    assert ecrivain.nb_lignes_perdues == 3
+    assert [a.category for a in avertissements] == [RuntimeWarning, RuntimeWarning]
+    with open(rotation.fichier(), encoding="utf-8") as f:
+        assert f.read() == "reprise\n"
+
+
+def lignes_du_log(log: clsLOG) -> list[list[str]]:
+    with open(log._log_file, encoding="utf-8") as f:
+        return [ligne.rstrip("\n").split("\t") for ligne in f]
+
+
+def test_messages_au_dela_du_niveau_ignores():
+    log = clsLOG(asynchrone=False)
+    niveau = log.init.log_level
+    for severite in (0, niveau, niveau + 1, 99):
+        log.ecrit_log(severite, f"message {severite}")
+    assert [ligne[-1] for ligne in lignes_du_log(log)] == ["message 0", f"message {niveau}"]
+    assert lignes_du_log(log)[1][0] == f"{niveau}/{niveau}"
+
+
+class Traitement:
+    def __init__(self):
+        self.log = clsLOG(asynchrone=False)
+
+    def journalise(self):
+        self.log.ecrit_log(1, "depuis une méthode")
+
+    @classmethod
+    def journalise_classe(cls, log):
+        log.ecrit_log(1, "depuis une méthode de classe")
+
+
+class TraitementDerive(Traitement):
+    pass
+
+
+def journalise(log):
+    log.ecrit_log(1, "depuis une fonction")
+
+
+def test_champ_appelant():
+    # comme get_function_name_2 : classe de l'instance (ou de cls), pas celle qui définit la méthode
+    traitement = TraitementDerive()
+    traitement.journalise()
+    Traitement().journalise()
+    TraitementDerive.journalise_classe(traitement.log)
+    journalise(traitement.log)
+    assert [ligne[-2] for ligne in lignes_du_log(traitement.log)] == [
+        "test_log.py/TraitementDerive/journalise", "test_log.py/Traitement/journalise",
+        "test_log.py/TraitementDerive/journalise_classe", "test_log.py//journalise"]
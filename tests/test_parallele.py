@@ -0,0 +1,49 @@
+import os
+import pytest
+
+from clsETL import clsETL
+
+
+class EtlParallele(clsETL):
+    def __init__(self):
+        super().__init__()
+        self.appels = []
+
+    def marque_pre(self):
+        self.appels.append(("pre", os.getpid()))
+        self.prefixe = "L"      # état établi par _pre, copié dans chaque processus
+
+    def marque(self, ligne):
+        return f"{self.prefixe}{ligne['id']};{os.getpid()}\n"
+
+    def marque_post(self):
+        self.appels.append(("post", os.getpid(), len(self.data_cible)))
+
+
+def analyse(lignes: list[str]) -> tuple[list, set]:
+    champs = [ligne.rstrip("\n").split(";") for ligne in lignes]
+    return [identifiant for identifiant, _ in champs], {int(pid) for _, pid in champs}
+
+
+@pytest.mark.parametrize("taille_bloc", [1, 7, 1000])
+def test_etl_output_parallele(tmp_path, taille_bloc):
+    fichier = tmp_path / "sortie.txt"
+    etl = EtlParallele()
+    source = [{"id": i} for i in range(100)]
+    etl.etl_output(str(fichier), source, "CSV", procedure_ETL="marque", nb_processus=2, taille_bloc=taille_bloc)
+    identifiants, pids = analyse(fichier.read_text(encoding="utf-8").splitlines(keepends=True))
+    # ordre de la source conservé d'un bloc à l'autre, lignes traitées hors du processus appelant
+    assert identifiants == [f"L{i}" for i in range(100)]
+    assert os.getpid() not in pids
+    # _pre et _post exécutées une seule fois, dans le processus appelant
+    assert etl.appels == [("pre", os.getpid()), ("post", os.getpid(), 100)]
+
+
+def test_etl_transform_ne_reprend_pas_le_mode_parallele(tmp_path):
+    etl = EtlParallele()
+    etl.etl_output(str(tmp_path / "sortie.txt"), [{"id": 1}], "CSV", procedure_ETL="marque", nb_processus=2)
+    _, pids = analyse(etl.etl_transform([{"id": 1}, {"id": 2}], procedure_ETL="marque"))
+    assert pids == {os.getpid()}
+    identifiants, pids = analyse(etl.etl_transform([{"id": i} for i in range(10)], procedure_ETL="marque",
+                                                   nb_processus=2, taille_bloc=3))
+    assert identifiants == [f"L{i}" for i in range(10)] and os.getpid() not in pids
@@ -0,0 +1,89 @@
+import os
+import json
+import pytest
+
+from clsETL import clsETL
+from clsETLPartition import clsETLPartition
+
+
+def lignes_alternees(nombre: int) -> list[dict]:
+    # partitions alternées : chaque ligne provoque une éviction avec max_ouverts=1
+    return [{"id": str(i), "site": ("A", "B", "C")[i % 3]} for i in range(nombre)]
+
+
+def relit(manifeste: list, type_etl: str) -> dict:
+    partitions = {}
+    for fichier in manifeste:
+        lignes = clsETL().etl_input(fichier["fichier"], type_etl)
+        assert len(lignes) == fichier["lignes"]
+        assert fichier["octets"] == os.path.getsize(fichier["fichier"])
+        partitions.setdefault(fichier["partition"], []).extend(ligne["id"] for ligne in lignes)
+    return partitions
+
+
+@pytest.mark.parametrize("taille_lot", [1, 4])
+def test_eviction_et_reprise_en_ajout(tmp_path, taille_lot):
+    lignes = lignes_alternees(30)
+    with clsETLPartition(str(tmp_path / "ventes.csv"), "CSV", cle_partition="site", max_ouverts=1,
+                         taille_lot=taille_lot, nb_travailleurs=2) as sortie:
+        sortie.ecrit_lignes(lignes)
+    # CSV : le fichier évincé est repris en ajout, un seul fichier par partition
+    assert sorted(os.path.basename(f["fichier"]) for f in sortie.manifeste) == \
+        ["ventes_A_0001.csv", "ventes_B_0001.csv", "ventes_C_0001.csv"]
+    partitions = relit(sortie.manifeste, "CSV")
+    for site in ("A", "B", "C"):
+        assert partitions[site] == [ligne["id"] for ligne in lignes if ligne["site"] == site]
+    assert sortie.bilan["lignes"] == 30
+
+
+def test_eviction_json_nouveau_fichier(tmp_path):
+    lignes = lignes_alternees(9)
+    with clsETLPartition(str(tmp_path / "ventes.json"), "JSON", cle_partition="site", max_ouverts=2,
+                         taille_lot=1) as sortie:
+        sortie.ecrit_lignes(lignes)
+    partitions = relit(sortie.manifeste, "JSON")
+    assert partitions["A"] == ["0", "3", "6"]
+    assert len(sortie.manifeste) > 3
+
+
+def test_lignes_max_et_manifeste(tmp_path):
+    manifeste = str(tmp_path / "manifeste.json")
+    with clsETLPartition(str(tmp_path / "ventes.ndjson"), "NDJSON", lignes_max=4, max_ouverts=1, taille_lot=3,
+                         fichier_manifeste=manifeste) as sortie:
+        sortie.ecrit_lignes(lignes_alternees(10))
+    assert [f["lignes"] for f in sortie.manifeste] == [4, 4, 2]
+    assert json.load(open(manifeste, encoding="utf-8"))["lignes"] == 10
+
+
+def test_collision_de_noms(tmp_path):
+    lignes = [{"id": "1", "ville": "a/b"}, {"id": "2", "ville": "a b"}, {"id": "3", "ville": "Paris"},
+              {"id": "4", "ville": "PARIS"}]
+    with clsETLPartition(str(tmp_path / "villes.csv"), "CSV", cle_partition="ville") as sortie:
+        sortie.ecrit_lignes(lignes)
+    fichiers = [f["fichier"].lower() for f in sortie.manifeste]
+    assert len(set(fichiers)) == 4
+    assert {f["partition"]: relit([f], "CSV")[f["partition"]] for f in sortie.manifeste} == \
+        {"a/b": ["1"], "a b": ["2"], "Paris": ["3"], "PARIS": ["4"]}
+
+
+class Interruption(Exception):
+    pass
+
+
+def test_abandon_sur_erreur(tmp_path):
+    def lignes():
+        yield from lignes_alternees(6)
+        raise Interruption()
+
+    with pytest.raises(Interruption):
+        with clsETLPartition(str(tmp_path / "ventes.json"), "JSON", cle_partition="site", taille_lot=100) as sortie:
+            sortie.ecrit_lignes(lignes())
+    assert sortie.manifeste == []
+    assert [f for f in os.listdir(tmp_path) if f.startswith("ventes")] == []
+
+
+def test_parametres_invalides(tmp_path):
+    with pytest.raises(ValueError):
+        clsETLPartition(str(tmp_path / "ventes.csv"), "CSV", max_ouverts=-1)
+    with pytest.raises(ValueError):
+        clsETLPartition(str(tmp_path / "ventes.txt"), "TXT")
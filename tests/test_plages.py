@@ -0,0 +1,71 @@
+import csv
+import json
+import pytest
+
+from clsETL import clsETL
+from tools import Tools
+
+
+def ecrit_csv(chemin, nb_lignes: int):
+    # valeurs encadrées contenant séparateurs, fins de ligne et guillemets doublés
+    with open(chemin, "w", encoding="utf-8", newline="") as f:
+        ecrivain = csv.writer(f, delimiter=";", lineterminator="\n")
+        ecrivain.writerow(["id", "texte", "montant"])
+        for i in range(nb_lignes):
+            texte = f"ligne {i}\nsuite; \"citée\"\n" if i % 3 == 0 else f"simple {i}"
+            ecrivain.writerow([i, texte, f"{i}.5"])
+
+
+@pytest.mark.parametrize("taille_plage", [1, 7, 50, 1000, 10 ** 6])
+def test_plages_alignees_sur_les_enregistrements(tmp_path, taille_plage):
+    chemin = str(tmp_path / "donnees.csv")
+    ecrit_csv(chemin, 40)
+    contenu = open(chemin, "rb").read()
+    plages = Tools.plages_fichier(chemin, taille_plage, guillemet=b'"')
+    # plages contiguës couvrant tout le fichier
+    assert plages[0][0] == 0 and plages[-1][1] == len(contenu)
+    assert all(fin == debut for (_, fin), (debut, _) in zip(plages, plages[1:]))
+    # chaque plage contient des enregistrements complets : parité des guillemets et fin de ligne finale
+    for debut, fin in plages:
+        morceau = contenu[debut:fin]
+        assert morceau.count(b'"') % 2 == 0
+        assert morceau.endswith(b"\n")
+
+
+def test_plages_sans_guillemet_coupent_dans_la_valeur(tmp_path):
+    chemin = str(tmp_path / "donnees.csv")
+    ecrit_csv(chemin, 40)
+    contenu = open(chemin, "rb").read()
+    plages = Tools.plages_fichier(chemin, 7)
+    assert any(contenu[debut:fin].count(b'"') % 2 for debut, fin in plages)
+
+
+def test_fin_enregistrement():
+    donnees = b'a;"x\ny";b\nc;d\n'
+    assert Tools.fin_enregistrement(donnees, 0) == 5
+    assert Tools.fin_enregistrement(donnees, 0, 0, b'"') == 10
+    assert Tools.fin_enregistrement(donnees, 10, 10, b'"') == len(donnees)
+
+
+def test_plages_fichier_parametres(tmp_path):
+    chemin = tmp_path / "vide.csv"
+    chemin.write_bytes(b"")
+    assert Tools.plages_fichier(str(chemin), 10) == []
+    with pytest.raises(ValueError):
+        Tools.plages_fichier(str(chemin), 0)
+
+
+@pytest.mark.parametrize("taille_plage", [16, 100, 10 ** 6])
+def test_csv_parallele_identique_a_la_lecture_sequentielle(tmp_path, taille_plage):
+    chemin = str(tmp_path / "donnees.csv")
+    ecrit_csv(chemin, 60)
+    sequentiel = list(clsETL().etl_input_iter(chemin, "CSV"))
+    parallele = list(clsETL().etl_input_parallele(chemin, "CSV", nb_processus=2, taille_plage=taille_plage))
+    assert parallele == sequentiel
+
+
+def test_ndjson_parallele(tmp_path):
+    chemin = tmp_path / "donnees.ndjson"
+    lignes = [{"id": i, "texte": f"ligne {i}"} for i in range(30)]
+    chemin.write_text("".join(json.dumps(ligne) + "\n" for ligne in lignes), encoding="utf-8")
+    assert list(clsETL().etl_input_parallele(str(chemin), "NDJSON", nb_processus=2, taille_plage=64)) == lignes
@@ -0,0 +1,162 @@
+import gc
+import threading
+import pytest
+
+from clsPOOL import clsPOOL
+from clsSQL import clsSQL
+from tools import Tools
+
+
+def test_get_pool_partage(base):
+    pool = clsPOOL.get_pool("chaine", "serveur", "base", "utilisateur", taille_min=1)
+    assert clsPOOL.get_pool("autre chaine", "serveur", "base", "utilisateur") is pool
+    assert clsPOOL.get_pool("chaine", "serveur", "autre base", "utilisateur") is not pool
+    assert pool.nb_ouvertes == 1 and pool.nb_libres == 1
+
+
+def test_reutilisation_et_rollback(base):
+    pool = clsPOOL("chaine", taille_min=0, taille_max=2)
+    connexion = pool.acquiert()
+    connexion.execute("CREATE TABLE t (x INTEGER)")
+    connexion.commit()
+    connexion.execute("INSERT INTO t VALUES (1)")
+    pool.libere(connexion)
+    with pool.connexion() as reprise:
+        assert reprise is connexion
+        assert reprise.execute("SELECT count(*) FROM t").fetchall() == [(0,)]
+    assert len(base.connexions) == 1
+    pool.ferme()
+
+
+def test_attente_puis_timeout(base):
+    pool = clsPOOL("chaine", taille_min=0, taille_max=1)
+    connexion = pool.acquiert()
+    with pytest.raises(TimeoutError):
+        pool.acquiert(0.05)
+
+    rendue = threading.Timer(0.05, pool.libere, (connexion,))
+    rendue.start()
+    assert pool.acquiert(5) is connexion
+    rendue.join()
+    pool.ferme()
+
+
+def test_eviction_des_connexions_inactives(base, monkeypatch):
+    temps = [1000.0]
+    monkeypatch.setattr(Tools, "get_current_time", staticmethod(lambda: temps[0]))
+    pool = clsPOOL("chaine", taille_min=1, taille_max=3, duree_inactivite=60)
+    connexions = [pool.acquiert() for _ in range(3)]
+    for connexion in connexions:
+        pool.libere(connexion)
+    temps[0] += 61
+    reprise = pool.acquiert()
+    # les deux plus anciennes au delà de taille_min sont fermées, la plus récente est retournée
+    assert reprise is connexions[-1]
+    assert [connexion.fermee for connexion in connexions] == [True, True, False]
+    assert pool.nb_ouvertes == 1
+    pool.ferme()
+
+
+def test_connexion_defaillante_remplacee(base):
+    pool = clsPOOL("chaine", taille_min=1, taille_max=1)
+    defaillante = pool.acquiert()
+    defaillante._base.close()
+    pool.libere(defaillante)    # le rollback échoue : la connexion est fermée et sa place libérée
+    assert pool.nb_ouvertes == 0
+    nouvelle = pool.acquiert()
+    assert nouvelle is not defaillante and pool.nb_ouvertes == 1
+    pool.ferme()
+
+
+def test_fermeture(base):
+    pool = clsPOOL("chaine", taille_min=2, taille_max=2)
+    empruntee = pool.acquiert()
+    libre = pool._libres[0][0]
+    pool.ferme()
+    assert pool.clos and libre.fermee and not empruntee.fermee
+    pool.libere(empruntee)
+    assert empruntee.fermee and pool.nb_ouvertes == 0
+    with pytest.raises(RuntimeError):
+        pool.acquiert()
+
+
+def test_fermeture_libere_les_threads_en_attente(base):
+    pool = clsPOOL("chaine", taille_min=0, taille_max=1)
+    empruntee = pool.acquiert()
+    erreurs = []
+
+    def attend():
+        try:
+            pool.acquiert(5)
+        except RuntimeError as e:
+            erreurs.append(e)
+    attente = threading.Thread(target=attend)
+    attente.start()
+    attente.join(0.1)
+    pool.ferme()
+    attente.join(5)
+    assert not attente.is_alive() and len(erreurs) == 1
+    pool.libere(empruntee)
+
+
+def test_taille_min_superieure(base):
+    with pytest.raises(ValueError):
+        clsPOOL("chaine", taille_min=3, taille_max=2)
+
+
+def test_clsSQL_avec_pool(base):
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "")
+    assert sql.connect() and sql.EstConnecte
+    connexion = sql.connection
+    sql.close()
+    assert not connexion.fermee and sql.connection is None
+    assert sql.connect() and sql.connection is connexion
+    sql.close()
+    clsPOOL.ferme_pools()
+    assert connexion.fermee
+    # les pools fermés sont retirés : la connexion suivante est ouverte dans un nouveau pool
+    assert sql.connect() and sql.connection is not connexion and not sql.pool.clos
+    sql.close()
+
+
+def test_objets_abandonnes_sans_close(base, monkeypatch):
+    monkeypatch.setattr(clsPOOL, "kATTENTE", 0.5)
+    for _ in range(clsPOOL.kTAILLE_MAX + 2):
+        sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "")
+        with pytest.warns(ResourceWarning):
+            assert sql.connect()
+            del sql     # détruit sans close : la connexion est rendue au pool
+    pool = clsPOOL.get_pool("chaine", "serveur", "base", "utilisateur")
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "")
+    assert sql.connect()
+    assert pool.nb_ouvertes == 1
+    sql.close()
+
+
+def test_objet_abandonne_dans_un_cycle(base, monkeypatch):
+    # l'objet n'est détruit que par le ramasse-miettes, pendant qu'un autre thread attend une connexion
+    monkeypatch.setattr(clsPOOL, "kSONDE", 0.05)
+    pool = clsPOOL.get_pool("chaine", "serveur", "base", "utilisateur", taille_max=1)
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "")
+    assert sql.connect()
+    sql.cycle = sql
+    connexion = sql.connection
+    del sql
+    gc_differe = threading.Timer(0.1, gc.collect)
+    gc_differe.start()
+    with pytest.warns(ResourceWarning):
+        assert pool.acquiert(5) is connexion
+    gc_differe.join()
+    pool.libere(connexion)
+
+
+def test_gestionnaire_de_contexte(base):
+    pool = clsPOOL.get_pool("chaine", "serveur", "base", "utilisateur")
+    with clsSQL("serveur", "base", "utilisateur", "mot de passe", "") as sql:
+        assert sql.EstConnecte and pool.nb_libres == 0
+    assert not sql.EstConnecte and pool.nb_libres == 1
+    with pytest.raises(ZeroDivisionError):
+        with clsSQL("serveur", "base", "utilisateur", "mot de passe", "", utilise_pool=False) as sql:
+            connexion = sql.connection
+            1 / 0
+    assert connexion.fermee
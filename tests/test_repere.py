@@ -0,0 +1,110 @@
+import os
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+import pyodbc
+
+from clsETL import clsETL
+from clsREPERE import clsREPERE
+from clsSQL import clsSQL
+
+
+@pytest.mark.parametrize("repere", [42, 1.5, Decimal("12.345"), "2024-01-01", date(2024, 2, 29),
+                                    datetime(2024, 2, 29, 13, 45, 1, 123456), b"\x00\x00\x07\xd1"])
+def test_repere_conserve_son_type(tmp_path, repere):
+    reperes = clsREPERE(str(tmp_path / "etat" / "etat.json"))
+    assert reperes.lit("travail") is None
+    reperes.avance("travail", repere, lignes=3)
+    relu = clsREPERE(str(tmp_path / "etat" / "etat.json")).lit("travail")
+    assert relu == repere and type(relu) is type(repere)
+    assert reperes.etat("travail")["lignes"] == 3
+    assert os.listdir(tmp_path / "etat") == ["etat.json"]
+
+
+def test_reinitialise_et_types_refuses(tmp_path):
+    reperes = clsREPERE(str(tmp_path / "etat.json"))
+    reperes.avance("a", 1)
+    reperes.avance("b", 2)
+    reperes.reinitialise("a")
+    assert reperes.lit("a") is None and reperes.lit("b") == 2
+    for repere in (None, True, [1]):
+        with pytest.raises(ValueError):
+            reperes.avance("a", repere)
+
+
+@pytest.fixture
+def tables_sql():
+    return {"Commandes": ("id INTEGER, libelle TEXT", [(i, f"commande {i}") for i in range(1, 11)])}
+
+
+def ajoute_commandes(sql, premier: int, dernier: int):
+    sql.connection.cursor().executemany("INSERT INTO Commandes VALUES (?, ?)",
+                                        [(i, f"commande {i}") for i in range(premier, dernier + 1)])
+    sql.connection.commit()
+
+
+def exporte(sql, tmp_path, nom: str = "commandes.csv", **options):
+    return clsETL().etl_export_sql_incremental(sql, "SELECT id, libelle FROM Commandes", str(tmp_path / nom), "CSV",
+                                               "id", str(tmp_path / "etat.json"), **options)
+
+
+def ids(chemin) -> list:
+    return [int(ligne["id"]) for ligne in clsETL().etl_input(str(chemin), "CSV")]
+
+
+def test_export_incremental(sql, tmp_path):
+    bilan = exporte(sql, tmp_path)
+    assert (bilan["lignes"], bilan["repere_precedent"], bilan["repere"]) == (10, None, 10)
+    assert ids(tmp_path / "commandes.csv") == list(range(1, 11))
+
+    ajoute_commandes(sql, 11, 13)
+    bilan = exporte(sql, tmp_path)
+    assert (bilan["lignes"], bilan["repere_precedent"], bilan["repere"]) == (3, 10, 13)
+    assert ids(tmp_path / "commandes.csv") == [11, 12, 13]
+    assert clsREPERE(str(tmp_path / "etat.json")).etat("commandes.csv")["lignes"] == 3
+
+
+def test_export_sans_nouvelle_ligne_conserve_le_fichier(sql, tmp_path):
+    exporte(sql, tmp_path)
+    bilan = exporte(sql, tmp_path)
+    assert bilan["lignes"] == 0 and bilan["fichier"] is None and bilan["repere"] == 10
+    assert ids(tmp_path / "commandes.csv") == list(range(1, 11))
+    assert not [f for f in os.listdir(tmp_path) if f.endswith(".tmp")]
+
+
+def test_export_horodate(sql, tmp_path):
+    premier = exporte(sql, tmp_path, "commandes_{horodatage}.csv")
+    ajoute_commandes(sql, 11, 12)
+    second = exporte(sql, tmp_path, "commandes_{horodatage}.csv")
+    assert premier["fichier"] != second["fichier"]
+    assert ids(premier["fichier"]) == list(range(1, 11)) and ids(second["fichier"]) == [11, 12]
+    # le travail est nommé d'après le modèle : le repère est partagé entre les exécutions
+    assert clsREPERE(str(tmp_path / "etat.json")).lit("commandes_{horodatage}.csv") == 12
+
+
+def test_repere_initial(sql, tmp_path):
+    bilan = exporte(sql, tmp_path, repere_initial=7)
+    assert ids(tmp_path / "commandes.csv") == [8, 9, 10]
+    assert bilan["repere_precedent"] == 7
+
+
+def test_requete_en_erreur_sans_avancer(sql, tmp_path):
+    exporte(sql, tmp_path)
+    ajoute_commandes(sql, 11, 12)
+    with pytest.raises(pyodbc.Error):
+        clsETL().etl_export_sql_incremental(sql, "SELECT id FROM Inconnue", str(tmp_path / "commandes.csv"), "CSV",
+                                            "id", str(tmp_path / "etat.json"))
+    assert ids(tmp_path / "commandes.csv") == list(range(1, 11))
+    assert clsREPERE(str(tmp_path / "etat.json")).lit("commandes.csv") == 10
+
+
+def test_colonne_repere_invalide(sql, tmp_path):
+    with pytest.raises(ValueError):
+        clsETL().etl_export_sql_incremental(sql, "SELECT id FROM Commandes", str(tmp_path / "commandes.csv"), "CSV",
+                                            "id]; DROP TABLE Commandes; --", str(tmp_path / "etat.json"))
+
+
+def test_sans_connexion(base, tmp_path):
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "", utilise_pool=False)
+    with pytest.raises(ConnectionError):
+        exporte(sql, tmp_path)
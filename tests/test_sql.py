@@ -0,0 +1,129 @@
+import pytest
+import pyodbc
+
+from clsETL import clsETL
+from clsSQL import clsSQL
+from clsTable import clsTable
+from tools import Tools
+
+
+@pytest.fixture
+def tables_sql():
+    return {"Ventes": ("id INTEGER, site TEXT, montant REAL",
+                       [(i, ("Lyon", "Nantes")[i % 2], i * 1.5) for i in range(1, 12)])}
+
+
+def test_fetch_batches(sql):
+    lots = list(sql.fetch_batches("SELECT id FROM Ventes ORDER BY id", taille_lot=5, header=True))
+    assert lots[0] == [["id"]]
+    assert [len(lot) for lot in lots[1:]] == [5, 5, 1]
+    assert [ligne[0] for lot in lots[1:] for ligne in lot] == list(range(1, 12))
+
+
+def test_fetch_batches_dictionnaires_et_parametres(sql):
+    lots = list(sql.fetch_batches("SELECT id, site FROM Ventes WHERE site = ? ORDER BY id", taille_lot=4,
+                                  header=True, dict_rows=True, parametres=("Lyon",)))
+    assert lots[0][0] == {"id": 2, "site": "Lyon"}
+    assert sum(len(lot) for lot in lots) == 5
+
+
+def test_execute_select_iter(sql):
+    lignes = list(sql.execute_select_iter("SELECT id FROM Ventes WHERE id <= 3 ORDER BY id", taille_lot=2))
+    assert lignes == [["id"], (1,), (2,), (3,)]
+
+
+def test_fetch_batches_erreur_propagee(sql):
+    with pytest.raises(pyodbc.Error):
+        list(sql.fetch_batches("SELECT * FROM Inconnue"))
+
+
+def test_fetch_batches_sans_connexion(base):
+    sql = clsSQL("serveur", "base", "utilisateur", "mot de passe", "", utilise_pool=False)
+    assert list(sql.fetch_batches("SELECT 1")) == []
+
+
+def test_bulk_insert_par_lots(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER, nom TEXT)")
+    lignes = ((i, f"nom {i}") for i in range(25))
+    assert sql.bulk_insert("Cible", ["id", "nom"], lignes, batch_size=10) == 25
+    assert sql.execute_select("SELECT count(*), max(id) FROM Cible", header=False) == [(25, 24)]
+
+
+def test_bulk_insert_dictionnaires(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER, nom TEXT)")
+    assert sql.bulk_insert("Cible", None, [{"id": 1, "nom": "a"}, {"id": 2}]) == 2
+    assert sql.execute_select("SELECT id, nom FROM Cible ORDER BY id", header=False) == [(1, "a"), (2, None)]
+    assert sql.bulk_insert("Cible", None, []) == 0
+
+
+def test_bulk_insert_lot_en_erreur(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER NOT NULL, nom TEXT)")
+    sql.connection.commit()
+    lignes = [(i, "ok") for i in range(4)] + [(None, "rejet")]
+    # le lot en erreur est annulé, les lots précédents restent validés
+    assert sql.bulk_insert("Cible", ["id", "nom"], lignes, batch_size=2) is None
+    assert sql.nb_lignes_inserees == 4
+    assert sql.execute_select("SELECT count(*) FROM Cible", header=False) == [(4,)]
+
+
+def test_bulk_insert_invalide_le_cache(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER)")
+    sql.active_cache()
+    assert sql.execute_select("SELECT id FROM Cible") == []
+    sql.bulk_insert("Cible", ["id"], [(1,)])
+    assert sql.execute_select("SELECT id FROM Cible", header=False) == [(1,)]
+
+
+def test_etl_export_sql(sql, tmp_path):
+    fichier = tmp_path / "ventes.json"
+    bilan = clsETL().etl_export_sql(sql, "SELECT id, site, montant FROM Ventes ORDER BY id", str(fichier), "JSON",
+                                    taille_lot=3)
+    assert bilan["lignes"] == 11
+    lignes = clsETL().etl_input(str(fichier), "JSON")
+    assert lignes[0] == {"id": 1, "site": "Nantes", "montant": 1.5}
+
+
+def test_etl_export_sql_erreur_conserve_le_fichier(sql, tmp_path):
+    fichier = tmp_path / "ventes.csv"
+    fichier.write_text("ancien", encoding="utf-8")
+    with pytest.raises(pyodbc.Error):
+        clsETL().etl_export_sql(sql, "SELECT * FROM Inconnue", str(fichier), "CSV")
+    assert fichier.read_text(encoding="utf-8") == "ancien"
+    sans_connexion = clsSQL("serveur", "base", "utilisateur", "mot de passe", "", utilise_pool=False)
+    with pytest.raises(ConnectionError):
+        clsETL().etl_export_sql(sans_connexion, "SELECT 1", str(fichier), "CSV")
+
+
+def test_etl_input_sql(sql):
+    lignes = list(clsETL().etl_input_sql(sql, "SELECT id, site FROM Ventes ORDER BY id", taille_lot=4))
+    assert len(lignes) == 11
+    assert lignes[0] == {"id": 1, "site": "Nantes"}
+
+
+def test_bulk_insert_lignes_compactes(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER, nom TEXT)")
+    table = clsTable(("nom", "id"), [("a", 1), ("b", 2)])
+    # lignes clsLigne : valeurs prises par nom de colonne, pas par position
+    assert sql.bulk_insert("Cible", ["id", "nom"], table) == 2
+    assert sql.bulk_insert("Cible", None, list(table)) == 2
+    assert sql.connection.execute("SELECT id, nom FROM Cible").fetchall() == [(1, "a"), (2, "b")] * 2
+
+
+def test_bulk_insert_noms_controles(sql):
+    sql.connection.execute("CREATE TABLE Cible (id INTEGER, [nom client] TEXT)")
+    assert sql.bulk_insert("main.[Cible]", ["id"], [(1,)]) == 1
+    assert sql.bulk_insert("Cible (id) SELECT 1; DROP TABLE Ventes; --", ["id"], [(2,)]) is None
+    assert sql.bulk_insert("Cible", ["nom client"], [("a",)]) is None
+    assert sql.bulk_insert("Cible", None, [{"id": 3, "id) SELECT 4 --": 5}]) is None
+    assert sql.connection.execute("SELECT id FROM Cible").fetchall() == [(1,)]
+    assert sql.connection.execute("SELECT count(*) FROM Ventes").fetchall() == [(11,)]
+
+
+def test_nom_sql():
+    assert Tools.nom_sql("dbo.Ventes") == "[dbo].[Ventes]"
+    assert Tools.nom_sql("[dbo].[#temp]") == "[dbo].[#temp]"
+    for nom in ("a.b.c.d.e", "", "a..b", "[a]]", "a b", "1a", "a;b", None):
+        with pytest.raises(ValueError):
+            Tools.nom_sql(nom)
+    with pytest.raises(ValueError):
+        Tools.nom_sql("dbo.Ventes", 1)
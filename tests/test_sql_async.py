@@ -0,0 +1,101 @@
+import time
+import asyncio
+import pytest
+
+from clsPOOL import clsPOOL
+
+
+# requête sans fin : seule l'annulation (cursor.cancel) l'interrompt
+kSANS_FIN = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT max(x) FROM c"
+
+
+@pytest.fixture
+def tables_sql():
+    return {"Sites": ("id INTEGER, nom TEXT", [(1, "Lyon"), (2, "Nantes")])}
+
+
+@pytest.fixture
+def sql(sql):
+    # les requêtes asynchrones empruntent leurs connexions au pool : l'objet n'est pas connecté
+    sql.close()
+    sql.utilise_pool = True
+    return sql
+
+
+def attend_connexions_rendues(pool: clsPOOL, nombre: int):
+    limite = time.monotonic() + 5
+    while pool.nb_libres < nombre and time.monotonic() < limite:
+        time.sleep(0.01)
+    return pool.nb_libres
+
+
+def test_select_async(sql):
+    async def principal():
+        return await asyncio.gather(
+            sql.execute_select_async("SELECT id, nom FROM Sites ORDER BY id"),
+            sql.execute_select_async("SELECT nom FROM Sites WHERE id = ?", parametres=(2,), header=False),
+            sql.execute_select_async("SELECT id, nom FROM Sites ORDER BY id", dict_rows=True))
+    lignes, nantes, dicts = asyncio.run(principal())
+    assert lignes == [["id", "nom"], (1, "Lyon"), (2, "Nantes")]
+    assert nantes == [("Nantes",)]
+    assert dicts == [{"id": 1, "nom": "Lyon"}, {"id": 2, "nom": "Nantes"}]
+
+
+def test_delai_annule_la_requete(sql):
+    debut = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(sql.execute_select_async(kSANS_FIN, delai=0.2))
+    assert time.monotonic() - debut < 5
+    # la requête interrompue sur le serveur, la connexion est rendue au pool
+    pool = clsPOOL.get_pool(sql.chaine_connexion, sql.server, sql.database, sql.username)
+    assert attend_connexions_rendues(pool, pool.nb_ouvertes) == pool.nb_ouvertes
+
+
+def test_annulation_de_la_tache(sql):
+    async def principal():
+        tache = asyncio.create_task(sql.execute_select_async(kSANS_FIN))
+        await asyncio.sleep(0.2)
+        tache.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tache
+    asyncio.run(principal())
+    pool = clsPOOL.get_pool(sql.chaine_connexion, sql.server, sql.database, sql.username)
+    assert attend_connexions_rendues(pool, pool.nb_ouvertes) == pool.nb_ouvertes
+
+
+def test_pool_epuise(sql):
+    pool = clsPOOL.get_pool(sql.chaine_connexion, sql.server, sql.database, sql.username)
+    empruntees = [pool.acquiert() for _ in range(pool.taille_max)]
+    debut = time.monotonic()
+    # l'attente d'une connexion est comprise dans le délai, et non clsPOOL.kATTENTE : selon l'échéance atteinte
+    # la première, l'attente du pool (None) ou wait_for (TimeoutError)
+    try:
+        assert asyncio.run(sql.execute_select_async("SELECT 1", delai=0.2)) is None
+    except asyncio.TimeoutError:
+        pass
+    assert time.monotonic() - debut < 5
+    for connexion in empruntees:
+        pool.libere(connexion)
+
+
+def test_gather_selects(sql):
+    resultats = sql.execute_selects({"sites": "SELECT nom FROM Sites ORDER BY id", "erreur": "SELECT * FROM Inconnue",
+                                     "sans_fin": kSANS_FIN, "parametre": ("SELECT nom FROM Sites WHERE id = ?", (1,))},
+                                    header=False, delai=0.3)
+    assert resultats == {"sites": [("Lyon",), ("Nantes",)], "erreur": None, "sans_fin": None,
+                         "parametre": [("Lyon",)]}
+
+
+def test_cache_async(sql):
+    sql.active_cache()
+    premier = sql.execute_selects(["SELECT nom FROM Sites ORDER BY id"])
+    second = sql.execute_selects(["SELECT nom FROM Sites ORDER BY id"])
+    assert premier == second == [[["nom"], ("Lyon",), ("Nantes",)]]
+    assert sql.cache.statistiques["succes"] == 1
+
+
+def test_sans_pool(sql, base):
+    sql.utilise_pool = False
+    nombre = len(base.connexions)
+    assert sql.execute_selects(["SELECT count(*) FROM Sites"], header=False) == [[(2,)]]
+    assert len(base.connexions) == nombre + 1 and base.connexions[-1].fermee
@@ -0,0 +1,64 @@
+from collections.abc import Mapping
+import pytest
+
+from clsETL import clsETL
+from clsTable import clsTable, clsLigne
+
+
+def test_ligne_mapping():
+    table = clsTable(("id", "nom"), [(1, "a"), (2, "b")])
+    ligne = table[1]
+    assert isinstance(ligne, Mapping)
+    assert ligne["nom"] == "b" and ligne[0] == 2 and ligne.get("absente", 0) == 0
+    assert list(ligne) == ["id", "nom"] and "id" in ligne and len(ligne) == 2
+    assert dict(ligne) == {"id": 2, "nom": "b"} == ligne
+    assert {**ligne, "x": 1} == {"id": 2, "nom": "b", "x": 1}
+    assert ligne == clsLigne(("id", "nom"), {"id": 0, "nom": 1}, (2, "b"))
+
+
+def test_tranche():
+    table = clsTable(("id",), [(i,) for i in range(10)])
+    tranche = table[2:5]
+    assert isinstance(tranche, clsTable) and tranche.colonne("id") == [2, 3, 4]
+    assert [ligne["id"] for ligne in tranche] == [2, 3, 4]
+
+
+def test_depuis_dicts_colonnes_ajoutees():
+    lignes = [{"a": 1, "b": 2}, {"b": 3}, {"a": 4, "c": 5}]
+    table = clsTable.depuis_dicts(lignes)
+    assert table.colonnes == ("a", "b", "c")
+    assert table.en_dicts() == [{"a": 1, "b": 2, "c": None}, {"a": None, "b": 3, "c": None}, {"a": 4, "b": None, "c": 5}]
+    assert clsTable.depuis_dicts([]).colonnes == ()
+
+
+def test_etl_input_compact(tmp_path):
+    fichier = tmp_path / "lignes.csv"
+    fichier.write_text("id;nom\n1;a\n\n2\n", encoding="utf-8")
+    table = clsETL().etl_input(str(fichier), "CSV", compact=True)
+    assert table.en_dicts() == clsETL().etl_input(str(fichier), "CSV") == [{"id": "1", "nom": "a"}, {"id": "2", "nom": None}]
+
+    fichier.write_text("id;nom\n1;a;en trop\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        clsETL().etl_input(str(fichier), "CSV", compact=True)
+
+
+def test_etl_output_table(tmp_path):
+    fichier = str(tmp_path / "table.csv")
+    table = clsTable(("id", "nom"), [(1, "a"), (2, "b")])
+    clsETL().etl_output(fichier, table, "CSV")
+    assert clsETL().etl_input(fichier, "CSV") == [{"id": "1", "nom": "a"}, {"id": "2", "nom": "b"}]
+
+
+class EtlMajuscules(clsETL):
+    def majuscules(self, ligne):
+        ligne["nom"] = ligne["nom"].upper()     # la procédure modifie la ligne reçue
+        return f"{ligne['id']};{ligne['nom']}\n"
+
+
+@pytest.mark.parametrize("compacte", [True, False])
+def test_procedure_etl_sur_lignes_compactes(tmp_path, compacte):
+    fichier = tmp_path / "sortie.txt"
+    table = clsTable(("id", "nom"), [(1, "a"), (2, "b")])
+    EtlMajuscules().etl_output(str(fichier), table if compacte else list(table), "CSV", procedure_ETL="majuscules")
+    assert fichier.read_text(encoding="utf-8") == "1;A\n2;B\n"
+    assert table.colonne("nom") == ["a", "b"]
@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+import pytest
+
+from clsTable import clsTable
+from clsTransformation import clsTransformation
+
+
+SPECIFICATION = {
+    "filtre": lambda ligne: ligne["statut"] != "ANNULE",
+    "supprime": ["commentaire"],
+    "conversion": {"montant": "decimal", "date_cde": "date", "quantite": "int"},
+    "renomme": {"date_cde": "date_commande"},
+    "derive": {"annee": lambda ligne: ligne["date_commande"].year,
+               "total": lambda ligne: ligne["montant"] * ligne["quantite"]},
+}
+
+LIGNES = [
+    {"statut": "OK", "montant": "10.50", "date_cde": "2024-03-01", "quantite": "2", "commentaire": "x"},
+    {"statut": "ANNULE", "montant": "1", "date_cde": "2024-03-02", "quantite": "1", "commentaire": ""},
+    {"statut": "OK", "montant": "", "date_cde": "2023-12-31", "quantite": "3", "commentaire": None},
+]
+
+
+def test_transforme():
+    transformation = clsTransformation(SPECIFICATION)
+    assert transformation.transforme(LIGNES[0]) == {"statut": "OK", "montant": Decimal("10.50"),
+                                                    "date_commande": date(2024, 3, 1), "quantite": 2,
+                                                    "annee": 2024, "total": Decimal("21.00")}
+    assert transformation.transforme(LIGNES[1]) is None
+
+
+def test_lot_identique_ligne_a_ligne():
+    transformation = clsTransformation({**SPECIFICATION, "derive": {}})
+    attendu = [r for r in (transformation.transforme(ligne) for ligne in LIGNES) if r is not None]
+    assert clsTransformation({**SPECIFICATION, "derive": {}}).transforme_lot(LIGNES) == attendu
+    assert attendu[1]["montant"] is None
+
+
+def test_recompilation_sur_nouvelles_colonnes():
+    transformation = clsTransformation({"conversion": {"x": "int"}})
+    lignes = [{"x": "1"}, {"x": "2", "y": "a"}, {"x": "3"}]
+    assert transformation.transforme_lot(lignes) == [{"x": 1}, {"x": 2, "y": "a"}, {"x": 3}]
+    assert transformation.transforme({"y": "b", "x": "4"}) == {"y": "b", "x": 4}
+
+
+def test_colonne_inconnue():
+    with pytest.raises(KeyError):
+        clsTransformation({"garde": ["absente"]}).transforme({"x": 1})
+    with pytest.raises(KeyError):
+        clsTransformation({"renomme": {"absente": "y"}}).transforme({"x": 1})
+    with pytest.raises(ValueError):
+        clsTransformation({"conversion": {"x": "inconnu"}})
+    with pytest.raises(ValueError):
+        clsTransformation({"etape": []})
+
+
+def test_applique_lignes_sql_et_table():
+    transformation = clsTransformation({"garde": ["id"], "conversion": {"id": "str"}})
+    resultat = [["id", "nom"], (1, "a"), (2, "b")]
+    assert list(transformation.applique(resultat, taille_lot=1)) == [{"id": "1"}, {"id": "2"}]
+    table = clsTable(("nom", "id"), [("c", 3)])
+    assert list(transformation.applique(table)) == [{"id": "3"}]
+    assert list(transformation.applique([])) == []
@@ -0,0 +1,92 @@
+import os
+import random
+from decimal import Decimal
+import pytest
+
+from clsTri import clsTri, clsRegroupement
+
+
+def lignes_aleatoires(nombre: int, graine: int = 1) -> list[dict]:
+    aleatoire = random.Random(graine)
+    return [{"client": f"c{aleatoire.randint(1, 20):02d}", "montant": str(aleatoire.randint(-500, 500)), "rang": i}
+            for i in range(nombre)]
+
+
+def test_tri_en_memoire():
+    lignes = lignes_aleatoires(200)
+    tri = clsTri(["client", ("montant", float)])
+    resultat = list(tri.trie(lignes))
+    assert resultat == sorted(lignes, key=lambda ligne: (ligne["client"], float(ligne["montant"])))
+    assert tri.bilan == {"lignes": 200, "monotonies": 0}
+
+
+@pytest.mark.parametrize("decroissant", [False, True])
+def test_tri_externe_avec_fusion_intermediaire(tmp_path, monkeypatch, decroissant):
+    monkeypatch.setattr(clsTri, "kFUSION_MAX", 3)
+    monkeypatch.setattr(clsTri, "kTAILLE_PAQUET", 7)
+    lignes = lignes_aleatoires(2000)
+    tri = clsTri(("montant", float), decroissant=decroissant, memoire_max=4096, repertoire=str(tmp_path))
+    resultat = list(tri.trie(lignes))
+    # tri stable : à montant égal l'ordre d'origine est conservé, y compris au travers des fusions
+    attendu = sorted(lignes, key=lambda ligne: float(ligne["montant"]), reverse=decroissant)
+    assert resultat == attendu
+    assert tri.nb_monotonies > 3
+    assert os.listdir(tmp_path) == []
+
+
+def test_valeurs_none_en_fin():
+    lignes = [{"v": 2}, {"v": None}, {"v": 1}, {"v": None}, {"v": 3}]
+    assert [ligne["v"] for ligne in clsTri("v").trie(lignes)] == [1, 2, 3, None, None]
+    assert [ligne["v"] for ligne in clsTri("v", decroissant=True).trie(lignes)] == [None, None, 3, 2, 1]
+
+
+def test_colonne_absente():
+    with pytest.raises(KeyError):
+        list(clsTri("inconnue").trie([{"v": 1}]))
+    assert list(clsTri("v").trie([])) == []
+
+
+def test_regroupement_externe():
+    lignes = lignes_aleatoires(1500)
+    regroupement = clsRegroupement("client", {"total": ("somme", "montant"), "nombre": ("nombre", None),
+                                              "moyenne": ("moyenne", "montant"), "premier": ("premier", "rang")},
+                                   memoire_max=2048)
+    groupes = list(regroupement.regroupe(lignes))
+    clients = sorted({ligne["client"] for ligne in lignes})
+    assert [groupe["client"] for groupe in groupes] == clients
+    for groupe in groupes:
+        du_client = [ligne for ligne in lignes if ligne["client"] == groupe["client"]]
+        assert groupe["total"] == sum(float(ligne["montant"]) for ligne in du_client)
+        assert groupe["nombre"] == len(du_client)
+        assert groupe["moyenne"] == pytest.approx(groupe["total"] / len(du_client))
+        assert groupe["premier"] == du_client[0]["rang"]
+
+
+def test_regroupement_sur_cle_convertie():
+    # "1" et "1.0" sont la même clé une fois convertis : un seul groupe
+    lignes = [{"k": "1", "v": 1}, {"k": "2", "v": 2}, {"k": "1.0", "v": 3}]
+    groupes = list(clsRegroupement(("k", float), {"n": ("nombre", None)}).regroupe(lignes))
+    assert [groupe["n"] for groupe in groupes] == [2, 1]
+
+
+def test_min_max_numeriques():
+    lignes = [{"k": "a", "v": valeur} for valeur in ("9", "10", "", "-2.5", None)]
+    groupe, = clsRegroupement("k", {"min": ("min", "v"), "max": ("max", "v")}).regroupe(lignes)
+    assert groupe == {"k": "a", "min": "-2.5", "max": "10"}
+
+
+def test_min_max_texte_si_valeur_non_numerique():
+    lignes = [{"k": "a", "v": valeur} for valeur in ("9", "10", "abc")]
+    groupe, = clsRegroupement("k", {"min": ("min", "v"), "max": ("max", "v")}).regroupe(lignes)
+    assert groupe == {"k": "a", "min": "10", "max": "abc"}
+
+
+def test_somme_decimal_conservee():
+    lignes = [{"k": 1, "v": Decimal("1.10")}, {"k": 1, "v": Decimal("2.20")}]
+    groupe, = clsRegroupement("k", {"s": ("somme", "v")}).regroupe(lignes)
+    assert groupe["s"] == Decimal("3.30")
+
+
+def test_fonction_inconnue():
+    with pytest.raises(ValueError):
+        clsRegroupement("k", {"x": ("mediane", "v")})
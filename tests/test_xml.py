@@ -0,0 +1,52 @@
+import io
+import os
+import pytest
+
+from clsETL import clsETL
+from clsETLSortie import clsETLSortie
+
+
+def lit_xml(texte: str, balise_ligne: str = "row") -> list:
+    return list(clsETL()._lit_xml(io.BytesIO(texte.encode("utf-8")), balise_ligne))
+
+
+def test_aller_retour_caracteres_speciaux(tmp_path):
+    fichier = str(tmp_path / "sortie.xml")
+    lignes = [{"Montant_HT": "a & b", "libellé": "<balise> \"citée\" l'été", "code.pays-iso": "]]>", "_vide": None}]
+    clsETL().etl_output(fichier, lignes, "XML")
+    assert clsETL().etl_input(fichier, "XML") == [{**lignes[0], "_vide": ""}]
+
+
+@pytest.mark.parametrize("colonne", ["Total Amount", "a&b", "1er", "x:y", "<c>", ""])
+def test_nom_de_colonne_invalide(tmp_path, colonne):
+    fichier = tmp_path / "sortie.xml"
+    with pytest.raises(ValueError):
+        clsETL().etl_output(str(fichier), [{"id": 1, colonne: 2}], "XML")
+    assert os.listdir(tmp_path) == []
+
+
+def test_balises_invalides():
+    with pytest.raises(ValueError):
+        clsETLSortie("sortie.xml", "XML", balise_ligne="ma ligne")
+    # sans objet pour les autres formats
+    clsETLSortie("sortie.csv", "CSV", balise_ligne="ma ligne")
+
+
+def test_lecture_attributs_et_balise_ligne():
+    texte = ('<?xml version="1.0"?><export><titre>ignoré</titre>'
+             '<ligne id="1" statut="OK"><nom>Lyon</nom><vide/></ligne>'
+             '<ligne id="2"><nom>Nantes</nom></ligne></export>')
+    assert lit_xml(texte, "ligne") == [{"id": "1", "statut": "OK", "nom": "Lyon", "vide": ""},
+                                       {"id": "2", "nom": "Nantes"}]
+
+
+def test_lecture_espaces_de_noms():
+    texte = ('<r:root xmlns:r="urn:racine" xmlns="urn:defaut">'
+             '<row><id>1</id></row><r:row><r:id>2</r:id></r:row></r:root>')
+    assert lit_xml(texte) == [{"id": "1"}, {"id": "2"}]
+
+
+def test_lecture_contenu_echappe():
+    texte = ("<root><row><texte>a &amp; b &lt;c&gt; &quot;d&quot; &#233;</texte>"
+             "<cdata><![CDATA[<brut> & ]]></cdata></row></root>")
+    assert lit_xml(texte) == [{"texte": 'a & b <c> "d" é', "cdata": "<brut> & "}]
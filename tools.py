@@ -1,13 +1,24 @@
 import os
+import re
+import sys
+import gzip
+import bz2
+import lzma
+import mmap
 import platform
 import inspect
 import uuid
 import time
+from itertools import islice
 from datetime import datetime, timedelta
 
 class Tools:
     # constants
     kREPDONNEES = 'REPDONNEES'  # Répertoire des données    
+    _appelants: dict = {}       # cache de get_appelant, par objet code
+    kEXTENSIONS_COMPRESSION = {".gz": "gzip", ".gzip": "gzip", ".bz2": "bz2", ".xz": "xz", ".lzma": "xz"}
+    kSIGNATURES_COMPRESSION = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz"}
+    kIDENTIFIANT_SQL = re.compile(r"#{0,2}[A-Za-z_][\w@#$]*\Z")     # nom SQL simple (colonne, table, schéma, #temporaire)
 
     @staticmethod
     def list_file(chemin_d_acces, type_fichier=None, prefixe_fichier=None, contient_nom=None) -> list:
@@ -142,6 +153,34 @@ class Tools:
                     return f"{fichier}/{classe}/{methode}"
         return "UnknownFunction"
     
+    @staticmethod
+    def get_appelant(profondeur: int = 1) -> str:
+        """
+        Version rapide de get_function_name_2 : retourne Fichier/Classe/Méthode de l'appelant situé profondeur
+        niveaux au dessus de la fonction qui appelle get_appelant (1 = l'appelant de cette fonction).
+        Comme get_function_name_2, la classe est celle de l'instance (self) ou de la classe (cls) de l'appelant :
+        une méthode héritée est consignée sous le nom de la classe dérivée.
+        Le fichier, la méthode et le nom du premier paramètre sont mis en cache par objet code.
+        """
+        try:
+            frame = sys._getframe(profondeur + 1)
+        except ValueError:
+            return "UnknownFunction"
+        code = frame.f_code
+        appelant = Tools._appelants.get(code)
+        if appelant is None:
+            premier = code.co_varnames[0] if code.co_argcount else None
+            appelant = (f"{os.path.basename(code.co_filename)}/", f"/{code.co_name}",
+                        premier if premier in ("self", "cls") else None)
+            Tools._appelants[code] = appelant
+        fichier, methode, premier = appelant
+        classe = ""
+        if premier is not None:
+            objet = frame.f_locals.get(premier)
+            if objet is not None:
+                classe = objet.__name__ if premier == "cls" else objet.__class__.__name__
+        return f"{fichier}{classe}{methode}"
+
     @staticmethod
     def get_guid() -> str:
         """
@@ -249,4 +288,135 @@ class Tools:
         if hasattr(objet, nom_methode):
             return True
         else:
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def nom_sql(nom: str, parties_max: int = 4) -> str:
+        """
+        Contrôle un nom d'objet SQL destiné à être inséré dans le texte d'une requête et le retourne entre crochets :
+        "dbo.Ventes" -> "[dbo].[Ventes]". Le nom peut être qualifié (serveur.base.schema.table, au plus parties_max
+        parties), chaque partie est un nom simple (lettres, chiffres, _ @ # $), éventuellement déjà entre crochets.
+        Tout autre nom (espaces, guillemets, point-virgule...) lève ValueError : il n'est jamais inséré tel quel.
+        """
+        parties = nom.split(".") if isinstance(nom, str) else []
+        if not parties or len(parties) > parties_max:
+            raise ValueError(f"Nom SQL invalide : {nom!r}")
+        resultat = []
+        for partie in parties:
+            if partie.startswith("[") and partie.endswith("]"):
+                partie = partie[1:-1]
+            if not Tools.kIDENTIFIANT_SQL.match(partie):
+                raise ValueError(f"Nom SQL invalide : {nom!r}")
+            resultat.append(f"[{partie}]")
+        return ".".join(resultat)
+
+    @staticmethod
+    def detecte_compression(file_path: str, lecture: bool = True) -> str:
+        """
+        Retourne la compression d'un fichier ("gzip", "bz2", "xz") ou None.
+        En lecture d'un fichier existant la signature (premiers octets) fait foi, sinon l'extension du nom.
+        """
+        if lecture and os.path.isfile(file_path):
+            with open(file_path, "rb") as f:
+                debut = f.read(6)
+            for signature, compression in Tools.kSIGNATURES_COMPRESSION.items():
+                if debut.startswith(signature):
+                    return compression
+            return None
+        return Tools.kEXTENSIONS_COMPRESSION.get(os.path.splitext(file_path)[1].lower())
+
+    @staticmethod
+    def ouvre_flux(file_path: str, mode: str = "r", compression: str = "auto", niveau: int = None,
+                   encoding: str = "utf-8", newline: str = None):
+        """
+        Ouvre un fichier, compressé ou non, comme open : la (dé)compression est faite en flux par gzip, bz2 ou lzma,
+        sans fichier temporaire.
+
+        :param mode: "r", "w", "a" (texte) ou "rb", "wb", "ab" (binaire).
+        :param compression: "auto" (détection, voir detecte_compression), "gzip", "bz2", "xz" ou None (fichier non compressé).
+        :param niveau: niveau de compression en écriture (gzip / bz2 : 1 à 9, xz : preset 0 à 9), défaut du module sinon.
+        """
+        if compression == "auto":
+            compression = Tools.detecte_compression(file_path, lecture=mode.startswith("r"))
+        texte = "b" not in mode
+        options = {"encoding": encoding, "newline": newline} if texte else {}
+        mode_flux = mode + "t" if texte else mode
+        match compression:
+            case None | "":
+                return open(file_path, mode, **options)
+            case "gzip" | "gz":
+                return gzip.open(file_path, mode_flux, compresslevel=9 if niveau is None else niveau, **options)
+            case "bz2":
+                return bz2.open(file_path, mode_flux, compresslevel=9 if niveau is None else niveau, **options)
+            case "xz" | "lzma":
+                return lzma.open(file_path, mode_flux, preset=niveau if mode[0] != "r" else None, **options)
+            case _:
+                raise ValueError(f"Compression non supportée : {compression}")
+
+    @staticmethod
+    def plages_fichier(file_path: str, taille_plage: int, debut: int = 0, guillemet: bytes = None) -> list[tuple[int, int]]:
+        """
+        Découpe un fichier en plages d'octets (début, fin) d'environ taille_plage octets,
+        chaque plage se terminant sur une fin d'enregistrement (ou la fin du fichier).
+        Le fichier est projeté en mémoire (mmap). Sans guillemet seuls les octets autour des limites sont lus.
+
+        :param debut: position du premier octet découpé (pour sauter un entête par exemple).
+        :param guillemet: cas du CSV, caractère d'encadrement des valeurs (b'"') : une fin de ligne à l'intérieur
+           d'une valeur encadrée n'est pas une fin d'enregistrement (voir fin_enregistrement).
+           La parité des guillemets dépend de tout ce qui précède : le fichier entier est alors lu une fois, en série
+           dans le processus appelant (comptage en C, par plage), avant que les plages ne soient confiées aux processus.
+           Un guillemet isolé dans une valeur non encadrée (12" par exemple) inverse la parité pour toute la suite
+           du fichier : les limites suivantes peuvent tomber au milieu d'un enregistrement. Un tel fichier doit être
+           lu séquentiellement (clsETL.etl_input_iter).
+        """
+        if taille_plage is None or taille_plage <= 0:
+            raise ValueError("taille_plage doit être un entier strictement positif.")
+        if Tools.detecte_compression(file_path) is not None:
+            raise ValueError(f"Le fichier compressé {file_path} ne peut pas être découpé en plages.")
+        taille = os.path.getsize(file_path)
+        plages: list[tuple[int, int]] = []
+        if debut >= taille:
+            return plages
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+            while debut < taille:
+                fin = Tools.fin_enregistrement(donnees, min(debut + taille_plage, taille) - 1, debut, guillemet)
+                plages.append((debut, fin))
+                debut = fin
+        return plages
+
+    @staticmethod
+    def fin_enregistrement(donnees, position: int, debut: int = 0, guillemet: bytes = None) -> int:
+        """
+        Retourne la position qui suit la première fin de ligne située à partir de position (la taille des données à défaut).
+        Si guillemet est renseigné, les guillemets sont comptés depuis debut (qui doit être un début d'enregistrement) :
+        tant que leur nombre est impair la fin de ligne est à l'intérieur d'une valeur et la recherche continue.
+        Un guillemet doublé ("" dans une valeur) compte pour deux, la parité n'est donc pas affectée.
+        Dans ce cas tous les octets depuis debut sont lus : le comptage est fait en C, par tranche. Un guillemet isolé
+        dans une valeur non encadrée fausse la parité (voir plages_fichier).
+        """
+        taille = len(donnees)
+        nb_guillemets = 0
+        while True:
+            fin = donnees.find(b"\n", position)
+            fin = taille if fin < 0 else fin + 1
+            if guillemet is None or fin >= taille:
+                return fin
+            nb_guillemets += donnees[debut:fin].count(guillemet)
+            if nb_guillemets % 2 == 0:
+                return fin
+            debut = position = fin
+
+    @staticmethod
+    def par_lots(iterable, taille_lot: int):
+        """
+        Découpe un itérable en lots (listes) d'au plus taille_lot éléments.
+        L'itérable n'est parcouru qu'une seule fois et à la demande, le dernier lot peut être incomplet.
+        """
+        if taille_lot is None or taille_lot <= 0:
+            raise ValueError("taille_lot doit être un entier strictement positif.")
+        iterateur = iter(iterable)
+        while True:
+            lot = list(islice(iterateur, taille_lot))
+            if not lot:
+                return
+            yield lot